@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+DataManager 性能基准
+对比逐行 iterrows 选择/逐列 df.at 写入 与 布尔掩码选择/按列批量写入 在不同行数下的耗时，
+以及结果列使用 object 文本与紧凑类型（分类/日期/可空整数）时的内存占用和筛选耗时
+
+用法: python benchmarks/bench_data_manager.py [--sizes 10000,100000,1000000] [--updates 10000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from ruijie_query.core.data_manager import DataManager  # noqa: E402
+from ruijie_query.core.column_types import column_kind, compact_series  # noqa: E402
+
+RESULT_COLUMNS = {
+    "型号": "型号",
+    "服务名称": "服务名称",
+    "设备类型": "设备类型",
+    "保修开始时间": "保修开始时间",
+    "保修结束时间": "保修结束时间",
+    "保修剩余天数": "保修剩余天数",
+    "保修状态": "保修状态",
+    "查询状态": "查询状态",
+}
+
+
+def make_manager(rows: int) -> DataManager:
+    """构造一个已加载数据的 DataManager（一半行已查询成功）"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"Serial Number": [f"G1NQ{i:09d}" for i in range(rows)]})
+    for col in RESULT_COLUMNS:
+        df[col] = None
+    df["查询状态"] = np.where(rng.random(rows) < 0.5, "成功", None).astype(object)
+
+    dm = DataManager("bench.xlsx", "Sheet1", "Serial Number", RESULT_COLUMNS)
+    dm.logger.disabled = True
+    dm.df = df
+    return dm
+
+
+def legacy_select(dm: DataManager) -> list:
+    """改造前的 iterrows 选择"""
+    unqueried = []
+    for index, row in dm.df.iterrows():
+        if pd.isna(row.get("查询状态")) or row.get("查询状态") != "成功":
+            unqueried.append((index, row["Serial Number"]))
+    return unqueried
+
+
+def legacy_update(dm: DataManager, items: list) -> None:
+    """改造前的逐行逐列 df.at 写入（结果列为 object 列）"""
+    for index, results in items:
+        for col in RESULT_COLUMNS:
+            dm.df.at[index, col] = results.get(col, None)
+        dm.df.at[index, "查询状态"] = results.get("查询状态", "未知错误")
+
+
+def sample_results() -> dict:
+    return {
+        "型号": "RG-S5750C-28GT4XS-H",
+        "服务名称": "标准保修",
+        "设备类型": "交换机",
+        "保修开始时间": "2023-01-01",
+        "保修结束时间": "2026-01-01",
+        "保修剩余天数": "100",
+        "保修状态": "在保",
+        "查询状态": "成功",
+    }
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def run(sizes, updates, legacy_limit):
+    print(f"{'行数':>10} | {'操作':<8} | {'改造前(s)':>10} | {'改造后(s)':>10} | {'加速比':>8}")
+    print("-" * 60)
+    for rows in sizes:
+        n_updates = min(updates, rows)
+        results = sample_results()
+        items = [(i, results) for i in range(n_updates)]
+
+        # 选择
+        dm = make_manager(rows)
+        new_select = timed(lambda: dm.get_unqueried_indexes())
+        old_select = timed(lambda: legacy_select(dm)) if rows <= legacy_limit else None
+
+        # 写入
+        dm = make_manager(rows)
+        new_update = timed(lambda: (dm.update_results(items), dm.apply_buffered_results()))
+        dm = make_manager(rows)
+        old_update = timed(lambda: legacy_update(dm, items))
+
+        for name, old, new in (("选择", old_select, new_select), (f"写入{n_updates}", old_update, new_update)):
+            old_text = f"{old:10.3f}" if old is not None else f"{'跳过':>10}"
+            ratio = f"{old / new:7.1f}x" if old is not None and new > 0 else f"{'-':>8}"
+            print(f"{rows:>10} | {name:<8} | {old_text} | {new:10.3f} | {ratio}")
+
+
+def make_filled_frame(rows: int) -> pd.DataFrame:
+    """构造结果列已全部填充的 object 文本 DataFrame（少量不同取值大量重复）"""
+    rng = np.random.default_rng(0)
+    models = np.array([f"RG-S{5750 + i}C-28GT4XS-H" for i in range(40)], dtype=object)
+    ends = np.array([f"20{25 + i // 12}-{i % 12 + 1:02d}-01" for i in range(60)], dtype=object)
+    df = pd.DataFrame({"Serial Number": [f"G1NQ{i:09d}" for i in range(rows)]})
+    df["型号"] = models[rng.integers(0, len(models), rows)]
+    df["服务名称"] = "标准保修"
+    df["设备类型"] = np.where(rng.random(rows) < 0.7, "交换机", "无线AP").astype(object)
+    df["保修开始时间"] = "2023-01-01"
+    df["保修结束时间"] = ends[rng.integers(0, len(ends), rows)]
+    df["保修剩余天数"] = rng.integers(0, 1500, rows).astype(str).astype(object)
+    df["保修状态"] = np.where(rng.random(rows) < 0.8, "在保", "过保").astype(object)
+    df["查询状态"] = np.where(rng.random(rows) < 0.9, "成功", "查询失败").astype(object)
+    # 每个单元格都是独立的 Python 字符串对象，与从文件读入时一致
+    for col in RESULT_COLUMNS:
+        df[col] = pd.Series([str(value) for value in df[col]], index=df.index, dtype=object)
+    return df
+
+
+def run_memory(sizes):
+    print()
+    print(f"{'行数':>10} | {'object(MB)':>10} | {'紧凑(MB)':>10} | {'筛选object(s)':>13} | {'筛选紧凑(s)':>12}")
+    print("-" * 70)
+    for rows in sizes:
+        df = make_filled_frame(rows)
+        compact = df.copy()
+        for col in RESULT_COLUMNS:
+            compact[col] = compact_series(compact[col], column_kind(col))
+
+        object_mb = df[list(RESULT_COLUMNS)].memory_usage(deep=True).sum() / 2**20
+        compact_mb = compact[list(RESULT_COLUMNS)].memory_usage(deep=True).sum() / 2**20
+        object_filter = timed(lambda: df[(df["保修状态"] == "过保") | (df["查询状态"] != "成功")])
+        compact_filter = timed(
+            lambda: compact[(compact["保修状态"] == "过保") | (compact["查询状态"] != "成功")]
+        )
+        print(
+            f"{rows:>10} | {object_mb:10.1f} | {compact_mb:10.1f} | "
+            f"{object_filter:13.3f} | {compact_filter:12.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DataManager 选择与批量写入基准")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="逗号分隔的行数列表")
+    parser.add_argument("--updates", type=int, default=10000, help="每个规模下写入的结果行数")
+    parser.add_argument(
+        "--legacy-limit", type=int, default=1000000,
+        help="超过该行数时跳过 iterrows 基线（百万行时耗时较长）",
+    )
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    run(sizes, args.updates, args.legacy_limit)
+    run_memory(sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,22 @@ if __name__ == "__main__":
     src_dir = current_dir / "src"
     sys.path.insert(0, str(src_dir))
 
+    import argparse
+
+    parser = argparse.ArgumentParser(description="锐捷网络设备保修期批量查询工具")
+    parser.add_argument(
+        "command", nargs="?", choices=["run", "compact", "export", "diff"], default="run",
+        help="run: 批量查询 (默认)；compact: 把结果日志中每个序列号的最新结果合并回数据文件；"
+             "export: 把查询结果流式导出为 <输入文件名>.results.xlsx；"
+             "diff: 对比两次运行的结果快照 (diff 旧文件 新文件)",
+    )
+    parser.add_argument("snapshots", nargs="*", help="diff 的旧、新结果快照 (数据文件或 .jsonl 结果日志)")
+    parser.add_argument("-o", "--output", help="export/diff 的输出文件路径 (export 仅单个输入文件时可用)")
+    parser.add_argument("--fields", help="diff 比较的列，逗号分隔 (默认比较两个快照共有的结果列)")
+    args = parser.parse_args()
+    if args.command == "diff" and len(args.snapshots) != 2:
+        parser.error("diff 需要两个结果快照: diff 旧文件 新文件")
+
     import ruijie_query # 导入包以获取版本号
     from ruijie_query.config import ConfigManager
     from ruijie_query.core.app import RuijieQueryApp
@@ -17,6 +33,17 @@ if __name__ == "__main__":
     config_manager = ConfigManager()
     app = RuijieQueryApp(config_manager)
 
+    if args.command == "compact":
+        app.compact_results()
+        sys.exit(0)
+    if args.command == "export":
+        app.export_results(args.output)
+        sys.exit(0)
+    if args.command == "diff":
+        fields = [f.strip() for f in args.fields.split(",") if f.strip()] if args.fields else None
+        app.diff_results(args.snapshots[0], args.snapshots[1], args.output, fields)
+        sys.exit(0)
+
     # 在程序结束后输出性能报告
     try:
         app.run()
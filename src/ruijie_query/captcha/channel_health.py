@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+AI 渠道可用性缓存
+把启动时的渠道可用性测试结果按渠道标识（类型、模型、base_url 和 API Key 指纹，见 channel_key）
+保存到磁盘，有效期内再次启动时直接复用，不再为每个渠道发送测试请求
+"""
+
+import json
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from ..storage.atomic import atomic_write
+
+
+class ChannelHealthCache:
+    """
+    渠道可用性测试结果的磁盘缓存（线程安全）。
+    path 为空或 ttl 不大于 0 时不读取也不保存，每次启动都重新测试。
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 0, logger: Optional[logging.Logger] = None):
+        self.path = path if ttl and ttl > 0 else None
+        self.ttl = ttl
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        # {渠道标识: {"available": bool, "checked_at": 时间戳}}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def lookup(self, key: str) -> Optional[Tuple[bool, bool]]:
+        """返回 (是否可用, 是否仍在有效期内)，没有记录时返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        fresh = time.time() - entry["checked_at"] < self.ttl
+        return entry["available"], fresh
+
+    def store(self, results: Dict[str, bool]) -> None:
+        """记录一批测试结果 {渠道标识: 是否可用} 并保存"""
+        if not self.enabled or not results:
+            return
+        now = round(time.time(), 3)
+
+        def _write(tmp_path: str) -> None:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=2)
+
+        # 启动测试和后台重新测试可能同时保存，写文件也在锁内进行
+        with self._lock:
+            for key, available in results.items():
+                self._entries[key] = {"available": bool(available), "checked_at": now}
+            try:
+                atomic_write(self.path, _write, 0, self.logger)
+            except OSError as e:
+                self.logger.warning(f"保存 AI 渠道可用性缓存失败: {e}")
+
+    def _load(self) -> None:
+        if not self.enabled or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._entries = {
+                str(key): {"available": bool(entry["available"]), "checked_at": float(entry["checked_at"])}
+                for key, entry in data.items()
+            }
+        except (OSError, ValueError, TypeError, KeyError, AttributeError) as e:
+            self.logger.warning(f"AI 渠道可用性缓存 '{self.path}' 无法读取，将重新测试所有渠道: {e}")
+            self._entries = {}
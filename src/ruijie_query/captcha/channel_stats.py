@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+AI 渠道实时统计与路由
+按渠道维护调用耗时、调用成功率和网站接受率的指数加权移动平均（EWMA），
+按“得到一个正确答案的预期耗时”排序渠道，并以一定概率探索其它渠道，使恢复的渠道能重新被选中；
+触发频率限制 (429) 的渠道在冷却期内排在最后，并由调用方跳过
+"""
+
+import hashlib
+import random
+import statistics
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+# EWMA 平滑系数：新观测值的权重
+EWMA_ALPHA = 0.3
+# 探索概率：以该概率把随机一个非首选渠道提到最前
+EXPLORATION_RATE = 0.1
+# 网站接受率的先验值（乐观）：网站反馈噪声较大，单次拒绝不应让渠道被完全冷落。
+# 耗时和调用成功率则从第一次观测开始计算，首次调用就失败的渠道（通常是配置错误或服务故障）立即排到后面
+_PRIOR_ACCEPTANCE = 1.0
+# 计算预期耗时时正确概率的下限，避免除零并让完全失败的渠道仍有有限的分数
+_MIN_RATE = 0.05
+
+
+def channel_key(channel_config: Dict[str, Any]) -> str:
+    """渠道标识：类型、模型、base_url 和 API Key 指纹（不包含 Key 本身）"""
+    api_key = channel_config.get("api_key") or ""
+    fingerprint = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+    return "|".join([
+        str(channel_config.get("api_type") or "").strip().lower(),
+        str(channel_config.get("model_name") or ""),
+        str(channel_config.get("base_url") or ""),
+        fingerprint,
+    ])
+
+
+def _ewma(previous: Optional[float], value: float, alpha: float) -> float:
+    return value if previous is None else alpha * value + (1 - alpha) * previous
+
+
+class ChannelStats:
+    """各 AI 渠道的 EWMA 统计（线程安全）"""
+
+    def __init__(
+        self,
+        alpha: float = EWMA_ALPHA,
+        exploration: float = EXPLORATION_RATE,
+        rng: Optional[random.Random] = None,
+    ):
+        self.alpha = alpha
+        self.exploration = exploration
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        # {渠道: 冷却结束时间 (time.monotonic())}
+        self._cooldowns: Dict[str, float] = {}
+
+    def _entry(self, key: str) -> Dict[str, Any]:
+        entry = self._stats.get(key)
+        if entry is None:
+            entry = {"latency": None, "success": None, "acceptance": _PRIOR_ACCEPTANCE, "calls": 0, "reports": 0}
+            self._stats[key] = entry
+        return entry
+
+    def record_call(self, key: str, latency: float, success: bool) -> None:
+        """记录一次 API 调用：耗时（秒）以及是否得到符合格式的识别结果"""
+        with self._lock:
+            entry = self._entry(key)
+            entry["latency"] = _ewma(entry["latency"], latency, self.alpha)
+            entry["success"] = _ewma(entry["success"], 1.0 if success else 0.0, self.alpha)
+            entry["calls"] += 1
+
+    def record_acceptance(self, key: str, accepted: bool) -> None:
+        """记录渠道给出的答案提交后是否被网站接受"""
+        with self._lock:
+            entry = self._entry(key)
+            entry["acceptance"] = _ewma(entry["acceptance"], 1.0 if accepted else 0.0, self.alpha)
+            entry["reports"] += 1
+
+    def cool_down(self, key: str, seconds: float) -> None:
+        """渠道触发频率限制后进入冷却；已在冷却中时取较晚的结束时间"""
+        until = time.monotonic() + max(0.0, seconds)
+        with self._lock:
+            self._cooldowns[key] = max(until, self._cooldowns.get(key, 0.0))
+
+    def cooldown_remaining(self, key: str) -> float:
+        """渠道剩余的冷却时间（秒），不在冷却中时为 0"""
+        with self._lock:
+            until = self._cooldowns.get(key)
+            if until is None:
+                return 0.0
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                del self._cooldowns[key]
+                return 0.0
+            return remaining
+
+    def expected_time(self, key: str) -> Optional[float]:
+        """得到一个正确答案的预期耗时（秒）= 平均耗时 / (成功率 × 接受率)；尚无调用记录时为 None"""
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None or entry["latency"] is None:
+                return None
+            rate = max(entry["success"] * entry["acceptance"], _MIN_RATE)
+            return entry["latency"] / rate
+
+    def order(self, keys: Sequence[str]) -> List[int]:
+        """
+        返回渠道的尝试顺序（keys 的下标）：按预期耗时从小到大，冷却中的渠道排在最后；
+        尚无记录的渠道取已有记录渠道预期耗时的中位数作为中性评分（都没有记录时保持配置顺序），
+        这样只返回 429 而从未留下记录的渠道不会一直排在最前。
+        已有渠道产生记录后，以 exploration 的概率把随机一个非首选、未冷却的渠道提到最前。
+        """
+        scores = [self.expected_time(key) for key in keys]
+        observed = [score for score in scores if score is not None]
+        prior = statistics.median(observed) if observed else 0.0
+        cooling = [self.cooldown_remaining(key) > 0 for key in keys]
+        order = sorted(
+            range(len(keys)),
+            key=lambda i: (cooling[i], scores[i] if scores[i] is not None else prior, i),
+        )
+        available = len(keys) - sum(cooling)
+        if observed and available > 1 and self._rng.random() < self.exploration:
+            explored = order.pop(self._rng.randrange(1, available))
+            order.insert(0, explored)
+        return order
+
+    def describe(self, key: str) -> str:
+        """用于性能报告的渠道评分文本"""
+        expected = self.expected_time(key)
+        remaining = self.cooldown_remaining(key)
+        cooling = f", 冷却中 (剩余 {remaining:.0f}s)" if remaining > 0 else ""
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None or entry["latency"] is None:
+                return "尚无调用记录" + cooling
+            return (
+                f"延迟 {entry['latency']:.2f}s, 成功率 {entry['success']:.0%}, "
+                f"接受率 {entry['acceptance']:.0%}, 预期 {expected:.2f}s "
+                f"({entry['calls']} 次调用, {entry['reports']} 次提交反馈){cooling}"
+            )
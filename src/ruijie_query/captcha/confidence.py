@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+验证码识别置信度
+解码 ddddocr 概率输出得到识别结果和置信度，并按阈值决定提交、本地刷新验证码还是交给 AI 识别
+"""
+
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 识别结果的处理方式
+ACTION_SUBMIT = "submit"      # 直接提交
+ACTION_REFRESH = "refresh"    # 置信度很低：本地刷新验证码换一张图（不消耗提交和等待）
+ACTION_ESCALATE = "escalate"  # 置信度中等：交给 AI 渠道识别同一张图
+
+
+def decode_probability(charsets: Sequence[str], probability: Any) -> Tuple[str, float]:
+    """
+    解码 ddddocr classification(..., probability=True) 的输出。
+    probability 为每个时间步在 charsets 上的概率分布（CTC 输出，空白字符为 ""），
+    按 CTC 规则取每步最大概率的字符、合并连续重复并去掉空白。
+    置信度为每个输出字符所在时间步最大概率的乘积，即整串识别正确的估计概率。
+    """
+    probs = np.asarray(probability, dtype=np.float64)
+    if probs.ndim == 1:
+        probs = probs[np.newaxis, :]
+    if probs.size == 0:
+        return "", 0.0
+
+    best = probs.argmax(axis=1)
+    best_probs = probs[np.arange(len(best)), best]
+    chars = []
+    confidence = 1.0
+    previous = -1
+    for index, prob in zip(best, best_probs):
+        if index != previous and charsets[index] != "":
+            chars.append(charsets[index])
+            confidence *= float(prob)
+        previous = index
+    if not chars:
+        return "", 0.0
+    return "".join(chars), confidence
+
+
+def choose_action(
+    confidence: Optional[float],
+    submit_threshold: float,
+    refresh_threshold: float,
+    can_refresh: bool = True,
+    can_escalate: bool = True,
+) -> str:
+    """
+    按置信度选择处理方式：
+    - 置信度未知（例如 AI 结果或 ddddocr 不支持概率输出）或不低于 submit_threshold：提交；
+    - 低于 refresh_threshold 且还能刷新验证码：本地刷新；
+    - 其它情况：能交给 AI 时交给 AI，否则仍然提交。
+    """
+    if confidence is None or confidence >= submit_threshold:
+        return ACTION_SUBMIT
+    if confidence < refresh_threshold and can_refresh:
+        return ACTION_REFRESH
+    if can_escalate:
+        return ACTION_ESCALATE
+    return ACTION_SUBMIT
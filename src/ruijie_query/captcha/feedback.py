@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+验证码提交反馈
+记录每次提交的验证码是否被网站接受 (图片哈希, 答案, 识别器, 是否接受)，并以被接受的答案为准，
+对同一张图片上各识别器给出的候选结果逐字符统计混淆矩阵（例如 0/o、1/l、5/s），
+提交前按学习到的混淆关系纠正识别结果
+"""
+
+import hashlib
+import json
+import os
+import time
+import logging
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+# 某个识别器输出字符 c 至少出现多少次（有确定答案时）才根据混淆统计纠正
+CORRECTION_MIN_SUPPORT = 5
+# 输出 c 时实际为 t 的比例超过该值才把 c 纠正为 t
+CORRECTION_MIN_RATE = 0.5
+# 内存中保留候选结果的最近图片数
+MAX_PENDING_IMAGES = 64
+
+
+def image_hash(image_data: bytes) -> str:
+    return hashlib.sha1(image_data or b"").hexdigest()
+
+
+class FeedbackStore:
+    """
+    验证码提交反馈记录与字符混淆统计。
+    识别过程中各识别器的结果通过 add_candidate 按图片记录，提交后 record 写入反馈日志（JSONL，
+    path 为空时只在内存中统计）；被接受的答案与同一图片上等长的候选结果逐位比较，更新混淆计数。
+    """
+
+    def __init__(self, path: Optional[str] = None, logger: Optional[logging.Logger] = None):
+        self.path = path
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._pending: "OrderedDict[str, List[Tuple[str, str]]]" = OrderedDict()
+        # {识别器: Counter({(输出字符, 正确字符): 次数})}
+        self.confusions: Dict[str, Counter] = defaultdict(Counter)
+        self.submitted = 0
+        self.accepted = 0
+        self._load()
+
+    def add_candidate(self, image: str, solver: str, answer: Optional[str]) -> None:
+        """记录某个识别器对图片（哈希）给出的候选结果（纠正前的原始结果）"""
+        if not answer:
+            return
+        with self._lock:
+            candidates = self._pending.setdefault(image, [])
+            self._pending.move_to_end(image)
+            candidates.append((solver, answer))
+            while len(self._pending) > MAX_PENDING_IMAGES:
+                self._pending.popitem(last=False)
+
+    def record(self, image: str, answer: str, solver: Optional[str], accepted: bool) -> None:
+        """记录一次提交结果，并在答案被接受时用同一图片的候选结果更新混淆统计"""
+        with self._lock:
+            candidates = self._pending.pop(image, [])
+            entry = {
+                "time": round(time.time(), 3),
+                "image": image,
+                "answer": answer,
+                "solver": solver,
+                "accepted": bool(accepted),
+                "candidates": [list(candidate) for candidate in candidates],
+            }
+            self._apply(entry)
+        self._append(entry)
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        self.submitted += 1
+        if not entry.get("accepted"):
+            return
+        self.accepted += 1
+        truth = str(entry.get("answer") or "")
+        for solver, candidate in entry.get("candidates", []):
+            if len(candidate) != len(truth):
+                continue
+            self.confusions[solver].update(zip(candidate, truth))
+
+    @property
+    def acceptance_rate(self) -> Optional[float]:
+        return self.accepted / self.submitted if self.submitted else None
+
+    def corrections(self, solver: Optional[str]) -> Dict[str, str]:
+        """识别器的字符纠正表 {输出字符: 纠正后的字符}"""
+        with self._lock:
+            counts = self.confusions.get(solver or "")
+            if not counts:
+                return {}
+            by_output: Dict[str, Counter] = defaultdict(Counter)
+            for (output, truth), count in counts.items():
+                by_output[output][truth] += count
+        table = {}
+        for output, truths in by_output.items():
+            total = sum(truths.values())
+            truth, count = truths.most_common(1)[0]
+            if truth != output and total >= CORRECTION_MIN_SUPPORT and count / total > CORRECTION_MIN_RATE:
+                table[output] = truth
+        return table
+
+    def correct(self, solver: Optional[str], answer: Optional[str]) -> Optional[str]:
+        """按识别器的混淆统计纠正识别结果"""
+        if not answer:
+            return answer
+        table = self.corrections(solver)
+        if not table:
+            return answer
+        return "".join(table.get(ch, ch) for ch in answer)
+
+    def _load(self) -> None:
+        """从反馈日志重建统计，跳过无法解析的行（例如崩溃时写了一半的最后一行）"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        skipped = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        self._apply(json.loads(line))
+                    except (ValueError, TypeError, AttributeError):
+                        skipped += 1
+        except OSError as e:
+            self.logger.warning(f"无法读取验证码反馈记录 '{self.path}': {e}")
+            return
+        if skipped:
+            self.logger.warning(f"验证码反馈记录中有 {skipped} 行无法解析，已跳过。")
+        if self.submitted:
+            self.logger.info(
+                f"已加载 {self.submitted} 条验证码反馈记录，接受率 {self.acceptance_rate:.1%}。"
+            )
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        if not self.path:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            self.logger.warning(f"写入验证码反馈记录失败: {e}")
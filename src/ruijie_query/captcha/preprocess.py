@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+验证码图片预处理模块 (需要 Pillow，ddddocr 已依赖该库)
+为同一张验证码生成多个预处理变体（灰度、二值化、去噪、放大、裁边），
+ddddocr 在各变体上分别识别后投票，代替在同一张图片上重复相同的推理
+"""
+
+import io
+import logging
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 可选依赖: pip install Pillow
+try:
+    from PIL import Image, ImageFilter, ImageOps  # type: ignore
+except ImportError:
+    Image = None  # type: ignore
+    ImageFilter = None  # type: ignore
+    ImageOps = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# 变体顺序即优先级：投票平票时排在前面的变体胜出
+VARIANT_NAMES = ("original", "grayscale", "threshold", "denoise", "scale", "crop")
+_CROP_MARGIN = 2
+
+
+def _otsu_threshold(pixels: np.ndarray) -> int:
+    """Otsu 法计算灰度图的二值化阈值"""
+    hist = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    total = pixels.size
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    cum_mean = np.cumsum(hist * np.arange(256))
+    mean_bg = cum_mean / np.maximum(weight_bg, 1)
+    mean_fg = (cum_mean[-1] - cum_mean) / np.maximum(weight_fg, 1)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+
+def _threshold(img: "Image.Image") -> "Image.Image":
+    gray = np.asarray(img.convert("L"), dtype=np.uint8)
+    binary = np.where(gray > _otsu_threshold(gray), 255, 0).astype(np.uint8)
+    return Image.fromarray(binary, mode="L")
+
+
+def _crop(img: "Image.Image") -> "Image.Image":
+    """裁掉四周的空白背景（保留少量边距），背景无法区分时裁掉固定的边框"""
+    gray = np.asarray(img.convert("L"), dtype=np.uint8)
+    foreground = gray < _otsu_threshold(gray)
+    rows = np.flatnonzero(foreground.any(axis=1))
+    cols = np.flatnonzero(foreground.any(axis=0))
+    height, width = gray.shape
+    if len(rows) and len(cols):
+        box = (
+            max(int(cols[0]) - _CROP_MARGIN, 0),
+            max(int(rows[0]) - _CROP_MARGIN, 0),
+            min(int(cols[-1]) + _CROP_MARGIN + 1, width),
+            min(int(rows[-1]) + _CROP_MARGIN + 1, height),
+        )
+    else:
+        box = (_CROP_MARGIN, _CROP_MARGIN, width - _CROP_MARGIN, height - _CROP_MARGIN)
+    if box[2] - box[0] < 4 or box[3] - box[1] < 4:
+        return img
+    return img.crop(box)
+
+
+_TRANSFORMS: Dict[str, Callable[["Image.Image"], "Image.Image"]] = {
+    "grayscale": lambda img: ImageOps.grayscale(img),
+    "threshold": _threshold,
+    "denoise": lambda img: img.convert("L").filter(ImageFilter.MedianFilter(3)),
+    "scale": lambda img: img.resize((img.width * 2, img.height * 2), Image.LANCZOS),
+    "crop": _crop,
+}
+
+
+def make_variants(image_data: bytes, count: int) -> List[Tuple[str, bytes]]:
+    """
+    生成前 count 个预处理变体，返回 [(变体名, PNG 图片数据)]，第一个总是原图。
+    未安装 Pillow 或图片无法解码时只返回原图。
+    """
+    variants = [("original", image_data)]
+    if count <= 1 or Image is None or not image_data:
+        return variants
+    try:
+        img = Image.open(io.BytesIO(image_data))
+        img.load()
+        img = img.convert("RGB")
+    except Exception as e:
+        logger.debug(f"验证码图片无法解码，只使用原图识别: {e}")
+        return variants
+
+    for name in VARIANT_NAMES[1:count]:
+        try:
+            buffer = io.BytesIO()
+            _TRANSFORMS[name](img).save(buffer, format="PNG")
+            variants.append((name, buffer.getvalue()))
+        except Exception as e:
+            logger.debug(f"生成预处理变体 '{name}' 失败: {e}")
+    return variants
+
+
+def vote(answers: Sequence[Optional[str]]) -> Tuple[Optional[str], int]:
+    """
+    多个变体识别结果投票，返回 (得票最多的结果, 票数)；空结果不参与投票，
+    平票时取最先出现的结果（即优先级更高的变体）。
+    """
+    counts = Counter(answer for answer in answers if answer)
+    if not counts:
+        return None, 0
+    best_votes = max(counts.values())
+    for answer in answers:
+        if answer and counts[answer] == best_votes:
+            return answer, best_votes
+    return None, 0  # pragma: no cover
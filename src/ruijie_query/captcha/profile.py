@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+验证码格式约束
+验证码的长度范围、字符集和大小写规则，可在 [CaptchaSettings] 中配置，未配置的部分从提交成功的
+历史答案中学习。用于限制 ddddocr 的输出字符范围、归一化易混淆字形，并在提交前拒绝不符合格式的结果
+"""
+
+import json
+import os
+import string
+import logging
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+from ..storage.atomic import atomic_write
+
+# 字符集预设名称，其它取值按字面字符集合处理
+CHARSET_PRESETS = {
+    "digits": string.digits,
+    "lower": string.ascii_lowercase,
+    "upper": string.ascii_uppercase,
+    "letters": string.ascii_letters,
+    "alnum_lower": string.digits + string.ascii_lowercase,
+    "alnum": string.digits + string.ascii_letters,
+}
+# 大小写规则：preserve 保留识别结果的大小写，lower/upper 统一转换
+CASE_RULES = ("preserve", "lower", "upper")
+# 学习到的约束至少需要多少个提交成功的答案才会生效
+LEARN_MIN_SAMPLES = 20
+MAX_CAPTCHA_LENGTH = 16
+
+# 易混淆字形：字符不在字符集内时依次尝试替换为这些字符
+_CONFUSABLES = {
+    "0": "oOD", "o": "0O", "O": "0o", "D": "0",
+    "1": "lIi", "l": "1I", "I": "1l", "i": "1l",
+    "2": "zZ", "z": "2", "Z": "2",
+    "5": "sS", "s": "5", "S": "5",
+    "6": "b", "b": "6",
+    "8": "B", "B": "8",
+    "9": "gq", "g": "9", "q": "9",
+}
+
+
+def parse_length(text: Optional[str]) -> Optional[Tuple[int, int]]:
+    """解析长度配置：'4' 或 '4-6'，空值返回 None；格式无效时抛出 ValueError"""
+    text = (text or "").strip()
+    if not text:
+        return None
+    low, sep, high = text.partition("-")
+    min_length = int(low)
+    max_length = int(high) if sep else min_length
+    if not 1 <= min_length <= max_length <= MAX_CAPTCHA_LENGTH:
+        raise ValueError(f"验证码长度应在 1-{MAX_CAPTCHA_LENGTH} 之间且下限不大于上限: {text}")
+    return min_length, max_length
+
+
+def parse_charset(text: Optional[str]) -> Optional[str]:
+    """解析字符集配置：预设名称或字面字符集合（只能包含字母数字），空值返回 None"""
+    text = (text or "").strip()
+    if not text:
+        return None
+    if text.lower() in CHARSET_PRESETS:
+        return CHARSET_PRESETS[text.lower()]
+    if not text.isalnum():
+        raise ValueError(f"验证码字符集只能是预设名称或字母数字字符: {text}")
+    return "".join(sorted(set(text)))
+
+
+class CaptchaProfile:
+    """
+    验证码格式约束。length/charset 为 None 时使用从提交成功的答案中学习到的约束
+    （样本数达到 LEARN_MIN_SAMPLES 前不做限制）；path 为学习统计的保存路径，为空时不持久化。
+    """
+
+    def __init__(
+        self,
+        length: Optional[Tuple[int, int]] = None,
+        charset: Optional[str] = None,
+        case: str = "preserve",
+        path: Optional[str] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.logger = logger or logging.getLogger(__name__)
+        self.case = case if case in CASE_RULES else "preserve"
+        self.configured_length = length
+        self.configured_charset = "".join(sorted(set(self._fold(charset)))) if charset else None
+        self.path = path
+        self.samples = 0
+        self.lengths: Counter = Counter()
+        self.chars: Counter = Counter()
+        self._load()
+
+    @classmethod
+    def from_config(cls, captcha_config: Dict[str, Any], logger: Optional[logging.Logger] = None) -> "CaptchaProfile":
+        """从 get_captcha_config() 的结果创建；配置无效的项记录警告后忽略"""
+        logger = logger or logging.getLogger(__name__)
+        length = charset = None
+        try:
+            length = parse_length(captcha_config.get("length"))
+        except ValueError as e:
+            logger.warning(f"忽略无效的验证码长度配置: {e}")
+        try:
+            charset = parse_charset(captcha_config.get("charset"))
+        except ValueError as e:
+            logger.warning(f"忽略无效的验证码字符集配置: {e}")
+        return cls(length, charset, captcha_config.get("case", "preserve"), captcha_config.get("profile_file"), logger)
+
+    def _fold(self, text: str) -> str:
+        """按大小写规则转换文本"""
+        if self.case == "lower":
+            text = text.lower()
+        elif self.case == "upper":
+            text = text.upper()
+        return text
+
+    @property
+    def learned(self) -> bool:
+        return self.samples >= LEARN_MIN_SAMPLES
+
+    @property
+    def length_range(self) -> Optional[Tuple[int, int]]:
+        """生效的长度范围，未知时为 None"""
+        if self.configured_length:
+            return self.configured_length
+        if self.learned and self.lengths:
+            return min(self.lengths), max(self.lengths)
+        return None
+
+    @property
+    def charset(self) -> Optional[str]:
+        """生效的字符集，未知时为 None（只要求字母数字）"""
+        if self.configured_charset:
+            return self.configured_charset
+        if not self.learned or not self.chars:
+            return None
+        # 按出现过的字符类别放宽：出现过数字即允许全部数字，字母同理
+        observed = set(self.chars)
+        allowed = set(observed)
+        if any(ch in string.digits for ch in observed):
+            allowed.update(string.digits)
+        if any(ch in string.ascii_lowercase for ch in observed):
+            allowed.update(string.ascii_lowercase)
+        if any(ch in string.ascii_uppercase for ch in observed):
+            allowed.update(string.ascii_uppercase)
+        return "".join(sorted(allowed))
+
+    def ocr_ranges(self) -> Optional[str]:
+        """
+        限制 ddddocr 输出的字符范围（不区分大小写，ddddocr 的默认模型只输出小写字母），
+        字符集未知时返回 None。
+        """
+        charset = self.charset
+        if not charset:
+            return None
+        return "".join(sorted(set(charset.lower() + charset.upper())))
+
+    def normalize(self, answer: Optional[str]) -> str:
+        """去除非字母数字字符、应用大小写规则，并把字符集外的易混淆字形替换为字符集内的字符"""
+        text = self._fold("".join(filter(str.isalnum, answer or "")))
+        charset = self.charset
+        if not charset:
+            return text
+        chars = []
+        for ch in text:
+            if ch not in charset:
+                for candidate in ch.swapcase() + _CONFUSABLES.get(ch, ""):
+                    if candidate in charset:
+                        ch = candidate
+                        break
+            chars.append(ch)
+        return "".join(chars)
+
+    def accepts(self, answer: Optional[str]) -> bool:
+        """结果是否符合长度和字符集约束（不做归一化）"""
+        if not answer or not str(answer).isalnum():
+            return False
+        length_range = self.length_range
+        if length_range and not length_range[0] <= len(answer) <= length_range[1]:
+            return False
+        charset = self.charset
+        return not charset or all(ch in charset for ch in answer)
+
+    def fit(self, answer: Optional[str]) -> Optional[str]:
+        """归一化识别结果，符合约束时返回归一化后的结果，否则返回 None"""
+        normalized = self.normalize(answer)
+        return normalized if self.accepts(normalized) else None
+
+    def describe(self) -> str:
+        length_range = self.length_range
+        length = "不限" if not length_range else (
+            str(length_range[0]) if length_range[0] == length_range[1] else f"{length_range[0]}-{length_range[1]}"
+        )
+        source = f"已学习 {self.samples} 个成功提交的答案" if self.samples else "无学习样本"
+        return f"长度 {length}，字符集 {self.charset or '字母数字'}，大小写 {self.case} ({source})"
+
+    def observe(self, answer: str) -> bool:
+        """
+        记录一个提交成功的答案，更新学习统计并保存。
+        返回生效的字符集是否因此变化（调用方据此更新 ddddocr 的输出范围）。
+        """
+        answer = self._fold(answer or "")
+        if not answer.isalnum():
+            return False
+        before = self.charset
+        self.samples += 1
+        self.lengths[len(answer)] += 1
+        self.chars.update(answer)
+        self._save()
+        if self.samples == LEARN_MIN_SAMPLES:
+            self.logger.info(f"验证码格式学习完成: {self.describe()}")
+        return self.charset != before
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.samples = int(data.get("samples", 0))
+            self.lengths = Counter({int(k): int(v) for k, v in data.get("lengths", {}).items()})
+            self.chars = Counter({str(k): int(v) for k, v in data.get("chars", {}).items()})
+        except (OSError, ValueError, AttributeError) as e:
+            self.logger.warning(f"验证码格式学习记录 '{self.path}' 无法读取，将重新学习: {e}")
+            self.samples = 0
+            self.lengths = Counter()
+            self.chars = Counter()
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        data = {
+            "samples": self.samples,
+            "lengths": {str(k): v for k, v in sorted(self.lengths.items())},
+            "chars": dict(sorted(self.chars.items())),
+        }
+
+        def _write(tmp_path: str) -> None:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+
+        try:
+            atomic_write(self.path, _write, 0, self.logger)
+        except OSError as e:
+            self.logger.warning(f"保存验证码格式学习记录失败: {e}")
@@ -1,4 +1,5 @@
 import configparser
+import glob
 import os
 import re
 import json
@@ -76,7 +77,11 @@ class ConfigValidator:
 
         # 验证文件路径
         excel_path = section.get("excel_file_path")
-        if excel_path and not self._validate_file_path(excel_path):
+        if excel_path and glob.has_magic(excel_path):
+            # 分块模式下可以用通配符指定多个输入文件
+            if not glob.glob(excel_path):
+                self.validation_errors.append(f"没有文件匹配输入路径: {excel_path}")
+        elif excel_path and not self._validate_file_path(excel_path):
             self.validation_errors.append(f"Excel文件路径无效: {excel_path}")
 
         # 验证数值字段 - 使用常量替代magic number
@@ -85,7 +90,9 @@ class ConfigValidator:
             "query_delay": (0, ConfigLimits.QUERY_DELAY_MAX),      # 查询延时最大值
             "save_interval": (0, ConfigLimits.SAVE_INTERVAL_MAX),   # 保存间隔最大值
             "max_query_attempts": (1, ConfigLimits.MAX_QUERY_ATTEMPTS), # 最大查询尝试次数
-            "max_captcha_retries": (0, ConfigLimits.MAX_CAPTCHA_RETRIES)  # 最大验证码重试次数
+            "max_captcha_retries": (0, ConfigLimits.MAX_CAPTCHA_RETRIES),  # 最大验证码重试次数
+            "save_generations": (0, ConfigLimits.SAVE_GENERATIONS_MAX),  # 保留的工作簿备份代数
+            "chunk_size": (0, ConfigLimits.CHUNK_SIZE_MAX)  # 分块处理每块行数
         }
 
         for field, (min_val, max_val) in numeric_fields.items():
@@ -101,6 +108,45 @@ class ConfigValidator:
                 except (ValueError, TypeError):
                     self.validation_errors.append(f"General.{field} 不是有效的整数值")
 
+        # 验证存储后端
+        storage_backend = section.get("storage_backend", "auto").strip().lower()
+        valid_backends = ["auto", "excel", "csv", "parquet", "sqlite"]
+        if storage_backend not in valid_backends:
+            self.validation_errors.append(
+                f"General.storage_backend 无效: {storage_backend}，应该是: {', '.join(valid_backends)}"
+            )
+
+        # 验证分块处理输出格式
+        chunk_output_format = section.get("chunk_output_format", "csv").strip().lower()
+        if chunk_output_format not in ["csv", "sqlite"]:
+            self.validation_errors.append(
+                f"General.chunk_output_format 无效: {chunk_output_format}，应该是: csv, sqlite"
+            )
+
+        # 验证结果日志模式
+        result_log_mode = section.get("result_log_mode", "off").strip().lower()
+        valid_log_modes = ["off", "append", "only"]
+        if result_log_mode not in valid_log_modes:
+            self.validation_errors.append(
+                f"General.result_log_mode 无效: {result_log_mode}，应该是: {', '.join(valid_log_modes)}"
+            )
+
+        # 验证序列号格式正则
+        for pattern in section.get("serial_patterns", "").split(";"):
+            if not pattern.strip():
+                continue
+            try:
+                re.compile(pattern.strip())
+            except re.error as e:
+                self.validation_errors.append(f"General.serial_patterns 中的正则无效: {pattern.strip()} ({e})")
+
+        # 验证布尔配置项
+        bool_fields = ["background_save", "derive_warranty_fields", "read_cache"]
+        for field in bool_fields:
+            value = section.get(field, "True")
+            if value.lower() not in ["true", "false"]:
+                self.validation_errors.append(f"General.{field} 应该是 True 或 False")
+
         # 验证ChromeDriver路径（如果指定）
         driver_path = section.get("chrome_driver_path")
         if driver_path and not self._validate_driver_path(driver_path):
@@ -113,7 +159,10 @@ class ConfigValidator:
             "retry_attempts": (1, 10),
             "retry_delay": (1, 60),
             "rate_limit_delay": (1, 300),
-            "ai_test_timeout": (10, 300)
+            "ai_test_timeout": (10, 300),
+            "ai_request_timeout": (5, 300),
+            "ai_max_concurrency": (1, 20),
+            "ai_health_cache_ttl": (0, 604800)
         }
 
         for field, (min_val, max_val) in numeric_fields.items():
@@ -129,6 +178,19 @@ class ConfigValidator:
                 except ValueError:
                     self.validation_errors.append(f"AI_Settings.{field} 不是有效的整数值")
 
+        # 验证渠道路由探索概率
+        try:
+            exploration = section.getfloat("ai_routing_exploration", 0.1)
+            if exploration is not None and not (0.0 <= exploration <= 1.0):
+                self.validation_errors.append("AI_Settings.ai_routing_exploration 应该在 0-1 范围内")
+        except ValueError:
+            self.validation_errors.append("AI_Settings.ai_routing_exploration 不是有效的数值")
+
+        # 验证渠道验证方式
+        validation = section.get("ai_channel_validation", "startup").strip().lower()
+        if validation not in ("startup", "lazy"):
+            self.validation_errors.append("AI_Settings.ai_channel_validation 应该是 'startup' 或 'lazy'")
+
         # 验证AI渠道配置
         self._validate_ai_channels(section)
 
@@ -254,6 +316,43 @@ class ConfigValidator:
                 f"应该是: {', '.join(valid_solvers)}"
             )
 
+        # 验证识别策略
+        solve_strategy = section.get("captcha_solve_strategy", "sequential").strip().lower()
+        valid_strategies = ["sequential", "race", "consensus"]
+        if solve_strategy not in valid_strategies:
+            self.validation_errors.append(
+                f"CaptchaSettings.captcha_solve_strategy 无效: {solve_strategy}，"
+                f"应该是: {', '.join(valid_strategies)}"
+            )
+
+        # 验证置信度阈值
+        thresholds = {}
+        for field in ["captcha_submit_confidence", "captcha_refresh_confidence"]:
+            try:
+                value = section.getfloat(field, 0.0)
+                if value is not None and not (0.0 <= value <= 1.0):
+                    self.validation_errors.append(f"CaptchaSettings.{field} 应该在 0-1 范围内")
+                thresholds[field] = value
+            except ValueError:
+                self.validation_errors.append(f"CaptchaSettings.{field} 不是有效的数值")
+        if thresholds.get("captcha_refresh_confidence", 0.0) > thresholds.get("captcha_submit_confidence", 1.0):
+            self.validation_errors.append(
+                "CaptchaSettings.captcha_refresh_confidence 不应大于 captcha_submit_confidence"
+            )
+
+        # 验证验证码格式约束
+        from ..captcha.profile import CASE_RULES, parse_charset, parse_length
+        for field, parser in [("captcha_length", parse_length), ("captcha_charset", parse_charset)]:
+            try:
+                parser(section.get(field, ""))
+            except ValueError:
+                self.validation_errors.append(f"CaptchaSettings.{field} 无效: {section.get(field, '')}")
+        captcha_case = section.get("captcha_case", "preserve").strip().lower()
+        if captcha_case not in CASE_RULES:
+            self.validation_errors.append(
+                f"CaptchaSettings.captcha_case 无效: {captcha_case}，应该是: {', '.join(CASE_RULES)}"
+            )
+
         # 验证布尔配置项
         bool_fields = ["captcha_enable_ddddocr", "captcha_enable_ai"]
         for field in bool_fields:
@@ -507,7 +606,8 @@ class ConfigManager:
                 "captcha_primary_solver": "ddddocr",
                 "captcha_enable_ddddocr": "True",
                 "captcha_enable_ai": "True",
-                "ddddocr_max_attempts": "3"
+                "ddddocr_max_attempts": "3",
+                "captcha_solve_strategy": "sequential"
             }
         }
 
@@ -559,7 +659,9 @@ class ConfigManager:
                 "query_delay": (0, 300),
                 "save_interval": (0, 1000),
                 "max_query_attempts": (1, 10),
-                "max_captcha_retries": (0, 5)
+                "max_captcha_retries": (0, 5),
+                "save_generations": (0, 20),
+                "chunk_size": (0, 1000000)
             }
 
             for field, (min_val, max_val) in general_ranges.items():
@@ -580,7 +682,9 @@ class ConfigManager:
                             "query_delay": 10,
                             "save_interval": 10,
                             "max_query_attempts": 3,
-                            "max_captcha_retries": 2
+                            "max_captcha_retries": 2,
+                            "save_generations": 3,
+                            "chunk_size": 0
                         }
                         self.config.set("General", field, str(default_values[field]))
                         fixed_count += 1
@@ -612,6 +716,7 @@ class ConfigManager:
     def export_config_template(self, output_file="config_template.ini"):
         """导出配置模板"""
         try:
+            from .constants import ConfigDefaults
             template_config = configparser.ConfigParser()
 
             # 添加所有必要的节和字段
@@ -624,12 +729,28 @@ class ConfigManager:
             template_config.set("General", "chrome_driver_path", "")
             template_config.set("General", "max_query_attempts", "3")
             template_config.set("General", "max_captcha_retries", "2")
+            template_config.set("General", "background_save", "True")
+            template_config.set("General", "save_generations", "3")
+            template_config.set("General", "storage_backend", "auto")
+            template_config.set("General", "serial_patterns", ConfigDefaults.DEFAULT_SERIAL_PATTERNS)
+            template_config.set("General", "result_log_mode", "off")
+            template_config.set("General", "result_log_path", "")
+            template_config.set("General", "chunk_size", "0")
+            template_config.set("General", "chunk_output_format", "csv")
+            template_config.set("General", "derive_warranty_fields", "True")
+            template_config.set("General", "read_cache", "True")
 
             template_config.add_section("AI_Settings")
             template_config.set("AI_Settings", "retry_attempts", "3")
             template_config.set("AI_Settings", "retry_delay", "5")
             template_config.set("AI_Settings", "rate_limit_delay", "30")
             template_config.set("AI_Settings", "ai_test_timeout", "120")
+            template_config.set("AI_Settings", "ai_request_timeout", "30")
+            template_config.set("AI_Settings", "ai_max_concurrency", "2")
+            template_config.set("AI_Settings", "ai_routing_exploration", "0.1")
+            template_config.set("AI_Settings", "ai_health_cache_file", "ai_channel_health.json")
+            template_config.set("AI_Settings", "ai_health_cache_ttl", "3600")
+            template_config.set("AI_Settings", "ai_channel_validation", "startup")
 
             # 添加示例渠道
             template_config.set("AI_Settings", "channel_1_api_type", "gemini")
@@ -658,6 +779,14 @@ class ConfigManager:
             template_config.set("CaptchaSettings", "captcha_enable_ddddocr", "True")
             template_config.set("CaptchaSettings", "captcha_enable_ai", "True")
             template_config.set("CaptchaSettings", "ddddocr_max_attempts", "3")
+            template_config.set("CaptchaSettings", "captcha_solve_strategy", "sequential")
+            template_config.set("CaptchaSettings", "captcha_submit_confidence", "0")
+            template_config.set("CaptchaSettings", "captcha_refresh_confidence", "0")
+            template_config.set("CaptchaSettings", "captcha_length", "")
+            template_config.set("CaptchaSettings", "captcha_charset", "")
+            template_config.set("CaptchaSettings", "captcha_case", "preserve")
+            template_config.set("CaptchaSettings", "captcha_profile_file", "captcha_profile.json")
+            template_config.set("CaptchaSettings", "captcha_feedback_file", "captcha_feedback.jsonl")
 
             with open(output_file, 'w', encoding='utf-8') as f:
                 template_config.write(f)
@@ -669,6 +798,7 @@ class ConfigManager:
             raise
 
     def get_general_config(self):
+        from .constants import ConfigDefaults
         general_config = self.config["General"]
         return {
             "excel_file_path": general_config.get(
@@ -681,9 +811,28 @@ class ConfigManager:
             "chrome_driver_path": general_config.get("chrome_driver_path", None) or None,  # 处理空字符串
             "max_query_attempts": general_config.getint("max_query_attempts", 3), # 新增
             "max_captcha_retries": general_config.getint("max_captcha_retries", 2), # 新增
+            "background_save": general_config.getboolean("background_save", ConfigDefaults.DEFAULT_BACKGROUND_SAVE), # 检查点由后台线程写入
+            "save_generations": general_config.getint("save_generations", ConfigDefaults.DEFAULT_SAVE_GENERATIONS), # 原子保存时保留的备份代数
+            "storage_backend": general_config.get("storage_backend", "auto").strip().lower(), # 数据文件格式
+            "result_log_mode": general_config.get("result_log_mode", "off").strip().lower(), # 结果日志模式
+            "chunk_size": general_config.getint("chunk_size", 0), # 分块处理每块行数，0 为不分块
+            "derive_warranty_fields": general_config.getboolean(
+                "derive_warranty_fields", ConfigDefaults.DEFAULT_DERIVE_WARRANTY_FIELDS
+            ), # 保存时重算剩余天数
+            "read_cache": general_config.getboolean("read_cache", ConfigDefaults.DEFAULT_READ_CACHE), # 数据文件解析结果缓存
+            "chunk_output_format": general_config.get("chunk_output_format", "csv").strip().lower(), # 分块输出格式
+            "result_log_path": general_config.get("result_log_path", None) or None, # 留空为 <数据文件>.results.jsonl
+            "serial_patterns": [ # 序列号格式正则，查询前预检
+                pattern.strip()
+                for pattern in general_config.get(
+                    "serial_patterns", ConfigDefaults.DEFAULT_SERIAL_PATTERNS
+                ).split(";")
+                if pattern.strip()
+            ],
         }
 
     def get_ai_config(self):
+        from .constants import ConfigDefaults
         ai_settings = self.config["AI_Settings"]
         channels = []
         # 动态查找所有以 'channel_N_' 开头的配置项
@@ -712,6 +861,19 @@ class ConfigManager:
             "retry_attempts": ai_settings.getint("retry_attempts", 3),
             "retry_delay": ai_settings.getint("retry_delay", 5),
             "rate_limit_delay": ai_settings.getint("rate_limit_delay", 30),
+            "ai_test_timeout": ai_settings.getint("ai_test_timeout", ConfigDefaults.DEFAULT_AI_TEST_TIMEOUT),
+            "request_timeout": ai_settings.getint("ai_request_timeout", ConfigDefaults.DEFAULT_AI_REQUEST_TIMEOUT),
+            "max_concurrency": ai_settings.getint("ai_max_concurrency", ConfigDefaults.DEFAULT_AI_MAX_CONCURRENCY),
+            "routing_exploration": ai_settings.getfloat(
+                "ai_routing_exploration", ConfigDefaults.DEFAULT_AI_ROUTING_EXPLORATION
+            ),
+            "health_cache_file": ai_settings.get(
+                "ai_health_cache_file", ConfigDefaults.DEFAULT_AI_HEALTH_CACHE_FILE
+            ).strip(),
+            "health_cache_ttl": ai_settings.getint("ai_health_cache_ttl", ConfigDefaults.DEFAULT_AI_HEALTH_CACHE_TTL),
+            "channel_validation": ai_settings.get(
+                "ai_channel_validation", ConfigDefaults.DEFAULT_AI_CHANNEL_VALIDATION
+            ).strip().lower(),
         }
 
     def get_result_columns(self):
@@ -767,6 +929,7 @@ class ConfigManager:
 
     def get_captcha_config(self):
         """获取验证码识别相关配置"""
+        from .constants import ConfigDefaults
         captcha_config = {}
         if "CaptchaSettings" in self.config:
             captcha_section = self.config["CaptchaSettings"]
@@ -782,11 +945,37 @@ class ConfigManager:
             captcha_config["ddddocr_max_attempts"] = captcha_section.getint(
                 "ddddocr_max_attempts", 3 # 默认 3 次
             )
+            captcha_config["solve_strategy"] = captcha_section.get(
+                "captcha_solve_strategy", "sequential" # 默认依次尝试
+            ).strip().lower()
+            captcha_config["submit_confidence"] = captcha_section.getfloat(
+                "captcha_submit_confidence", ConfigDefaults.DEFAULT_CAPTCHA_SUBMIT_CONFIDENCE
+            )
+            captcha_config["refresh_confidence"] = captcha_section.getfloat(
+                "captcha_refresh_confidence", ConfigDefaults.DEFAULT_CAPTCHA_REFRESH_CONFIDENCE
+            )
+            captcha_config["length"] = captcha_section.get("captcha_length", "").strip() # 空值表示从历史学习
+            captcha_config["charset"] = captcha_section.get("captcha_charset", "").strip()
+            captcha_config["case"] = captcha_section.get("captcha_case", "preserve").strip().lower()
+            captcha_config["profile_file"] = captcha_section.get(
+                "captcha_profile_file", ConfigDefaults.DEFAULT_CAPTCHA_PROFILE_FILE
+            ).strip()
+            captcha_config["feedback_file"] = captcha_section.get(
+                "captcha_feedback_file", ConfigDefaults.DEFAULT_CAPTCHA_FEEDBACK_FILE
+            ).strip()
         else:
             # 提供默认验证码配置
             captcha_config["primary_solver"] = "ddddocr"
             captcha_config["enable_ddddocr"] = True
             captcha_config["enable_ai"] = True
             captcha_config["ddddocr_max_attempts"] = 3
+            captcha_config["solve_strategy"] = "sequential"
+            captcha_config["submit_confidence"] = ConfigDefaults.DEFAULT_CAPTCHA_SUBMIT_CONFIDENCE
+            captcha_config["refresh_confidence"] = ConfigDefaults.DEFAULT_CAPTCHA_REFRESH_CONFIDENCE
+            captcha_config["length"] = ""
+            captcha_config["charset"] = ""
+            captcha_config["case"] = "preserve"
+            captcha_config["profile_file"] = ConfigDefaults.DEFAULT_CAPTCHA_PROFILE_FILE
+            captcha_config["feedback_file"] = ConfigDefaults.DEFAULT_CAPTCHA_FEEDBACK_FILE
             print("警告：config.ini 中未找到 [CaptchaSettings] section，使用默认验证码配置。")
         return captcha_config
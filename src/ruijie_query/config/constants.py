@@ -12,6 +12,8 @@ class ConfigLimits:
     SAVE_INTERVAL_MAX = 1000      # 保存间隔最大值 (条)
     MAX_QUERY_ATTEMPTS = 10        # 最大查询尝试次数
     MAX_CAPTCHA_RETRIES = 5       # 最大验证码重试次数
+    SAVE_GENERATIONS_MAX = 20     # 保留的工作簿备份代数最大值
+    CHUNK_SIZE_MAX = 1000000      # 分块处理每块行数最大值
 
     # AI设置相关
     AI_RETRY_ATTEMPTS_MIN = 1
@@ -39,12 +41,25 @@ class ConfigDefaults:
     DEFAULT_SAVE_INTERVAL = 10
     DEFAULT_MAX_QUERY_ATTEMPTS = 3
     DEFAULT_MAX_CAPTCHA_RETRIES = 2
+    DEFAULT_SAVE_GENERATIONS = 3
+    DEFAULT_BACKGROUND_SAVE = True  # 检查点由后台线程写入
+    DEFAULT_DERIVE_WARRANTY_FIELDS = True  # 保存时重算保修剩余天数和到期区间
+    DEFAULT_READ_CACHE = True  # 缓存数据文件的解析结果
+    # 序列号格式正则（规范化后整体匹配，多个用分号分隔）。默认为空：只规范化不校验，
+    # 格式校验需显式配置，避免把不符合猜测格式的有效序列号永久标记为无效
+    DEFAULT_SERIAL_PATTERNS = ""
 
     # AI设置默认值
     DEFAULT_AI_RETRY_ATTEMPTS = 3
     DEFAULT_AI_RETRY_DELAY = 5
     DEFAULT_AI_RATE_LIMIT_DELAY = 30
     DEFAULT_AI_TEST_TIMEOUT = 120
+    DEFAULT_AI_REQUEST_TIMEOUT = 30  # 单次验证码识别调用的超时时间
+    DEFAULT_AI_MAX_CONCURRENCY = 2  # 异步识别时每个渠道同时进行中的请求数上限
+    DEFAULT_AI_ROUTING_EXPLORATION = 0.1  # 渠道路由探索概率
+    DEFAULT_AI_HEALTH_CACHE_FILE = "ai_channel_health.json"  # 渠道可用性测试结果缓存
+    DEFAULT_AI_HEALTH_CACHE_TTL = 3600  # 渠道可用性缓存有效期（秒），0 为关闭缓存
+    DEFAULT_AI_CHANNEL_VALIDATION = "startup"  # 渠道验证方式：startup 启动时测试，lazy 首次使用时验证
 
     # 日志默认值
     DEFAULT_LOG_LEVEL = "INFO"
@@ -55,6 +70,12 @@ class ConfigDefaults:
     # 验证码设置默认值
     DEFAULT_CAPTCHA_PRIMARY_SOLVER = "ddddocr"
     DEFAULT_DDDDOOCR_MAX_ATTEMPTS = 3
+    # ddddocr 置信度阈值默认关闭（都为 0，所有识别结果直接提交）：
+    # 合适的阈值取决于 ddddocr 模型和目标网站的验证码，需要用户按实际接受率校准后再开启
+    DEFAULT_CAPTCHA_SUBMIT_CONFIDENCE = 0.0   # ddddocr 置信度不低于该值时直接提交
+    DEFAULT_CAPTCHA_REFRESH_CONFIDENCE = 0.0  # 低于该值时本地刷新验证码，介于两者之间交给 AI
+    DEFAULT_CAPTCHA_PROFILE_FILE = "captcha_profile.json"  # 验证码格式学习记录
+    DEFAULT_CAPTCHA_FEEDBACK_FILE = "captcha_feedback.jsonl"  # 验证码提交反馈记录
 
 # API配置
 class APIConfig:
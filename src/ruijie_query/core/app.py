@@ -1,18 +1,27 @@
 import logging
+import os
 import sys  # 导入 sys 模块用于设置日志输出流
 from logging.handlers import RotatingFileHandler # 导入 RotatingFileHandler
-from typing import Optional
+from typing import Dict, List, Optional
 
 # 导入各个模块的类
 from ..browser.webdriver_manager import WebDriverManager
 from ..browser.page_objects import RuijieQueryPage
 from ..captcha.captcha_solver import CaptchaSolver
+from ..captcha.confidence import ACTION_ESCALATE, ACTION_REFRESH
 from ..monitoring.performance_monitor import get_monitor, monitor_operation
 from .data_manager import DataManager
+from .chunked import ChunkedProcessor, chunk_output_path, expand_input_files
+from .diff import diff_report_path, diff_snapshots, format_diff_report, load_snapshot, summarize_diff
+from ..storage.factory import create_backend
+from ..storage.atomic import atomic_write
+from ..storage.xlsx_export import export_xlsx
 
-import pandas as pd  # RuijieQueryApp 中使用了 pd.DataFrame
 import time  # RuijieQueryApp 中使用了 time.sleep
 
+# 非分块模式导出时每次写出的行数
+EXPORT_READ_CHUNK_SIZE = 10000
+
 # --- 主应用程序类 ---
 
 
@@ -32,13 +41,7 @@ class RuijieQueryApp:
         self._setup_logging()
         self.logger = logging.getLogger(__name__)  # 获取当前模块的日志记录器
 
-        self.data_manager = DataManager(
-            self.general_config["excel_file_path"],
-            self.general_config["sheet_name"],
-            self.general_config["sn_column_name"],
-            self.result_columns,
-            self.logger,  # 传递日志记录器
-        )
+        self.data_manager = self._create_data_manager(self.general_config["excel_file_path"])
         self.webdriver_manager = WebDriverManager(
             self.general_config["chrome_driver_path"], self.logger  # 传递日志记录器
         )
@@ -51,6 +54,29 @@ class RuijieQueryApp:
         )
         # 传递 config 对象和日志记录器给 RuijieQueryPage
         self.query_page: Optional[RuijieQueryPage] = None  # 在运行过程中初始化
+        self.last_query_attempts = 0  # 最近一次序列号查询实际使用的尝试次数，写入结果日志
+
+    def _create_data_manager(self, file_path: str) -> DataManager:
+        """按通用配置为指定数据文件创建 DataManager（未配置的项使用 ConfigDefaults 中的默认值）"""
+        from ..config.constants import ConfigDefaults
+
+        return DataManager(
+            file_path,
+            self.general_config["sheet_name"],
+            self.general_config["sn_column_name"],
+            self.result_columns,
+            self.logger,  # 传递日志记录器
+            background_save=self.general_config.get("background_save", ConfigDefaults.DEFAULT_BACKGROUND_SAVE),
+            save_generations=self.general_config.get("save_generations", ConfigDefaults.DEFAULT_SAVE_GENERATIONS),
+            storage_backend=self.general_config.get("storage_backend"),
+            serial_patterns=self.general_config.get("serial_patterns"),
+            result_log_mode=self.general_config.get("result_log_mode", "off"),
+            result_log_path=self.general_config.get("result_log_path"),
+            derive_warranty_fields=self.general_config.get(
+                "derive_warranty_fields", ConfigDefaults.DEFAULT_DERIVE_WARRANTY_FIELDS
+            ),
+            read_cache=self.general_config.get("read_cache", ConfigDefaults.DEFAULT_READ_CACHE),
+        )
 
     def _setup_logging(self):
         """
@@ -108,19 +134,73 @@ class RuijieQueryApp:
         monitor = get_monitor()
         self.logger.info("程序开始运行。")
 
-        # 监控数据加载阶段
-        monitor.start_timer("数据加载阶段")
-        df = self.data_manager.load_data()
-        monitor.end_timer("数据加载阶段")
-
-        if df is None:
-            self.logger.error("无法加载Excel数据，程序退出。")
+        chunk_size = self.general_config.get("chunk_size", 0)
+        if chunk_size and chunk_size > 0:
+            self._run_chunked(chunk_size)
             return
 
-        # 监控AI渠道测试阶段
-        monitor.start_timer("AI渠道测试阶段")
-        available_channels = self.captcha_solver.test_channels_availability()
-        monitor.end_timer("AI渠道测试阶段")
+        browser_started = False
+        try:
+            # 监控数据加载阶段
+            monitor.start_timer("数据加载阶段")
+            df = self.data_manager.load_data()
+            monitor.end_timer("数据加载阶段")
+
+            if df is None:
+                self.logger.error("无法加载Excel数据，程序退出。")
+                return
+            # 保修剩余天数随日期变化：即使所有序列号都已查询，也按当天日期重新计算派生字段并保存
+            self.data_manager.refresh_derived_fields()
+
+            available_channels = self._check_captcha_solvers()
+            if available_channels is None:
+                return # 没有可用识别方式，退出程序
+
+            # 🆕 优化1：提前检查是否有未查询的序列号，避免不必要的WebDriver初始化
+            self.logger.info("检查是否有未查询的序列号...")
+            unqueried_index = self.data_manager.get_unqueried_indexes()
+
+            if len(unqueried_index) == 0:
+                self.logger.info("没有需要查询的序列号（均已成功查询或格式无效），无需启动浏览器。")
+                if self.data_manager.has_unsaved_changes():
+                    # 预检规范化的序列号、“序列号格式无效”的标记和重新计算的派生字段仍需写回数据文件
+                    self.data_manager.save_data()
+                return
+
+            self.logger.info(f"找到 {len(unqueried_index)} 个未成功查询的序列号，将启动浏览器进行处理。")
+
+            if not self._start_browser(available_channels):
+                return
+            browser_started = True
+
+            total_rows = len(unqueried_index)
+            self.logger.info(f"开始处理 {total_rows} 个序列号...")
+
+            self._query_unqueried(df, unqueried_index)
+
+            # 所有序列号处理完毕或程序中断，保存最终结果
+            monitor.start_timer("最终数据保存和清理")
+            self.logger.info("\n--- 所有序列号处理完毕或程序中断 ---")
+            self.data_manager.save_data()
+        finally:
+            # 无论正常结束、提前退出还是中断，都同步写完后台保存中剩余的检查点，并关闭浏览器和 AI 客户端连接
+            self.data_manager.close()
+            if browser_started:
+                self.webdriver_manager.quit_driver()
+            self.captcha_solver.close()
+        self.logger.info("程序执行完毕。")
+        monitor.end_timer("最终数据保存和清理")
+
+    def _check_captcha_solvers(self) -> Optional[list]:
+        """测试AI渠道（延迟验证模式下推迟到首次使用时）并检查是否有可用的验证码识别方式，没有时返回 None"""
+        monitor = get_monitor()
+        if self.ai_config.get("channel_validation") == "lazy":
+            available_channels = self.captcha_solver.defer_channel_validation()
+        else:
+            # 监控AI渠道测试阶段
+            monitor.start_timer("AI渠道测试阶段")
+            available_channels = self.captcha_solver.test_channels_availability()
+            monitor.end_timer("AI渠道测试阶段")
 
         # 检查是否有可用的验证码识别方式
         has_ddddocr = self.captcha_config.get("enable_ddddocr", False)
@@ -129,23 +209,15 @@ class RuijieQueryApp:
         if not has_ddddocr and not has_ai_channels:
             self.logger.error("没有可用的验证码识别方式（ddddocr和AI渠道都不可用）。程序退出。")
             # 注意：这里不需要 quit_driver，因为 driver 还没有初始化
-            return # 没有可用识别方式，退出程序
+            return None
 
         if not has_ai_channels:
             self.logger.info("没有可用的AI渠道，但ddddocr可用，将仅使用ddddocr进行验证码识别。")
+        return available_channels
 
-        # 🆕 优化1：提前检查是否有未查询的序列号，避免不必要的WebDriver初始化
-        self.logger.info("检查是否有未查询的序列号...")
-        unqueried_items = self.data_manager.get_unqueried_serial_numbers(
-            self.general_config["sn_column_name"]
-        )
-
-        if not unqueried_items:
-            self.logger.info("所有序列号均已成功查询，无需启动浏览器。程序退出。")
-            return
-
-        self.logger.info(f"找到 {len(unqueried_items)} 个未成功查询的序列号，将启动浏览器进行处理。")
-
+    def _start_browser(self, available_channels: list) -> bool:
+        """初始化 WebDriver 和页面对象，失败时返回 False"""
+        monitor = get_monitor()
         # 监控WebDriver初始化阶段
         monitor.start_timer("WebDriver初始化阶段")
         driver = self.webdriver_manager.initialize_driver()
@@ -153,7 +225,7 @@ class RuijieQueryApp:
 
         if driver is None:
             self.logger.error("WebDriver 初始化失败，程序退出。")
-            return
+            return False
 
         # 在这里初始化 RuijieQueryPage 并传递 config 对象和日志记录器
         monitor.start_timer("页面对象初始化")
@@ -162,51 +234,192 @@ class RuijieQueryApp:
         )  # 使用 self.target_url, self.config 和 self.logger
         monitor.end_timer("页面对象初始化")
 
-        if has_ai_channels:
+        if available_channels:
             self.logger.info(f"将使用 {len(available_channels)} 个可用 AI 渠道进行验证码识别。")
         else:
             self.logger.info("将仅使用ddddocr进行验证码识别。")
         # CaptchaSolver 实例内部已经更新了 channels 列表，这里无需再次设置
+        return True
 
-        total_rows = len(df)
-        self.logger.info(f"开始处理 {total_rows} 个序列号...")
+    def _query_unqueried(self, df, unqueried_index) -> None:
+        """查询未成功的行，然后对仍未成功的行进行一轮补漏查询"""
+        monitor = get_monitor()
+        sn_column_name = self.general_config["sn_column_name"]
 
-        # 第一次查询
+        # 第一次查询：只处理尚未成功的行（断点续传时跳过已成功的行）
         monitor.start_timer("主要查询处理阶段")
-        self._process_queries(df)
+        self._process_queries(df.loc[unqueried_index, [sn_column_name]])
         monitor.end_timer("主要查询处理阶段")
 
         # 补漏机制：检查未成功查询的序列号并进行二次查询
         monitor.start_timer("补漏查询机制")
-        unqueried_items = self.data_manager.get_unqueried_serial_numbers(
-            self.general_config["sn_column_name"]
-        )
-        if unqueried_items:
+        unqueried_index = self.data_manager.get_unqueried_indexes()
+        if len(unqueried_index) > 0:
             self.logger.info(
-                f"\n检测到 {len(unqueried_items)} 个序列号未成功查询，"
+                f"\n检测到 {len(unqueried_index)} 个序列号未成功查询，"
                 f"尝试进行补漏..."
             )
-            # 创建一个只包含未查询成功序列号的临时DataFrame
-            unqueried_df = pd.DataFrame(
-                unqueried_items,
-                columns=["index", self.general_config["sn_column_name"]],
-            )
-            # 将索引设置为原始DataFrame的索引，方便更新
-            unqueried_df.set_index("index", inplace=True)
-
-            self._process_queries(unqueried_df, is_retry=True)
+            # 按索引选取未查询成功的行，保留原始索引方便更新
+            self._process_queries(df.loc[unqueried_index, [sn_column_name]], is_retry=True)
         else:
             self.logger.info("\n所有序列号均已成功查询。")
         monitor.end_timer("补漏查询机制")
 
-        # 所有序列号处理完毕或程序中断，保存最终结果
-        monitor.start_timer("最终数据保存和清理")
-        self.logger.info("\n--- 所有序列号处理完毕或程序中断 ---")
-        self.data_manager.save_data()
-        # 关闭浏览器
-        self.webdriver_manager.quit_driver()
-        self.logger.info("程序执行完毕。")
-        monitor.end_timer("最终数据保存和清理")
+    def _run_chunked(self, chunk_size: int) -> None:
+        """
+        分块处理：逐个输入文件（excel_file_path 可使用通配符）按 chunk_size 行分块读取，
+        每块筛选、查询后追加写入 <输入文件名>.results.<格式> 并推进进度游标，然后释放该块。
+        浏览器在第一个需要查询的数据块出现时才启动。
+        """
+        monitor = get_monitor()
+        browser_started = False
+        try:
+            available_channels = self._check_captcha_solvers()
+            if available_channels is None:
+                return
+
+            input_files = expand_input_files(self.general_config["excel_file_path"])
+            if not input_files:
+                self.logger.error(f"未找到匹配 '{self.general_config['excel_file_path']}' 的输入文件，程序退出。")
+                return
+
+            output_format = self.general_config.get("chunk_output_format", "csv")
+            for input_file in input_files:
+                self.data_manager = self._create_data_manager(input_file)
+                output_path = chunk_output_path(input_file, output_format)
+                output_backend = create_backend(
+                    output_path, self.general_config["sheet_name"], self.logger, backend_name=output_format
+                )
+                processor = ChunkedProcessor(self.data_manager, output_backend, chunk_size, self.logger)
+                if processor.completed:
+                    self.logger.info(f"文件 '{input_file}' 已全部处理完毕，结果在 '{output_path}'，跳过。")
+                    continue
+
+                self.logger.info(f"开始分块处理文件 '{input_file}'，每块 {chunk_size} 行，结果写入 '{output_path}'。")
+                try:
+                    for chunk_df in processor.chunks():
+                        unqueried_index = self.data_manager.get_unqueried_indexes()
+                        if len(unqueried_index) > 0:
+                            if not browser_started:
+                                if not self._start_browser(available_channels):
+                                    return
+                                browser_started = True
+                            self._query_unqueried(chunk_df, unqueried_index)
+
+                        summary = processor.persist(queried=len(unqueried_index))
+                        monitor.record_time("分块处理", summary["elapsed"])
+                        monitor.set_gauge(
+                            f"分块 {os.path.basename(input_file)} [{summary['start']}-{summary['end']}]",
+                            f"{summary['rows']} 行, 查询 {summary['queried']}, 成功 {summary['succeeded']}, "
+                            f"耗时 {summary['elapsed']:.1f}s",
+                        )
+                        self.logger.info(
+                            f"数据块 [{summary['start']}-{summary['end']}] 已写出："
+                            f"{summary['rows']} 行，查询 {summary['queried']} 个，成功 {summary['succeeded']} 个。"
+                        )
+                finally:
+                    self.data_manager.close()
+        finally:
+            if browser_started:
+                self.webdriver_manager.quit_driver()
+            self.captcha_solver.close()
+        self.logger.info("分块处理执行完毕。")
+
+    def compact_results(self) -> int:
+        """
+        把结果日志中每个序列号的最新结果合并回数据文件，不启动浏览器。
+        返回合并的行数。
+        """
+        self.logger.info("开始合并结果日志...")
+        if self.data_manager.load_data() is None:
+            self.logger.error("无法加载数据文件，合并结果日志失败。")
+            return 0
+        try:
+            return self.data_manager.compact_result_log()
+        finally:
+            self.data_manager.close()
+
+    def export_results(self, output_path: Optional[str] = None) -> int:
+        """
+        把查询结果流式导出为 xlsx 文件（<输入文件名>.results.xlsx 或 output_path），不启动浏览器。
+        分块处理模式下直接从分块结果文件按块读取；否则从数据文件加载后逐块写出。
+        返回导出的文件数。
+        """
+        chunk_size = self.general_config.get("chunk_size", 0)
+        read_size = chunk_size if chunk_size and chunk_size > 0 else EXPORT_READ_CHUNK_SIZE
+        sheet_name = self.general_config["sheet_name"]
+
+        if chunk_size and chunk_size > 0:
+            output_format = self.general_config.get("chunk_output_format", "csv")
+            sources = []
+            for input_file in expand_input_files(self.general_config["excel_file_path"]):
+                result_path = chunk_output_path(input_file, output_format)
+                if not os.path.exists(result_path):
+                    self.logger.warning(f"文件 '{input_file}' 还没有分块处理结果 '{result_path}'，跳过导出。")
+                    continue
+                backend = create_backend(result_path, sheet_name, self.logger, backend_name=output_format)
+                sources.append((input_file, backend.iter_chunks(read_size)))
+        else:
+            if self.data_manager.load_data() is None:
+                self.logger.error("无法加载数据文件，导出失败。")
+                return 0
+            try:
+                # 与分块模式一致，导出按当天日期重新计算的保修剩余天数和到期分类
+                self.data_manager.refresh_derived_fields()
+                export_df = self.data_manager.export_frame()
+            finally:
+                self.data_manager.close()
+            chunks = (export_df.iloc[start:start + read_size] for start in range(0, len(export_df), read_size))
+            sources = [(self.general_config["excel_file_path"], chunks)]
+
+        if output_path and len(sources) > 1:
+            self.logger.error("有多个输入文件时不能指定单个导出文件路径，请去掉 --output。")
+            return 0
+
+        for input_file, chunks in sources:
+            target = output_path or chunk_output_path(input_file, "xlsx")
+            self.logger.info(f"开始导出 '{input_file}' 的查询结果到 '{target}'...")
+            export_xlsx(chunks, target, sheet_name=sheet_name, logger=self.logger)
+        return len(sources)
+
+    def diff_results(
+        self,
+        old_path: str,
+        new_path: str,
+        output_path: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Dict[str, int]:
+        """
+        对比两次运行的结果快照（数据文件或 .jsonl 结果日志），按序列号对齐后
+        把按字段分组的变更写入 output_path（默认 <新快照文件名>.diff.csv），不启动浏览器。
+        返回每个字段的变更行数。
+        """
+        monitor = get_monitor()
+        sheet_name = self.general_config["sheet_name"]
+        sn_column = self.general_config["sn_column_name"]
+
+        monitor.start_timer("结果对比")
+        try:
+            old_df = load_snapshot(old_path, sheet_name, sn_column, self.logger)
+            new_df = load_snapshot(new_path, sheet_name, sn_column, self.logger)
+            for path, df in ((old_path, old_df), (new_path, new_df)):
+                if sn_column not in df.columns:
+                    self.logger.error(f"'{path}' 中找不到序列号列 '{sn_column}'，无法对比。")
+                    return {}
+            report = diff_snapshots(old_df, new_df, sn_column, fields)
+        finally:
+            monitor.end_timer("结果对比")
+
+        target = output_path or diff_report_path(new_path)
+        atomic_write(target, lambda tmp: report.to_csv(tmp, index=False, encoding="utf-8-sig"), 0, self.logger)
+
+        self.logger.info(
+            f"对比 '{old_path}' ({len(old_df)} 行) 与 '{new_path}' ({len(new_df)} 行)："
+            f"共 {len(report)} 处变更，报告已写入 '{target}'。"
+        )
+        for line in format_diff_report(report):
+            self.logger.info(line)
+        return summarize_diff(report)
 
     @monitor_operation("批量查询处理", log_slow=True)
     def _process_queries(self, df_to_process, is_retry=False):
@@ -219,8 +432,8 @@ class RuijieQueryApp:
 
         monitor.start_timer(f"{query_type}总体耗时")
 
-        for i, (index, row) in enumerate(df_to_process.iterrows()):
-            serial_number = row[self.general_config["sn_column_name"]]
+        serial_numbers = df_to_process[self.general_config["sn_column_name"]].tolist()
+        for i, (index, serial_number) in enumerate(zip(df_to_process.index, serial_numbers)):
             prefix = "补漏查询" if is_retry else "处理"
 
             # 监控单个查询循环
@@ -231,19 +444,25 @@ class RuijieQueryApp:
                 f"{serial_number} ---"
             )
 
+            query_start = time.perf_counter()
             query_results = self._process_single_query(serial_number)
+            query_meta = {
+                "attempts": self.last_query_attempts,
+                "elapsed": round(time.perf_counter() - query_start, 3),
+                "retry": is_retry,
+            }
 
-            # 将查询结果更新到DataFrame
+            # 缓冲查询结果，在检查点/保存时按列批量写入DataFrame
             monitor.start_timer("数据结果更新")
-            self.data_manager.update_result(index, query_results)
+            self.data_manager.update_results([(index, query_results)], [query_meta])
             monitor.end_timer("数据结果更新")
 
             # 根据 save_interval 配置决定是否保存数据
             save_interval = self.general_config.get("save_interval", 0) # 获取保存间隔，默认为0（不定期保存）
             if save_interval > 0 and (i + 1) % save_interval == 0:
                 monitor.start_timer("定期数据保存")
-                self.logger.info(f"已处理 {i + 1} 个序列号，达到保存间隔，正在保存数据...")
-                self.data_manager.save_data()
+                self.logger.info(f"已处理 {i + 1} 个序列号，达到保存间隔，正在写入检查点...")
+                self.data_manager.checkpoint() # 只追加变更行，最终保存时再合并回工作簿
                 monitor.end_timer("定期数据保存")
             elif i == total_rows - 1: # 确保在处理最后一个序列号后总是保存
                 monitor.start_timer("最终数据保存")
@@ -283,6 +502,7 @@ class RuijieQueryApp:
 
         for query_attempt in range(max_query_attempts):
             self.logger.info(f"查询尝试 {query_attempt + 1}/{max_query_attempts}...")
+            self.last_query_attempts = query_attempt + 1
 
             # 监控单次查询尝试
             monitor.start_timer(f"查询尝试-{query_attempt + 1}-{serial_number}")
@@ -298,6 +518,7 @@ class RuijieQueryApp:
                 monitor.end_timer("页面操作阶段")
 
                 captcha_solution = None
+                submitted_result = None  # 最终提交的识别结果，用于向识别器报告是否被网站接受
                 # 使用从配置读取的 max_captcha_retries
                 for captcha_retry in range(max_captcha_retries + 1):
                     self.logger.info(
@@ -325,7 +546,25 @@ class RuijieQueryApp:
                     # 解决验证码
                     self.logger.info("尝试识别验证码...")
                     monitor.start_timer("验证码识别")
-                    captcha_solution = self.captcha_solver.solve_captcha(captcha_image_data)
+                    captcha_result = self.captcha_solver.solve_captcha_scored(captcha_image_data)
+                    captcha_solution = captcha_result["answer"]
+                    submitted_result = captcha_result
+                    if captcha_solution:
+                        # 按 ddddocr 识别置信度决定：提交、本地刷新验证码或交给 AI 识别
+                        action = self.captcha_solver.choose_action(
+                            captcha_result, can_refresh=captcha_retry < max_captcha_retries
+                        )
+                        if action == ACTION_ESCALATE:
+                            escalated = self.captcha_solver.escalate(captcha_image_data)
+                            if escalated["answer"]:
+                                captcha_solution = escalated["answer"]
+                                submitted_result = escalated
+                        elif action == ACTION_REFRESH:
+                            self.logger.info(
+                                f"验证码识别置信度过低 ({captcha_result['confidence']:.2f})，"
+                                f"不提交 '{captcha_solution}'，刷新验证码。"
+                            )
+                            captcha_solution = None
                     monitor.end_timer("验证码识别")
 
                     if captcha_solution:
@@ -382,6 +621,7 @@ class RuijieQueryApp:
                     wait_time_after_submit = 20 # 提交后等待总时间 (秒)，适当增加以应对慢响应
                     check_interval = 0.5 # 检查间隔 (秒)，缩短间隔以更快响应
                     found_relevant_change = False
+                    captcha_accepted = None  # 验证码是否被网站接受，无法判断时为 None
                     start_wait_time = time.time()
 
                     while time.time() - start_wait_time < wait_time_after_submit:
@@ -392,6 +632,7 @@ class RuijieQueryApp:
                         if self.query_page.wait_for_results():
                             self.logger.info("查询结果表格已显示。")
                             found_relevant_change = True
+                            captcha_accepted = True
                             break # 找到结果，跳出等待循环
 
                         # 检查是否出现了错误信息
@@ -403,6 +644,10 @@ class RuijieQueryApp:
                             self.logger.warning(f"页面显示错误信息: {error_message}")
                             results["查询状态"] = f"查询失败: {error_message}"
                             found_relevant_change = True
+                            if error_message == "验证码错误":
+                                captcha_accepted = False
+                            elif error_message == "序列号无效":
+                                captcha_accepted = True  # 验证码通过后才会查询序列号
                             break # 找到错误信息，跳出等待循环
 
                         # 如果既没有结果也没有错误，检查验证码是否刷新
@@ -410,11 +655,14 @@ class RuijieQueryApp:
                              self.logger.warning("检测到验证码已刷新，可能是验证码错误。")
                              results["查询状态"] = "验证码错误，尝试重试"
                              found_relevant_change = True # 视为一种"结果"（需要重试）
+                             captcha_accepted = False
                              break # 验证码刷新，跳出等待循环
 
                         time.sleep(check_interval) # 等待一段时间后再次检查
 
                     monitor.end_timer("等待查询结果")
+                    if captcha_accepted is not None:
+                        self.captcha_solver.report_result(submitted_result, captcha_accepted, captcha_image_data)
 
                     if found_relevant_change:
                         # 监控结果解析阶段
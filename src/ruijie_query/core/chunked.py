@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+分块处理模块
+超大的资产清单按固定行数分块读取、筛选、查询、写出并释放，峰值内存与输入总行数无关；
+进度游标记录已写出的行数和输出文件位置，中断后从上次写出的块之后继续
+"""
+
+import glob
+import json
+import os
+import logging
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from ..storage.atomic import atomic_write
+from ..storage.base import StorageBackend
+from .data_manager import DataManager
+
+
+def expand_input_files(pattern: str) -> List[str]:
+    """输入路径含通配符时展开为按文件名排序的文件列表（排除本程序自己写出的结果和对比报告文件）"""
+    if glob.has_magic(pattern):
+        return sorted(
+            path for path in glob.glob(pattern)
+            if not os.path.splitext(path)[0].endswith((".results", ".diff"))
+        )
+    return [pattern]
+
+
+def chunk_output_path(input_file: str, output_format: str = "csv") -> str:
+    """分块处理（及导出）的输出文件路径：与输入文件同目录的 <文件名>.results.<格式扩展名>"""
+    extensions = {"csv": ".csv", "sqlite": ".db", "xlsx": ".xlsx"}
+    stem = os.path.splitext(input_file)[0]
+    return f"{stem}.results{extensions[output_format]}"
+
+
+class ChunkCursor:
+    """分块处理的进度游标，保存在 <输出文件>.cursor.json"""
+
+    def __init__(self, path: str, logger: Optional[logging.Logger] = None):
+        self.path = path
+        self.logger = logger or logging.getLogger(__name__)
+
+    def load(self) -> Dict[str, Any]:
+        """读取游标；文件不存在或损坏时从头开始"""
+        state = {"rows_done": 0, "output_marker": 0, "completed": False}
+        if not os.path.exists(self.path):
+            return state
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"进度游标 '{self.path}' 无法读取，将从头开始: {e}")
+            return state
+        state.update(saved)
+        return state
+
+    def save(self, rows_done: int, output_marker: int, completed: bool = False) -> None:
+        """原子写入游标"""
+        data = json.dumps(
+            {"rows_done": rows_done, "output_marker": output_marker, "completed": completed},
+            ensure_ascii=False,
+        )
+
+        def _write(tmp_path: str) -> None:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+
+        atomic_write(self.path, _write, 0, self.logger)
+
+
+class ChunkedProcessor:
+    """
+    按块处理一个输入文件：从输入后端流式读取数据块，交给 DataManager 准备和查询，
+    查询完成后把整块（含结果列）追加到输出后端并推进进度游标。
+    """
+
+    def __init__(
+        self,
+        data_manager: DataManager,
+        output_backend: StorageBackend,
+        chunk_size: int,
+        logger: Optional[logging.Logger] = None,
+    ):
+        if not output_backend.supports_append:
+            raise ValueError(f"存储后端 '{output_backend.name}' 不支持追加写入，不能作为分块处理的输出")
+        self.data_manager = data_manager
+        self.output_backend = output_backend
+        self.chunk_size = chunk_size
+        self.logger = logger or logging.getLogger(__name__)
+        self.cursor = ChunkCursor(f"{output_backend.file_path}.cursor.json", self.logger)
+        self.state = self.cursor.load()
+        self._chunk_start = 0.0
+
+        # 写出的数据块由本类负责，DataManager 的 save_data 只写检查点日志
+        self.data_manager.defer_writes = True
+
+    @property
+    def completed(self) -> bool:
+        """输入文件是否已全部处理完毕"""
+        return bool(self.state.get("completed"))
+
+    def chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        依次加载并返回待处理的数据块（行索引在整个文件内连续）。
+        调用方查询完一块后必须先调用 persist，再取下一块。
+        """
+        rows_done = int(self.state["rows_done"])
+        # 崩溃时可能已追加了数据块但游标未更新，先撤销这部分输出，之后会重新写出该块
+        self.output_backend.truncate_to(int(self.state["output_marker"]))
+        if rows_done:
+            self.logger.info(f"从进度游标继续：跳过已写出的前 {rows_done} 行。")
+
+        for chunk in self.data_manager.backend.iter_chunks(self.chunk_size):
+            if len(chunk) == 0 or chunk.index[-1] < rows_done:
+                continue
+            if chunk.index[0] < rows_done:
+                chunk = chunk.loc[rows_done:]
+
+            self._chunk_start = time.perf_counter()
+            yield self.data_manager.load_frame(chunk)
+
+        self.cursor.save(rows_done=int(self.state["rows_done"]),
+                         output_marker=int(self.state["output_marker"]), completed=True)
+        self.state["completed"] = True
+
+    def persist(self, queried: int = 0) -> Dict[str, Any]:
+        """
+        把当前数据块追加到输出文件、推进游标并释放数据块。
+        queried 为本块实际查询的行数，返回本块的统计摘要。
+        """
+        dm = self.data_manager
+        dm.apply_buffered_results()
+        dm.refresh_derived_fields()
+        df = dm.df
+        assert df is not None
+
+        succeeded = int(df["查询状态"].eq("成功").sum()) if "查询状态" in df.columns else 0
+        summary = {
+            "start": int(df.index[0]),
+            "end": int(df.index[-1]),
+            "rows": len(df),
+            "queried": queried,
+            "succeeded": succeeded,
+        }
+
+        self.output_backend.append(dm.export_frame())
+        rows_done = summary["end"] + 1
+        output_marker = self.output_backend.append_marker()
+        self.cursor.save(rows_done=rows_done, output_marker=output_marker)
+        self.state.update(rows_done=rows_done, output_marker=output_marker)
+
+        # 数据块已写出，检查点日志和内存中的数据块都不再需要
+        dm.release_frame()
+
+        summary["elapsed"] = time.perf_counter() - self._chunk_start
+        return summary
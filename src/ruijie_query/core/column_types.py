@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+结果列的紧凑类型
+内存中的结果列使用分类 (category)、datetime64 和可空整数 (Int64) 存储，
+大量重复的型号/状态字符串只保存一份；写出数据文件时分类列转换回文本，
+日期和天数列保持原生类型，由各存储后端按各自的格式写出
+"""
+
+import warnings
+from datetime import datetime
+from typing import Any, Dict, List, Sequence, Tuple
+
+import pandas as pd
+
+# 解析为日期的结果列
+DATE_COLUMNS = ("保修开始时间", "保修结束时间")
+# 解析为可空整数的结果列
+INT_COLUMNS = ("保修剩余天数",)
+# 日期列转换为文本（比较、解析）时的格式
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def column_kind(name: str) -> str:
+    """结果列的目标类型: datetime / int / category"""
+    if name in DATE_COLUMNS:
+        return "datetime"
+    if name in INT_COLUMNS:
+        return "int"
+    return "category"
+
+
+def _parse(values: pd.Series, kind: str) -> pd.Series:
+    """按类型解析，无法解析的值为缺失值"""
+    if kind == "datetime":
+        # 纯数字不是有效的日期文本，避免被当作时间戳解析
+        numeric = values.map(lambda v: isinstance(v, (int, float)) and not isinstance(v, bool))
+        with warnings.catch_warnings():
+            # 无法推断统一格式时 pandas 会逐个解析并给出提示，结果不受影响
+            warnings.simplefilter("ignore", UserWarning)
+            return pd.to_datetime(values.mask(numeric), errors="coerce")
+    numbers = pd.to_numeric(values, errors="coerce")
+    # 带小数的值不是有效的天数，按无法解析处理
+    return numbers.where(numbers.isna() | (numbers % 1 == 0))
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """把日期文本（或已是日期的值）解析为 datetime64，无法解析的为 NaT"""
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values
+    return _parse(text_series(values), "datetime")
+
+
+def _is_lossless(values: pd.Series, parsed: pd.Series) -> bool:
+    """原值中的非空值是否全部解析成功"""
+    present = values.notna() & values.astype(str).str.strip().ne("")
+    return not (present & parsed.isna()).any()
+
+
+def compact_series(series: pd.Series, kind: str, categories: Sequence[Any] = ()) -> pd.Series:
+    """
+    把结果列转换为紧凑类型。
+    日期/整数列中存在无法解析的值（例如“永久”）时退回分类类型，保证不丢失原值。
+    categories 为分类列预先登记的类别（例如常用的查询状态），可直接赋值而无需追加类别。
+    """
+    if kind in ("datetime", "int"):
+        parsed = _parse(series, kind)
+        if _is_lossless(series, parsed):
+            return parsed if kind == "datetime" else parsed.astype("Int64")
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object).where(series.notna(), None).astype("category")
+    missing = pd.Index(list(categories)).difference(series.cat.categories)
+    if len(missing):
+        series = series.cat.add_categories(missing)
+    return series
+
+
+def text_series(series: pd.Series) -> pd.Series:
+    """把紧凑类型的列转换为文本（object），日期按 DATE_FORMAT 格式化，缺失值为 None"""
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        exported = series.dt.strftime(DATE_FORMAT)
+    else:
+        exported = series.astype(object)
+    return exported.astype(object).where(series.notna(), None)
+
+
+def export_series(series: pd.Series) -> pd.Series:
+    """
+    返回用于写出的列：分类列转换回 object（缺失值为 None），
+    日期 (datetime64) 和天数 (Int64) 列保持原类型，写成真正的日期/数字单元格而不是文本。
+    """
+    if pd.api.types.is_datetime64_any_dtype(series.dtype) or isinstance(series.dtype, pd.Int64Dtype):
+        return series
+    return series.astype(object).where(series.notna(), None)
+
+
+def assign_values(df: pd.DataFrame, indexes: Sequence[Any], col: str, values: List[Any]) -> None:
+    """
+    把 values 写入 df 中 indexes 行的 col 列，保持该列的紧凑类型：
+    分类列按需追加新类别；日期/整数列遇到无法解析的值时整列退回分类类型。
+    """
+    new_values = pd.Series(values, index=pd.Index(indexes), dtype=object)
+    dtype = df[col].dtype
+
+    if pd.api.types.is_datetime64_any_dtype(dtype) or isinstance(dtype, pd.Int64Dtype):
+        kind = "datetime" if pd.api.types.is_datetime64_any_dtype(dtype) else "int"
+        parsed = _parse(new_values, kind)
+        if _is_lossless(new_values, parsed):
+            if kind == "int":
+                parsed = parsed.astype("Int64")
+            df.loc[new_values.index, col] = parsed
+            return
+        df[col] = compact_series(text_series(df[col]), "category")
+        dtype = df[col].dtype
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        present = new_values.dropna()
+        missing = pd.Index(present.unique()).difference(dtype.categories)
+        if len(missing):
+            df[col] = df[col].cat.add_categories(missing)
+        df.loc[new_values.index, col] = new_values.where(new_values.notna(), None)
+        return
+
+    if dtype != object:
+        df[col] = df[col].astype(object)
+    df.loc[new_values.index, col] = new_values
+
+
+def _direct_value(dtype: Any, value: Any) -> Tuple[bool, Any]:
+    """
+    单个值能否不经类型转换直接写入该类型的列，返回 (能否直接写入, 要写入的值)。
+    常见情况（已有类别、YYYY-MM-DD 日期文本、整数文本）直接写入，其它交给 assign_values。
+    """
+    if value is None or dtype == object:
+        return True, value
+    if isinstance(dtype, pd.CategoricalDtype):
+        return value in dtype.categories, value
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        if isinstance(value, datetime):
+            return True, value
+        if isinstance(value, str):
+            try:
+                return True, datetime.strptime(value.strip(), DATE_FORMAT)
+            except ValueError:
+                return False, value
+        return False, value
+    if isinstance(dtype, pd.Int64Dtype):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return True, value
+        if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+            return True, int(value)
+    return False, value
+
+
+def assign_row(df: pd.DataFrame, index: Any, values: Dict[str, Any]) -> None:
+    """
+    写入一行中的多个单元格（逐行更新结果时使用）：值与列的紧凑类型直接兼容时用 df.at 写入，
+    否则按 assign_values 的规则追加类别或退回分类类型
+    """
+    dtypes = df.dtypes
+    for col, value in values.items():
+        direct, converted = _direct_value(dtypes[col], value)
+        if direct:
+            df.at[index, col] = converted
+        else:
+            assign_values(df, [index], col, [value])
@@ -1,47 +1,110 @@
+import re
 import pandas as pd
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, Any, List, Set, Tuple
 
 # --- 数据处理类 ---
 import logging  # 导入 logging 模块
 
+from ..storage.factory import create_backend
+from ..storage.journal import CheckpointJournal
+from ..storage.background_saver import BackgroundSaver
+from ..storage.result_log import ResultLog, RESULT_LOG_MODES
+from ..storage.frame_cache import FrameCache
+from ..monitoring.performance_monitor import get_monitor
+from .column_types import assign_row, assign_values, column_kind, compact_series, export_series, text_series
+from .derived import (
+    END_DATE_COLUMN, EXPIRY_BUCKET_COLUMN, REMAINING_DAYS_COLUMN, derive_warranty_fields,
+)
+
+# 预检未通过的序列号使用的查询状态，这些行不会进入浏览器查询队列
+INVALID_SERIAL_STATUS = "序列号格式无效"
+
+# 查询状态列预先登记的类别
+KNOWN_STATUSES = ("成功", INVALID_SERIAL_STATUS)
+
+# 序列号中常见的不可见字符：零宽字符、BOM、不间断空格、软连字符
+_INVISIBLE_CHARS = "[\u00a0\u00ad\u200b-\u200f\u2060\ufeff]"
+
 
 # --- 数据处理类 ---
 class DataManager:
     def __init__(
-        self, file_path: str, sheet_name: str, sn_column: str, result_columns: Dict[str, str], logger=None
+        self, file_path: str, sheet_name: str, sn_column: str, result_columns: Dict[str, str], logger=None,
+        background_save: bool = False, save_generations: int = 0,
+        storage_backend: Optional[str] = None, serial_patterns: Optional[List[str]] = None,
+        result_log_mode: str = "off", result_log_path: Optional[str] = None,
+        derive_warranty_fields: bool = False, read_cache: bool = False,
     ):  # 添加类型注释
         self.file_path: str = file_path
         self.sheet_name: str = sheet_name
         self.sn_column: str = sn_column
         self.result_columns: Dict[str, str] = result_columns
         self.df: Optional[pd.DataFrame] = None  # 添加类型注释
+        # 序列号格式（正则，需整体匹配），为空时只做规范化不做格式校验
+        self.serial_patterns: List[str] = list(serial_patterns or [])
         self.logger = logger or logging.getLogger(
             __name__
         )  # 使用传入的 logger 或创建新的
 
+        # 增量保存：记录变更行，定期检查点只追加变更行，最终保存时只回写这些单元格
+        # 存储后端按 storage_backend 配置或文件扩展名选择 (Excel/CSV/Parquet/SQLite)；
+        # 文件类后端先写临时文件再原子替换，并保留 save_generations 代滚动备份
+        self.backend = create_backend(
+            file_path, sheet_name, self.logger,
+            generations=save_generations, backend_name=storage_backend,
+        )
+        self.journal = CheckpointJournal(f"{file_path}.pending.jsonl", self.logger)
+        # 解析结果缓存：数据文件指纹未变时直接内存映射读取，省去重新解析 Excel
+        self.cache: Optional[FrameCache] = None
+        if read_cache and self.backend.cacheable:
+            self.cache = FrameCache(file_path, self.logger)
+            if not self.cache.available:
+                self.logger.info("未安装 pyarrow，解析结果缓存不可用。")
+                self.cache = None
+        self._dirty_rows: Set[Any] = set()  # 自上次检查点以来变更的行
+        self._pending_rows: Set[Any] = set()  # 已写入检查点日志、尚未合并回工作簿的行
+        self._structure_changed = False  # 加载时新建了结果列，首次保存需整表写入
+        self._serials_normalized = False  # 预检规范化了序列号，保存时序列号列也要写回
+        self._result_buffer: List[Tuple[Any, Dict[str, Any]]] = []  # update_results 缓冲的结果
+        # 分块处理时由 ChunkedProcessor 负责写出数据块，save_data 只写检查点
+        self.defer_writes = False
+        # 保存时按保修结束时间重新计算保修剩余天数和到期分类
+        self.derive_warranty_fields = derive_warranty_fields
+
+        # 后台保存：检查点快照交给后台线程写入，查询循环无需等待
+        self.saver: Optional[BackgroundSaver] = (
+            BackgroundSaver(self.journal.append, self.logger) if background_save else None
+        )
+
+        # 结果日志：每个序列号的结果追加一行 JSON，检查点时 fsync；
+        # only 模式下日志是唯一的输出，数据文件由 compact_result_log 生成
+        if result_log_mode not in RESULT_LOG_MODES:
+            raise ValueError(
+                f"不支持的结果日志模式 '{result_log_mode}'，应该是: {', '.join(RESULT_LOG_MODES)}"
+            )
+        self.result_log_mode = result_log_mode
+        self.result_log: Optional[ResultLog] = (
+            ResultLog(result_log_path or f"{file_path}.results.jsonl", self.logger)
+            if result_log_mode != "off" else None
+        )
+
     def load_data(self) -> Optional[pd.DataFrame]:
         """
         从Excel文件加载数据，并准备结果列。
         """
         self.logger.info(f"正在从文件 '{self.file_path}' 读取数据...")
         try:
-            self.df = pd.read_excel(self.file_path, sheet_name=self.sheet_name)
-            self.logger.info("数据读取成功。")
-
-            # 确保结果列存在，如果不存在则创建
-            for col_name in self.result_columns.values():
-                if col_name not in self.df.columns:
-                    self.df[col_name] = None  # 或者使用 pd.NA
-                    self.logger.warning(
-                        f"Excel 文件中未找到结果列 '{col_name}'，已创建。"
-                    )
-
-            # 检查序列号列是否存在
-            if self.sn_column not in self.df.columns:
-                self.logger.error(f"Excel文件中未找到序列号列: '{self.sn_column}'")
-                raise ValueError(f"Excel文件中未找到序列号列: '{self.sn_column}'")
-
-            return self.df
+            # 工作簿缺失或损坏时，从最新的有效备份代恢复
+            self.backend.recover()
+            df = self.cache.load() if self.cache is not None else None
+            if df is not None:
+                self.logger.info("数据文件未变化，已从缓存读取数据。")
+            else:
+                df = self.backend.read()
+                self.logger.info("数据读取成功。")
+                if self.cache is not None:
+                    self.cache.store(df)
+            return self._prepare_frame(df)
         except FileNotFoundError:
             self.logger.error(
                 f"错误：未找到文件 '{self.file_path}'。请检查文件路径是否正确。"
@@ -54,16 +117,398 @@ class DataManager:
             self.logger.error(f"读取Excel文件时发生错误: {e}", exc_info=True)
             return None
 
+    def load_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        加载一个已读入的数据块（分块处理时使用），与 load_data 一样准备结果列、
+        恢复检查点日志并做序列号预检。缺少序列号列时抛出 ValueError。
+        """
+        return self._prepare_frame(df, log_missing_columns=False)
+
+    def release_frame(self) -> None:
+        """
+        数据块已由调用方写出后释放：等待后台保存写完并清理检查点日志和变更记录，
+        释放内存中的 DataFrame。
+        """
+        if self.saver is not None and not self.saver.flush():
+            self.saver.discard_pending()
+        self.journal.clear()
+        self._dirty_rows.clear()
+        self._pending_rows.clear()
+        self._result_buffer = []
+        self.df = None
+
+    def _prepare_frame(self, df: pd.DataFrame, log_missing_columns: bool = True) -> pd.DataFrame:
+        """把读入的数据设为当前 DataFrame，并准备结果列"""
+        self.df = df
+        self._dirty_rows.clear()
+        self._pending_rows.clear()
+        self._structure_changed = False
+
+        # 确保结果列存在，如果不存在则创建
+        for col_name in self.result_columns.values():
+            if col_name not in self.df.columns:
+                self.df[col_name] = None  # 或者使用 pd.NA
+                self._structure_changed = True
+                if log_missing_columns:
+                    self.logger.warning(
+                        f"Excel 文件中未找到结果列 '{col_name}'，已创建。"
+                    )
+
+        # 结果列在内存中使用紧凑类型（分类/日期/可空整数），写出时再转换回文本
+        for col_name in self._result_column_names():
+            self.df[col_name] = compact_series(
+                self.df[col_name], column_kind(col_name),
+                KNOWN_STATUSES if col_name == "查询状态" else (),
+            )
+
+        # 检查序列号列是否存在
+        if self.sn_column not in self.df.columns:
+            self.logger.error(f"Excel文件中未找到序列号列: '{self.sn_column}'")
+            raise ValueError(f"Excel文件中未找到序列号列: '{self.sn_column}'")
+
+        # 上次运行在合并前中断时，从检查点日志恢复未合并的结果
+        self._replay_journal()
+
+        # 查询前预检：规范化序列号并标记格式无效的行
+        self.preflight_serial_numbers()
+
+        # only 模式下数据文件不含本次运行之前的结果，从结果日志恢复最新状态
+        if self.result_log_mode == "only":
+            self._apply_result_log(mark_dirty=False)
+
+        return self.df
+
+    def preflight_serial_numbers(self) -> int:
+        """
+        向量化规范化序列号列（去除不可见字符和首尾空白、转大写），
+        并按 serial_patterns 校验格式。格式无效且尚未成功的行标记为 INVALID_SERIAL_STATUS，
+        之前被标记、修正后已能通过校验的行清除该状态以便重新查询。返回格式无效的行数。
+        """
+        if self.df is None or self.sn_column not in self.df.columns:
+            return 0
+
+        serials = self.df[self.sn_column]
+        normalized = (
+            serials.astype("string")
+            .str.replace(_INVISIBLE_CHARS, "", regex=True)
+            .str.strip()
+            .str.upper()
+        )
+        normalized = normalized.mask(normalized == "")
+        changed = serials.astype("string").fillna("\0").ne(normalized.fillna("\0"))
+        if changed.any():
+            if self.df[self.sn_column].dtype != object:
+                self.df[self.sn_column] = self.df[self.sn_column].astype(object)
+            self.df.loc[changed, self.sn_column] = normalized[changed].astype(object).where(
+                normalized[changed].notna(), None
+            )
+            self._dirty_rows.update(self.df.index[changed.to_numpy()])
+            self._serials_normalized = True
+            self.logger.info(f"已规范化 {int(changed.sum())} 个序列号（去除空白/不可见字符并转为大写）。")
+
+        if not self.serial_patterns:
+            return 0
+
+        pattern = "|".join(f"(?:{p})" for p in self.serial_patterns)
+        valid = normalized.str.fullmatch(pattern, flags=re.ASCII).fillna(False).astype(bool)
+
+        if "查询状态" not in self.df.columns:
+            self.df["查询状态"] = None
+            self._structure_changed = True
+        status = self.df["查询状态"]
+        succeeded = status.eq("成功").fillna(False).astype(bool)
+        flagged = status.eq(INVALID_SERIAL_STATUS).fillna(False).astype(bool)
+        to_flag = ~valid & ~succeeded & ~flagged
+        to_clear = valid & flagged
+
+        if to_flag.any():
+            flag_indexes = self.df.index[to_flag.to_numpy()]
+            self._assign_column(flag_indexes, "查询状态", [INVALID_SERIAL_STATUS] * len(flag_indexes))
+            self._dirty_rows.update(flag_indexes)
+        if to_clear.any():
+            clear_indexes = self.df.index[to_clear.to_numpy()]
+            self._assign_column(clear_indexes, "查询状态", [None] * len(clear_indexes))
+            self._dirty_rows.update(clear_indexes)
+            self.logger.info(f"{int(to_clear.sum())} 个序列号修正后已通过格式校验，将重新查询。")
+
+        invalid_count = int((~valid & ~succeeded).sum())
+        if invalid_count:
+            self.logger.warning(
+                f"{invalid_count} 个序列号为空或格式无效，已标记为“{INVALID_SERIAL_STATUS}”并跳过查询。"
+            )
+        return invalid_count
+
+    def _assign_column(self, indexes: Any, col: str, values: List[Any]) -> None:
+        """按列写入多行的值，保持结果列的紧凑类型"""
+        assert self.df is not None
+        assign_values(self.df, list(indexes), col, values)
+
+    def export_frame(self) -> pd.DataFrame:
+        """
+        返回用于写出的 DataFrame：分类结果列转换回文本，日期和天数列保持原类型，
+        其它列与 self.df 共享数据。
+        """
+        assert self.df is not None
+        export_df = self.df.copy(deep=False)
+        for col in self._result_column_names():
+            export_df[col] = export_series(self.df[col])
+        return export_df
+
+    def refresh_derived_fields(self, today: Optional[pd.Timestamp] = None) -> int:
+        """
+        按当天日期由保修结束时间重新计算保修剩余天数和到期分类（向量化），
+        只更新值发生变化的行并把它们标记为变更行。返回更新的行数。
+        保修结束时间缺失或无法解析的行保留原值。
+        """
+        if not self.derive_warranty_fields or self.df is None or END_DATE_COLUMN not in self.df.columns:
+            return 0
+
+        remaining, bucket = derive_warranty_fields(self.df[END_DATE_COLUMN], today)
+        targets = [(EXPIRY_BUCKET_COLUMN, bucket)]
+        if REMAINING_DAYS_COLUMN in self.df.columns:
+            targets.insert(0, (REMAINING_DAYS_COLUMN, remaining))
+
+        changed: Set[Any] = set()
+        for col, values in targets:
+            if col not in self.df.columns:
+                self.df[col] = compact_series(pd.Series(None, index=self.df.index, dtype=object), column_kind(col))
+                self._structure_changed = True
+            diff = values.notna() & text_series(self.df[col]).ne(text_series(values))
+            if not diff.any():
+                continue
+            indexes = self.df.index[diff.to_numpy()]
+            self._assign_column(indexes, col, text_series(values[diff]).tolist())
+            changed.update(indexes)
+
+        self._dirty_rows.update(changed)
+        if changed:
+            self.logger.info(f"按当天日期更新了 {len(changed)} 行的保修剩余天数/到期分类。")
+        return len(changed)
+
+    def _result_column_names(self) -> List[str]:
+        """需要回写的结果列（包含固定的查询状态列和派生的到期分类列）"""
+        columns = list(self.result_columns.keys())
+        if "查询状态" not in columns:
+            columns.append("查询状态")
+        if self.derive_warranty_fields and EXPIRY_BUCKET_COLUMN not in columns:
+            columns.append(EXPIRY_BUCKET_COLUMN)
+        return [col for col in columns if self.df is not None and col in self.df.columns]
+
+    def _replay_journal(self) -> None:
+        """把检查点日志中的行快照应用到 DataFrame"""
+        if self.df is None or not self.journal.exists():
+            return
+
+        rows = {
+            index: values for index, values in self.journal.replay().items()
+            if index in self.df.index
+        }
+        restored = len(rows)
+        columns = {col for values in rows.values() for col in values}
+        for col in columns:
+            indexes = [index for index, values in rows.items() if col in values]
+            self._assign_column(indexes, col, [rows[index][col] for index in indexes])
+        self._pending_rows.update(rows)
+        if restored:
+            self.logger.info(f"从检查点日志恢复了 {restored} 行尚未合并的查询结果。")
+
+    def _log_result(self, index: Any, values: Dict[str, Any], meta: Optional[Dict[str, Any]]) -> None:
+        """把一个序列号的结果追加到结果日志"""
+        if self.result_log is None or self.df is None:
+            return
+        try:
+            self.result_log.append(self.df.at[index, self.sn_column], index, values, meta)
+        except OSError as e:
+            self.logger.error(f"写入结果日志 '{self.result_log.path}' 失败: {e}")
+
+    def _sync_result_log(self) -> None:
+        if self.result_log is None:
+            return
+        try:
+            self.result_log.sync()
+        except OSError as e:
+            self.logger.error(f"结果日志 '{self.result_log.path}' 落盘失败: {e}")
+
+    def _apply_result_log(self, mark_dirty: bool) -> int:
+        """按序列号把结果日志中的最新结果写入 DataFrame，返回更新的行数"""
+        if self.df is None or self.result_log is None or not self.result_log.exists():
+            return 0
+
+        records = self.result_log.latest()
+        if not records:
+            return 0
+
+        mask = self.df[self.sn_column].isin(list(records.keys()))
+        if not mask.any():
+            return 0
+        serials = self.df.loc[mask, self.sn_column]
+        indexes = serials.index
+        columns = {col for record in records.values() for col in record.get("values", {})}
+        for col in columns:
+            if col not in self.df.columns:
+                self.df[col] = None
+                self._structure_changed = True
+            values = [records[serial].get("values", {}).get(col) for serial in serials]
+            self._assign_column(indexes, col, values)
+
+        if mark_dirty:
+            self._dirty_rows.update(indexes)
+        self.logger.info(f"从结果日志恢复了 {len(indexes)} 行的最新查询结果。")
+        return len(indexes)
+
+    def compact_result_log(self) -> int:
+        """
+        把结果日志中每个序列号的最新结果合并回数据文件（需先调用 load_data）。
+        返回合并的行数。
+        """
+        if self.df is None:
+            self.logger.warning("DataFrame 为空，无法合并结果日志。")
+            return 0
+        if self.result_log is None:
+            self.logger.warning("未启用结果日志 (result_log_mode = off)，无需合并。")
+            return 0
+
+        self.apply_buffered_results()
+        merged = self._apply_result_log(mark_dirty=True)
+        if merged or self._dirty_rows or self._pending_rows or self._structure_changed:
+            self._write_changes()
+        self.logger.info(f"结果日志合并完成，共 {merged} 行。")
+        return merged
+
+    def checkpoint(self) -> int:
+        """
+        定期检查点：只把自上次检查点以来变更的行追加到检查点日志。
+        开销与变更行数成正比，不重写工作簿。返回写入的行数。
+        """
+        if self.df is None:
+            self.logger.warning("DataFrame 为空，无需写入检查点。")
+            return 0
+        self.apply_buffered_results()
+        self._sync_result_log()
+        if self.result_log_mode == "only":
+            # 结果日志就是检查点，不再另写检查点日志
+            written = len(self._dirty_rows)
+            self._dirty_rows.clear()
+            self.logger.info(f"结果日志已落盘，本次 {written} 行变更。")
+            return written
+        if not self._dirty_rows:
+            self.logger.debug("自上次检查点以来没有变更的行。")
+            return 0
+
+        columns = self._result_column_names()
+        rows = {
+            index: {col: self.df.at[index, col] for col in columns}
+            for index in self._dirty_rows
+        }
+        if self.saver is not None:
+            # 快照已在当前线程复制完成，后台线程不会访问 DataFrame
+            self.saver.submit(rows)
+            written = len(rows)
+            self.logger.info(f"已提交 {written} 行变更到后台保存。")
+            self._update_save_gauges()
+        else:
+            try:
+                written = self.journal.append(rows)
+            except OSError as e:
+                self.logger.error(f"写入检查点日志 '{self.journal.path}' 失败: {e}")
+                return 0
+            self.logger.info(f"检查点已写入 {written} 行变更。")
+
+        self._pending_rows.update(self._dirty_rows)
+        self._dirty_rows.clear()
+        return written
+
+    def has_unsaved_changes(self) -> bool:
+        """
+        是否有尚未合并回数据文件的变更（包括预检规范化的序列号、标记的无效行，
+        以及 refresh_derived_fields 重新计算后发生变化的派生字段和新增的到期分类列）
+        """
+        return bool(self._dirty_rows or self._pending_rows or self._structure_changed)
+
+    def get_save_metrics(self) -> Dict[str, Any]:
+        """后台保存的耗时和最近持久化快照的年龄（未启用后台保存时返回空字典）"""
+        return self.saver.get_metrics() if self.saver is not None else {}
+
+    def close(self) -> None:
+        """关闭时同步写完后台保存线程中剩余的快照和结果日志，并记录保存指标"""
+        if self.result_log is not None:
+            try:
+                self.result_log.close()
+            except OSError as e:
+                self.logger.error(f"关闭结果日志 '{self.result_log.path}' 失败: {e}")
+        if self.saver is None:
+            return
+        try:
+            self.saver.stop()
+        except Exception as e:
+            self.logger.error(f"关闭后台保存线程时写入剩余快照失败: {e}", exc_info=True)
+        self._update_save_gauges()
+
+    def _update_save_gauges(self) -> None:
+        """更新性能报告中的后台保存指标（每个检查点和关闭时调用，运行期间即可看到）"""
+        metrics = self.get_save_metrics()
+        if not metrics:
+            return
+        monitor = get_monitor()
+        monitor.set_gauge("后台保存请求数/实际写入数", f"{metrics['save_requests']}/{metrics['save_writes']}")
+        if metrics["last_durable_age"] is not None:
+            monitor.set_gauge("最近持久化快照距今(秒)", metrics["last_durable_age"])
+
     def save_data(self) -> None:
         """
         将DataFrame保存到Excel文件。
+        只把变更的单元格写回原工作簿（保留其它工作表、格式和公式）；
+        工作簿不存在或表头结构变化时整表写入。
         """
+        if self.df is not None:
+            self.apply_buffered_results()
+            self._sync_result_log()
+            if self.result_log_mode == "only":
+                self._dirty_rows.clear()
+                self.logger.info(
+                    f"结果日志已保存到 '{self.result_log.path}'，运行 compact 命令可合并回数据文件。"
+                )
+                return
+            if self.defer_writes:
+                self.checkpoint()
+                return
+            self._write_changes()
+        else:
+            self.logger.warning("DataFrame 为空，无需保存。")
+
+    def _write_changes(self) -> None:
+        """把变更行合并回数据文件，结构变化或文件不存在时整表写入"""
         if self.df is not None:
             self.logger.info(f"正在将数据保存到文件 '{self.file_path}'...")
+            # 合并后会清理检查点日志，先等待后台线程写完，避免与合并交错
+            if self.saver is not None and not self.saver.flush():
+                # 合并会把内存中的最新数据写回工作簿，后台未能写入的旧快照不再需要
+                self.logger.warning("后台保存未能完成，丢弃其中的旧快照，以本次合并为准。")
+                self.saver.discard_pending()
+            self.refresh_derived_fields()
+            changed_rows = self._dirty_rows | self._pending_rows
             try:
-                self.df.to_excel(
-                    self.file_path, sheet_name=self.sheet_name, index=False
-                )
+                if not (self._structure_changed or not self.backend.exists() or changed_rows):
+                    self.logger.info("没有需要保存的变更。")
+                    return
+                export_df = self.export_frame()
+                if self._structure_changed or not self.backend.exists():
+                    self.backend.write_full(export_df)
+                else:
+                    columns = self._result_column_names()
+                    if self._serials_normalized:
+                        columns = [self.sn_column] + columns
+                    if not self.backend.write_rows(export_df, sorted(changed_rows), columns):
+                        self.backend.write_full(export_df)
+
+                self._dirty_rows.clear()
+                self._pending_rows.clear()
+                self._structure_changed = False
+                self._serials_normalized = False
+                self.journal.clear()
+                if self.cache is not None:
+                    # 数据文件已变化，按新的指纹重建缓存
+                    self.cache.store(export_df)
                 self.logger.info("数据保存成功。")
             except FileNotFoundError:
                 self.logger.error(
@@ -78,22 +523,105 @@ class DataManager:
         else:
             self.logger.warning("DataFrame 为空，无需保存。")
 
-    def update_result(self, index: Any, results: Dict[str, Any]) -> None:
+    def _result_values(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """把查询结果映射为结果列的值（包含查询状态）"""
+        values = {
+            excel_col_name: results.get(web_field_name, None)
+            for excel_col_name, web_field_name in self.result_columns.items()
+        }
+        values["查询状态"] = results.get("查询状态", "未知错误")
+        return values
+
+    def update_result(
+        self, index: Any, results: Dict[str, Any], meta: Optional[Dict[str, Any]] = None
+    ) -> None:
         """
         更新DataFrame中指定行的查询结果。
+        meta 为写入结果日志的附加信息（例如尝试次数和耗时）。
         """
         if self.df is not None and index in self.df.index:
-            # 使用 results 字典中的值完全覆盖 DataFrame 中对应行的结果列
-            for excel_col_name, web_field_name in self.result_columns.items():
-                 # 使用 get 方法，如果 results 中没有该字段，则设置为 None 或空字符串，而不是保留旧值
-                 self.df.at[index, excel_col_name] = results.get(web_field_name, None)
-
-            # 单独处理查询状态，确保它总是被更新
-            self.df.at[index, "查询状态"] = results.get("查询状态", "未知错误")
+            # 使用 results 字典中的值完全覆盖 DataFrame 中对应行的结果列，
+            # 缺少的字段设置为 None 而不是保留旧值；查询状态总是被更新
+            values = self._result_values(results)
+            for col in values:
+                if col not in self.df.columns:
+                    self.df[col] = None
+            assign_row(self.df, index, values)
+            self._dirty_rows.add(index)
+            self._log_result(index, values, meta)
             self.logger.debug(f"更新行索引 {index} 的结果: {results}")
         else:
             self.logger.warning(f"警告：尝试更新不存在的行索引 {index}。")
 
+    def update_results(
+        self,
+        items: List[Tuple[Any, Dict[str, Any]]],
+        meta: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        缓冲一批 (行索引, 查询结果)，在检查点/保存/选择未查询行之前按列一次性写入。
+        启用结果日志时每个结果立即追加一行日志，meta 与 items 一一对应。
+        """
+        self._result_buffer.extend(items)
+        if self.result_log is not None and self.df is not None:
+            for i, (index, results) in enumerate(items):
+                if index in self.df.index:
+                    self._log_result(index, self._result_values(results), meta[i] if meta else None)
+
+    def apply_buffered_results(self) -> int:
+        """把缓冲的查询结果按列批量写入 DataFrame，返回写入的行数"""
+        if not self._result_buffer or self.df is None:
+            return 0
+
+        # 同一行以最后一次结果为准
+        latest: Dict[Any, Dict[str, Any]] = {}
+        for index, results in self._result_buffer:
+            latest[index] = results
+        self._result_buffer = []
+
+        missing = [index for index in latest if index not in self.df.index]
+        for index in missing:
+            self.logger.warning(f"警告：尝试更新不存在的行索引 {index}。")
+            del latest[index]
+        if not latest:
+            return 0
+
+        indexes = list(latest.keys())
+        results_list = list(latest.values())
+        columns: Dict[str, List[Any]] = {
+            excel_col_name: [results.get(web_field_name, None) for results in results_list]
+            for excel_col_name, web_field_name in self.result_columns.items()
+        }
+        columns["查询状态"] = [results.get("查询状态", "未知错误") for results in results_list]
+
+        for col, values in columns.items():
+            if col not in self.df.columns:
+                self.df[col] = None
+            self._assign_column(indexes, col, values)
+
+        self._dirty_rows.update(indexes)
+        self.logger.debug(f"批量写入 {len(indexes)} 行查询结果。")
+        return len(indexes)
+
+    def _unqueried_mask(self, status_column_name: str = "查询状态") -> pd.Series:
+        """查询状态为空或不是“成功”的行（预检判定格式无效的行除外）"""
+        assert self.df is not None
+        if status_column_name not in self.df.columns:
+            return pd.Series(True, index=self.df.index)
+        status = self.df[status_column_name]
+        return status.isna() | (status.ne("成功") & status.ne(INVALID_SERIAL_STATUS))
+
+    def get_unqueried_indexes(self, status_column_name: str = "查询状态") -> pd.Index:
+        """获取查询状态不是“成功”的行索引（布尔掩码选择）"""
+        if self.df is None:
+            self.logger.warning("DataFrame 为空，无法获取未查询序列号。")
+            return pd.Index([])
+
+        self.apply_buffered_results()
+        indexes = self.df.index[self._unqueried_mask(status_column_name).to_numpy()]
+        self.logger.info(f"找到 {len(indexes)} 个未成功查询的序列号。")
+        return indexes
+
     def get_unqueried_serial_numbers(
         self, sn_column_name: str, status_column_name: str = "查询状态"
     ) -> List[tuple]:
@@ -104,13 +632,9 @@ class DataManager:
             self.logger.warning("DataFrame 为空，无法获取未查询序列号。")
             return []
 
-        unqueried = []
-        for index, row in self.df.iterrows():
-            # 检查查询状态是否不是“成功”或者为空
-            if (
-                pd.isna(row.get(status_column_name))
-                or row.get(status_column_name) != "成功"
-            ):
-                unqueried.append((index, row[sn_column_name]))
+        self.apply_buffered_results()
+        mask = self._unqueried_mask(status_column_name)
+        selected = self.df.loc[mask, sn_column_name]
+        unqueried = list(zip(selected.index, selected.tolist()))
         self.logger.info(f"找到 {len(unqueried)} 个未成功查询的序列号。")
         return unqueried
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+派生保修字段
+保修剩余天数和到期分类由已保存的保修结束时间按当天日期向量化计算，
+不依赖抓取时的旧值，数据无需重新查询也能保持准确
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .column_types import parse_dates
+
+END_DATE_COLUMN = "保修结束时间"
+REMAINING_DAYS_COLUMN = "保修剩余天数"
+EXPIRY_BUCKET_COLUMN = "到期分类"
+
+# 到期分类：按剩余天数划分，区间为左开右闭
+EXPIRY_BUCKET_EDGES = [-np.inf, -1, 29, 89, 179, 364, np.inf]
+EXPIRY_BUCKET_LABELS = ["已过保", "30天内到期", "90天内到期", "180天内到期", "1年内到期", "1年以上"]
+
+
+def derive_warranty_fields(
+    end_dates: pd.Series, today: Optional[pd.Timestamp] = None
+) -> Tuple[pd.Series, pd.Series]:
+    """
+    根据保修结束时间计算 (保修剩余天数, 到期分类)。
+    保修结束时间缺失或无法解析的行两者均为缺失值。
+    """
+    today = pd.Timestamp.today().normalize() if today is None else pd.Timestamp(today).normalize()
+    ends = parse_dates(end_dates).dt.normalize()
+    remaining = (ends - today).dt.days.astype("Int64")
+    bucket = pd.cut(
+        remaining.astype("float64"), bins=EXPIRY_BUCKET_EDGES, labels=EXPIRY_BUCKET_LABELS
+    )
+    return remaining, pd.Series(bucket, index=end_dates.index, name=EXPIRY_BUCKET_COLUMN)
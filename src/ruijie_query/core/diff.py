@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+运行结果对比模块
+加载两次运行的结果快照（数据文件或结果日志），以序列号列的哈希索引对齐后逐列向量化比较，
+输出按字段分组的变更报告；耗时与行数成线性关系
+"""
+
+import os
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from ..storage.factory import create_backend
+from ..storage.result_log import ResultLog
+from .column_types import DATE_FORMAT
+from .derived import EXPIRY_BUCKET_COLUMN, REMAINING_DAYS_COLUMN
+
+# 报告中表示新增/移除序列号的字段名
+ADDED_FIELD = "(新增)"
+REMOVED_FIELD = "(移除)"
+# 随日期自动变化的派生列，默认不参与比较
+DERIVED_COLUMNS = (REMAINING_DAYS_COLUMN, EXPIRY_BUCKET_COLUMN)
+REPORT_COLUMNS = ["字段", "序列号", "旧值", "新值"]
+
+
+def load_snapshot(
+    path: str,
+    sheet_name: str,
+    sn_column: str,
+    logger: Optional[logging.Logger] = None,
+) -> pd.DataFrame:
+    """
+    加载一次运行的结果快照。.jsonl 文件按结果日志读取每个序列号的最新记录，
+    其它文件按扩展名选择存储后端读取。
+    """
+    logger = logger or logging.getLogger(__name__)
+    if path.lower().endswith(".jsonl"):
+        records = ResultLog(path, logger).latest()
+        rows = [{sn_column: serial, **record.get("values", {})} for serial, record in records.items()]
+        return pd.DataFrame(rows, columns=None if rows else [sn_column])
+    return create_backend(path, sheet_name, logger).read()
+
+
+def _normalize_serials(series: pd.Series) -> pd.Series:
+    return series.astype("string").str.strip().str.upper()
+
+
+def _normalize_values(series: pd.Series) -> pd.Series:
+    """
+    把一列转换为可比较的文本：日期统一为 YYYY-MM-DD，整数值的浮点数去掉小数部分，
+    缺失值和空白为 NA。不同格式（Excel/CSV/日志）读出的同一取值比较结果相同。
+    """
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        text = series.dt.strftime(DATE_FORMAT).astype("string")
+    elif pd.api.types.is_float_dtype(series.dtype) and ((series.dropna() % 1) == 0).all():
+        text = series.astype("Int64").astype("string")
+    else:
+        text = series.astype("string").str.strip()
+        # Excel 中按日期时间存储的单元格读出为 "YYYY-MM-DD 00:00:00"
+        text = text.str.replace(r"^(\d{4}-\d{2}-\d{2}) 00:00:00$", r"\1", regex=True)
+    return text.mask(text == "")
+
+
+def _indexed(df: pd.DataFrame, sn_column: str, fields: List[str]) -> pd.DataFrame:
+    """以规范化后的序列号建立索引（重复序列号保留最后一行），只保留需要比较的列"""
+    serials = _normalize_serials(df[sn_column])
+    indexed = pd.DataFrame(
+        {field: _normalize_values(df[field]) if field in df.columns else pd.NA for field in fields},
+        index=df.index,
+    ).set_axis(pd.Index(serials, name=sn_column))
+    indexed = indexed[indexed.index.notna()]
+    return indexed[~indexed.index.duplicated(keep="last")]
+
+
+def diff_snapshots(
+    old: pd.DataFrame,
+    new: pd.DataFrame,
+    sn_column: str,
+    fields: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """
+    对比两个结果快照，返回按字段、序列号排序的变更表（列为 REPORT_COLUMNS）。
+    fields 为空时比较两个快照共有的、除序列号列和派生列之外的所有列。
+    只在一侧出现的序列号以 ADDED_FIELD / REMOVED_FIELD 字段记录。
+    """
+    if fields is None:
+        fields = [
+            col for col in new.columns
+            if col in old.columns and col != sn_column and col not in DERIVED_COLUMNS
+        ]
+    fields = list(fields)
+
+    old_indexed = _indexed(old, sn_column, fields)
+    new_indexed = _indexed(new, sn_column, fields)
+
+    parts: List[pd.DataFrame] = []
+    added = new_indexed.index.difference(old_indexed.index, sort=False)
+    removed = old_indexed.index.difference(new_indexed.index, sort=False)
+    for field, serials in ((ADDED_FIELD, added), (REMOVED_FIELD, removed)):
+        if len(serials):
+            parts.append(pd.DataFrame({"字段": field, "序列号": serials, "旧值": pd.NA, "新值": pd.NA}))
+
+    # 哈希索引对齐：两侧都有的序列号按新快照的顺序取出
+    common = new_indexed.index.intersection(old_indexed.index, sort=False)
+    old_common = old_indexed.reindex(common)
+    new_common = new_indexed.reindex(common)
+    for field in fields:
+        old_values = old_common[field]
+        new_values = new_common[field]
+        changed = old_values.fillna("\0").ne(new_values.fillna("\0")).to_numpy()
+        if changed.any():
+            parts.append(pd.DataFrame({
+                "字段": field,
+                "序列号": common[changed],
+                "旧值": old_values.to_numpy()[changed],
+                "新值": new_values.to_numpy()[changed],
+            }))
+
+    if not parts:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    report = pd.concat(parts, ignore_index=True)
+    return report.sort_values(["字段", "序列号"], kind="stable", ignore_index=True)[REPORT_COLUMNS]
+
+
+def summarize_diff(report: pd.DataFrame) -> Dict[str, int]:
+    """每个字段的变更行数"""
+    return {str(field): int(count) for field, count in report["字段"].value_counts(sort=False).items()}
+
+
+def format_diff_report(report: pd.DataFrame, examples: int = 5) -> List[str]:
+    """紧凑的文本报告：每个字段一行汇总，后跟最多 examples 条示例"""
+    lines: List[str] = []
+    for field, group in report.groupby("字段", sort=True):
+        lines.append(f"{field}: {len(group)} 行")
+        for row in group.head(examples).itertuples(index=False):
+            if field in (ADDED_FIELD, REMOVED_FIELD):
+                lines.append(f"  {row.序列号}")
+            else:
+                lines.append(f"  {row.序列号}: {_display(row.旧值)} -> {_display(row.新值)}")
+        if len(group) > examples:
+            lines.append(f"  ... 另有 {len(group) - examples} 行")
+    return lines
+
+
+def _display(value: Any) -> str:
+    return "(空)" if pd.isna(value) else str(value)
+
+
+def diff_report_path(new_path: str) -> str:
+    """变更报告的默认路径：与新快照同目录的 <文件名>.diff.csv"""
+    return f"{os.path.splitext(new_path)[0]}.diff.csv"
@@ -6,18 +6,21 @@
 
 import time
 import logging
+import threading
 from typing import Dict, List, Any, Optional
 from ..config.constants import PerformanceConfig
 
 
 class PerformanceMonitor:
-    """简单的性能监控器"""
+    """简单的性能监控器（线程安全：后台保存、竞速识别等线程也会记录指标）"""
 
     def __init__(self, logger: Optional[logging.Logger] = None):
         self.logger = logger or logging.getLogger(__name__)
         self.execution_times: Dict[str, List[float]] = {}
         self.operation_counts: Dict[str, int] = {}
         self.start_times: Dict[str, float] = {}
+        self.gauges: Dict[str, Any] = {}  # 瞬时指标（最新值），例如快照年龄
+        self._lock = threading.RLock()
 
         # 🆕 优化4：性能监控智能模式
         self.lightweight_mode = False  # 轻量级模式开关
@@ -29,9 +32,10 @@ class PerformanceMonitor:
         if self.lightweight_mode and not self._should_monitor_operation(operation_name):
             return
 
-        self.start_times[operation_name] = time.time()
-        if operation_name not in self.execution_times:
-            self.execution_times[operation_name] = []
+        with self._lock:
+            self.start_times[operation_name] = time.time()
+            if operation_name not in self.execution_times:
+                self.execution_times[operation_name] = []
 
     def _should_monitor_operation(self, operation_name: str) -> bool:
         """判断是否应该监控某个操作（轻量级模式优化）"""
@@ -66,23 +70,24 @@ class PerformanceMonitor:
 
     def end_timer(self, operation_name: str, log_slow_operations: bool = True) -> float:
         """结束计时操作，返回执行时间"""
-        if operation_name not in self.start_times:
+        with self._lock:
+            start_time = self.start_times.pop(operation_name, None)
+        if start_time is None:
             # 🆕 优化4b：轻量级模式下不记录警告（因为某些操作被跳过了）
             if not (self.lightweight_mode and not self._should_monitor_operation(operation_name)):
                 self.logger.warning(f"未找到操作 '{operation_name}' 的开始时间")
             return 0.0
 
-        end_time = time.time()
-        start_time = self.start_times.pop(operation_name, 0)
-        execution_time = end_time - start_time
+        execution_time = time.time() - start_time
 
         # 🆕 优化4c：轻量级模式下跳过小操作的时间记录
         if self.lightweight_mode and not self._should_monitor_operation(operation_name):
             return execution_time
 
         # 记录执行时间
-        self.execution_times[operation_name].append(execution_time)
-        self.operation_counts[operation_name] = self.operation_counts.get(operation_name, 0) + 1
+        with self._lock:
+            self.execution_times.setdefault(operation_name, []).append(execution_time)
+            self.operation_counts[operation_name] = self.operation_counts.get(operation_name, 0) + 1
 
         # 记录慢操作
         if log_slow_operations and execution_time > PerformanceConfig.SLOW_OPERATION_THRESHOLD:
@@ -94,6 +99,24 @@ class PerformanceMonitor:
 
         return execution_time
 
+    def record_time(self, operation_name: str, execution_time: float):
+        """直接记录一次已测得的执行时间（用于后台线程等无法成对调用计时器的场景）"""
+        if self.lightweight_mode and not self._should_monitor_operation(operation_name):
+            return
+        with self._lock:
+            self.execution_times.setdefault(operation_name, []).append(execution_time)
+            self.operation_counts[operation_name] = self.operation_counts.get(operation_name, 0) + 1
+
+    def set_gauge(self, name: str, value: Any):
+        """设置瞬时指标的最新值"""
+        with self._lock:
+            self.gauges[name] = value
+
+    def get_gauge(self, name: str, default: Any = None) -> Any:
+        """获取瞬时指标的最新值"""
+        with self._lock:
+            return self.gauges.get(name, default)
+
     # 🆕 优化4d：添加轻量级模式控制方法
     def set_lightweight_mode(self, enabled: bool = True):
         """启用或禁用轻量级模式"""
@@ -116,13 +139,16 @@ class PerformanceMonitor:
 
     def get_average_time(self, operation_name: str) -> float:
         """获取操作的平均执行时间"""
-        if operation_name not in self.execution_times or not self.execution_times[operation_name]:
+        with self._lock:
+            times = list(self.execution_times.get(operation_name, []))
+        if not times:
             return 0.0
-        return sum(self.execution_times[operation_name]) / len(self.execution_times[operation_name])
+        return sum(times) / len(times)
 
     def get_total_time(self, operation_name: str) -> float:
         """获取操作的总执行时间"""
-        return sum(self.execution_times.get(operation_name, []))
+        with self._lock:
+            return sum(self.execution_times.get(operation_name, []))
 
     def get_operation_count(self, operation_name: str) -> int:
         """获取操作执行次数"""
@@ -131,8 +157,9 @@ class PerformanceMonitor:
     def get_stats_summary(self) -> Dict[str, Any]:
         """获取性能统计摘要"""
         summary = {}
-        for operation_name in self.execution_times:
-            times = self.execution_times[operation_name]
+        with self._lock:
+            execution_times = {name: list(times) for name, times in self.execution_times.items()}
+        for operation_name, times in execution_times.items():
             if times:
                 summary[operation_name] = {
                     "count": len(times),
@@ -145,7 +172,9 @@ class PerformanceMonitor:
 
     def log_performance_report(self):
         """输出性能报告"""
-        if not self.execution_times:
+        with self._lock:
+            gauges = dict(self.gauges)
+        if not self.execution_times and not gauges:
             self.logger.info("📊 无性能数据可报告")
             return
 
@@ -161,11 +190,18 @@ class PerformanceMonitor:
                 f"范围{stats['min_time']:.2f}-{stats['max_time']:.2f}秒"
             )
 
+        for name, value in gauges.items():
+            if isinstance(value, float):
+                value = f"{value:.2f}"
+            self.logger.info(f"📏 {name}: {value}")
+
     def reset(self):
         """重置所有性能数据"""
-        self.execution_times.clear()
-        self.operation_counts.clear()
-        self.start_times.clear()
+        with self._lock:
+            self.execution_times.clear()
+            self.operation_counts.clear()
+            self.start_times.clear()
+            self.gauges.clear()
         self.logger.debug("🔄 性能监控数据已重置")
 
 
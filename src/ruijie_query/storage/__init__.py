@@ -0,0 +1,28 @@
+from .base import StorageBackend
+from .excel_backend import ExcelBackend
+from .csv_backend import CsvBackend
+from .parquet_backend import ParquetBackend
+from .sqlite_backend import SqliteBackend
+from .factory import create_backend, resolve_backend_name
+from .journal import CheckpointJournal
+from .background_saver import BackgroundSaver
+from .result_log import ResultLog, RESULT_LOG_MODES
+from .frame_cache import FrameCache
+from .xlsx_export import export_xlsx, EXCEL_MAX_ROWS
+
+__all__ = [
+    "StorageBackend",
+    "ExcelBackend",
+    "CsvBackend",
+    "ParquetBackend",
+    "SqliteBackend",
+    "create_backend",
+    "resolve_backend_name",
+    "CheckpointJournal",
+    "BackgroundSaver",
+    "ResultLog",
+    "RESULT_LOG_MODES",
+    "FrameCache",
+    "export_xlsx",
+    "EXCEL_MAX_ROWS",
+]
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+原子文件写入模块
+先写同目录临时文件并 fsync，再原子重命名到目标路径；可保留若干滚动备份代，
+加载时从最新的有效代恢复，保证中断或崩溃时不会留下半写的文件
+"""
+
+import os
+import shutil
+import tempfile
+import zipfile
+import logging
+from typing import Callable, List, Optional
+
+
+def generation_path(target: str, generation: int) -> str:
+    """第 N 代备份的路径，例如 Serial-Number.xlsx -> Serial-Number.bak1.xlsx（保留扩展名以便按类型打开）"""
+    root, ext = os.path.splitext(target)
+    return f"{root}.bak{generation}{ext}"
+
+
+def _fsync_file(path: str) -> None:
+    with open(path, "rb+") as f:
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _fsync_dir(directory: str) -> None:
+    """同步目录项，使重命名本身落盘（Windows 不支持打开目录，忽略）"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _rotate_generations(target: str, generations: int) -> None:
+    """把当前文件保存为第 1 代，较旧的代依次后移，超出数量的最旧一代被覆盖"""
+    if generations <= 0 or not os.path.exists(target):
+        return
+    for n in range(generations - 1, 0, -1):
+        older = generation_path(target, n)
+        if os.path.exists(older):
+            os.replace(older, generation_path(target, n + 1))
+
+    first = generation_path(target, 1)
+    if os.path.exists(first):
+        os.remove(first)
+    try:
+        # 硬链接不复制数据；文件系统不支持时退回到复制
+        os.link(target, first)
+    except (OSError, AttributeError):
+        shutil.copy2(target, first)
+
+
+def atomic_write(
+    target: str,
+    write_func: Callable[[str], None],
+    generations: int = 0,
+    logger: Optional[logging.Logger] = None,
+) -> None:
+    """
+    原子写入文件：write_func 接收临时文件路径并写入完整内容，
+    完成后 fsync 并重命名为目标文件。write_func 抛出异常时目标文件保持不变。
+    """
+    logger = logger or logging.getLogger(__name__)
+    directory = os.path.dirname(os.path.abspath(target))
+    _, ext = os.path.splitext(target)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".~{os.path.basename(target)}.", suffix=ext, dir=directory
+    )
+    os.close(fd)
+    try:
+        write_func(tmp_path)
+        _fsync_file(tmp_path)
+        _rotate_generations(target, generations)
+        os.replace(tmp_path, target)
+        _fsync_dir(directory)
+    except BaseException:
+        # 包括 KeyboardInterrupt：清理临时文件后继续抛出
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    logger.debug(f"已原子写入文件 '{target}'。")
+
+
+def is_valid_xlsx(path: str) -> bool:
+    """快速检查 xlsx 是否完整：zip 目录可读且包含工作簿主文件（截断的文件会失败）"""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return "xl/workbook.xml" in archive.namelist()
+    except (OSError, zipfile.BadZipFile):
+        return False
+
+
+def find_latest_valid(
+    target: str, generations: int, validator: Callable[[str], bool]
+) -> Optional[str]:
+    """按 目标文件、第 1 代、第 2 代... 的顺序返回第一个有效的文件路径"""
+    candidates: List[str] = [target] + [
+        generation_path(target, n) for n in range(1, generations + 1)
+    ]
+    for path in candidates:
+        if os.path.exists(path) and validator(path):
+            return path
+    return None
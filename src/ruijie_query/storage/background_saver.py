@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+后台保存模块
+查询循环只发布变更行快照，由后台线程合并多个待保存请求后一次写入
+"""
+
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from ..monitoring.performance_monitor import get_monitor
+
+
+class BackgroundSaver:
+    """合并保存请求的后台写入线程"""
+
+    def __init__(
+        self,
+        write_func: Callable[[Dict[Any, Dict[str, Any]]], Any],
+        logger: Optional[logging.Logger] = None,
+        name: str = "后台数据保存",
+        retry_delay: float = 1.0,
+    ):
+        self.write_func = write_func
+        self.logger = logger or logging.getLogger(__name__)
+        self.name = name
+        self.retry_delay = retry_delay  # 写入失败后的重试间隔 (秒)
+
+        self._pending: Dict[Any, Dict[str, Any]] = {}  # 待写入的行快照，同一行只保留最新的
+        self._condition = threading.Condition()
+        self._writing = False
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+        # 指标
+        self.requests = 0  # 收到的保存请求数
+        self.writes = 0  # 实际写入次数（多个请求合并为一次写入）
+        self.failures = 0
+        self.total_save_time = 0.0
+        self.last_durable_time: Optional[float] = None  # 最近一次成功落盘的时间戳
+
+    def _ensure_started(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def submit(self, rows: Dict[Any, Dict[str, Any]]) -> None:
+        """发布一批行快照，立即返回；尚未写入的同一行快照会被新的覆盖"""
+        if not rows:
+            return
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError("后台保存线程已停止，无法提交新的保存请求")
+            self._pending.update(rows)
+            self.requests += 1
+            self._ensure_started()
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    # 停止后剩余的快照由 stop() 在调用线程中同步写入
+                    return
+                rows, self._pending = self._pending, {}
+                self._writing = True
+
+            start = time.time()
+            try:
+                self.write_func(rows)
+                elapsed = time.time() - start
+                self.writes += 1
+                self.total_save_time += elapsed
+                self.last_durable_time = time.time()
+                get_monitor().record_time(self.name, elapsed)
+                self.logger.debug(f"{self.name}: 已写入 {len(rows)} 行，耗时 {elapsed:.3f} 秒。")
+                failed = False
+            except Exception as e:
+                self.failures += 1
+                failed = True
+                self.logger.error(f"{self.name}: 写入失败，稍后重试: {e}", exc_info=True)
+
+            with self._condition:
+                if failed:
+                    # 放回未写入的快照，但不覆盖期间提交的更新快照
+                    for index, values in rows.items():
+                        self._pending.setdefault(index, values)
+                self._writing = False
+                self._condition.notify_all()
+                if failed and not self._stopped:
+                    self._condition.wait(self.retry_delay)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """阻塞直到所有已提交的快照写入完成；超时或写入失败时返回 False"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            failures_before = self.failures
+            while self._pending or self._writing:
+                if self._thread is None or not self._thread.is_alive():
+                    break
+                if self.failures > failures_before:
+                    return False
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return not self._pending and not self._writing
+
+    def discard_pending(self) -> None:
+        """丢弃尚未写入的快照（调用方已通过其它方式持久化了更新的数据）"""
+        with self._condition:
+            self._pending.clear()
+            while self._writing:
+                self._condition.wait()
+
+    def stop(self) -> None:
+        """停止后台线程，并在调用线程中同步写入剩余快照（关闭时调用）"""
+        self.flush()
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        if self._pending:
+            rows, self._pending = self._pending, {}
+            start = time.time()
+            self.write_func(rows)
+            self.writes += 1
+            self.total_save_time += time.time() - start
+            self.last_durable_time = time.time()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """保存耗时和最近持久化快照的年龄"""
+        age = None if self.last_durable_time is None else time.time() - self.last_durable_time
+        return {
+            "save_requests": self.requests,
+            "save_writes": self.writes,
+            "save_failures": self.failures,
+            "total_save_time": self.total_save_time,
+            "last_durable_age": age,
+        }
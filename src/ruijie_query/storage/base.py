@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+存储后端接口
+DataManager 通过该接口读写数据，具体格式（Excel/CSV/Parquet/SQLite）由后端实现
+"""
+
+import os
+import shutil
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from .atomic import atomic_write, find_latest_valid
+
+
+class StorageBackend(ABC):
+    """存储后端基类"""
+
+    # 该后端处理的文件扩展名（小写，含点）
+    extensions: Tuple[str, ...] = ()
+    # 后端名称，用于配置项 storage_backend
+    name = ""
+    # 是否支持 append/append_marker/truncate_to，分块处理的输出文件需要追加写入
+    supports_append = False
+    # 解析开销大、值得在数据文件旁缓存解析结果的格式
+    cacheable = False
+
+    def __init__(
+        self,
+        file_path: str,
+        sheet_name: str,
+        logger: Optional[logging.Logger] = None,
+        generations: int = 0,
+    ):
+        self.file_path = file_path
+        self.sheet_name = sheet_name  # Excel 工作表名；SQLite 中作为表名，其它格式忽略
+        self.logger = logger or logging.getLogger(__name__)
+        self.generations = generations  # 保留的滚动备份代数
+
+    def exists(self) -> bool:
+        """数据文件是否存在"""
+        return os.path.exists(self.file_path)
+
+    def is_valid(self, path: str) -> bool:
+        """快速检查文件是否完整可读，用于从备份代中选出有效的一代"""
+        return True
+
+    def recover(self) -> bool:
+        """
+        数据文件缺失或损坏（例如保存过程中崩溃留下的截断文件）时，从最新的有效备份代恢复。
+        返回是否进行了恢复。
+        """
+        if self.generations <= 0 or (self.exists() and self.is_valid(self.file_path)):
+            return False
+
+        latest = find_latest_valid(self.file_path, self.generations, self.is_valid)
+        if latest is None or latest == self.file_path:
+            return False
+
+        self.logger.warning(
+            f"数据文件 '{self.file_path}' 缺失或已损坏，从备份 '{latest}' 恢复。"
+        )
+        # 恢复本身也使用原子写入；损坏的文件不轮转进备份代，避免挤掉有效备份
+        atomic_write(self.file_path, lambda tmp: shutil.copy2(latest, tmp), 0, self.logger)
+        return True
+
+    @abstractmethod
+    def read(self) -> pd.DataFrame:
+        """读取全部数据"""
+
+    def iter_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        """
+        按块流式读取数据，每块最多 chunksize 行，行索引在整个文件范围内连续。
+        默认实现读取全部数据后切片，支持流式读取的后端应覆盖该方法。
+        """
+        df = self.read()
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+    @abstractmethod
+    def write_full(self, df: pd.DataFrame) -> None:
+        """整表写入"""
+
+    def write_rows(self, df: pd.DataFrame, indexes: Iterable[Any], columns: List[str]) -> bool:
+        """
+        只写入指定行、指定列。不支持原地更新的格式返回 False，由调用方改为整表写入。
+        """
+        return False
+
+    def append(self, df: pd.DataFrame) -> None:
+        """把 df 追加到数据末尾（文件不存在时创建）"""
+        raise NotImplementedError(f"存储后端 '{self.name}' 不支持追加写入")
+
+    def append_marker(self) -> int:
+        """当前已追加数据的位置标记，配合 truncate_to 撤销标记之后追加的数据"""
+        raise NotImplementedError(f"存储后端 '{self.name}' 不支持追加写入")
+
+    def truncate_to(self, marker: int) -> None:
+        """丢弃 marker 之后追加的数据（例如崩溃前写入、但进度游标尚未记录的块）"""
+        raise NotImplementedError(f"存储后端 '{self.name}' 不支持追加写入")
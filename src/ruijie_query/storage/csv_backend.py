@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+CSV 存储后端
+"""
+
+import os
+from typing import Iterator
+
+import pandas as pd
+
+from .base import StorageBackend
+from .atomic import atomic_write
+
+# 带 BOM 的 UTF-8，Excel 直接打开中文列名不乱码；读取时同时兼容无 BOM 的文件
+CSV_ENCODING = "utf-8-sig"
+
+
+class CsvBackend(StorageBackend):
+    """
+    CSV 文件读写。所有列按文本读取，避免序列号前导零等信息丢失。
+    CSV 不支持原地更新，检查点由检查点日志增量记录，最终保存时原子整表重写。
+    """
+
+    extensions = (".csv",)
+    name = "csv"
+    supports_append = True
+    cacheable = True
+
+    def read(self) -> pd.DataFrame:
+        return pd.read_csv(self.file_path, dtype=str, encoding=CSV_ENCODING)
+
+    def iter_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        # read_csv 的 chunksize 模式本身就是流式读取，行索引在各块之间连续
+        yield from pd.read_csv(
+            self.file_path, dtype=str, encoding=CSV_ENCODING, chunksize=chunksize
+        )
+
+    def write_full(self, df: pd.DataFrame) -> None:
+        atomic_write(
+            self.file_path,
+            lambda tmp: df.to_csv(tmp, index=False, encoding=CSV_ENCODING),
+            self.generations,
+            self.logger,
+        )
+
+    def append(self, df: pd.DataFrame) -> None:
+        # 只有新文件写表头（含 BOM），追加部分不能再写 BOM
+        new_file = self.append_marker() == 0
+        with open(self.file_path, "a", encoding=CSV_ENCODING if new_file else "utf-8", newline="") as f:
+            df.to_csv(f, index=False, header=new_file)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append_marker(self) -> int:
+        """CSV 以文件字节数作为位置标记"""
+        return os.path.getsize(self.file_path) if self.exists() else 0
+
+    def truncate_to(self, marker: int) -> None:
+        if not self.exists():
+            return
+        if marker <= 0:
+            os.remove(self.file_path)
+        elif os.path.getsize(self.file_path) > marker:
+            os.truncate(self.file_path, marker)
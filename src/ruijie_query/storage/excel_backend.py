@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Excel 工作簿读写模块
+支持只把变更的单元格写回原工作簿，保留其它工作表、格式和公式
+"""
+
+import shutil
+from typing import Any, Iterable, Iterator, List
+
+import pandas as pd
+
+from ..utils.helpers import excel_date_format, to_python_value
+from .base import StorageBackend
+from .atomic import atomic_write, is_valid_xlsx
+
+
+def _format_date_cells(worksheet: Any, df: pd.DataFrame) -> None:
+    """给日期列的单元格设置日期格式（pandas 默认把日期写成带时间的格式）"""
+    for position, col in enumerate(df.columns, start=1):
+        if not pd.api.types.is_datetime64_any_dtype(df[col].dtype):
+            continue
+        for excel_row, value in enumerate(df[col], start=2):
+            number_format = excel_date_format(to_python_value(value))
+            if number_format:
+                worksheet.cell(row=excel_row, column=position).number_format = number_format
+
+
+class ExcelBackend(StorageBackend):
+    """基于 openpyxl 的 Excel 工作簿读写，所有写入均为原子写入"""
+
+    extensions = (".xlsx", ".xlsm")
+    name = "excel"
+    cacheable = True
+
+    def is_valid(self, path: str) -> bool:
+        return is_valid_xlsx(path)
+
+    @property
+    def keep_vba(self) -> bool:
+        """启用宏的工作簿 (.xlsm) 写回时保留其中的 VBA 工程，否则 openpyxl 保存时会丢弃宏"""
+        return self.file_path.lower().endswith(".xlsm")
+
+    def read(self) -> pd.DataFrame:
+        """读取目标工作表"""
+        return pd.read_excel(self.file_path, sheet_name=self.sheet_name)
+
+    def iter_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        """以 openpyxl 只读模式逐行流式读取工作表，不把整个工作簿加载到内存"""
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook[self.sheet_name].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [str(col) if col is not None else f"Unnamed: {i}" for i, col in enumerate(header)]
+            offset = 0
+            batch: List[tuple] = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= chunksize:
+                    yield pd.DataFrame(batch, columns=columns, index=pd.RangeIndex(offset, offset + len(batch)))
+                    offset += len(batch)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=columns, index=pd.RangeIndex(offset, offset + len(batch)))
+        finally:
+            workbook.close()
+
+    def write_full(self, df: pd.DataFrame) -> None:
+        """
+        整表写入目标工作表。
+        工作簿已存在时以覆盖 (overlay) 方式写入，保留其它工作表和未被覆盖单元格的格式。
+        """
+        existing = self.exists()
+
+        def _write(tmp_path: str) -> None:
+            if existing:
+                # 在原工作簿的副本上覆盖写入，再整体替换
+                shutil.copy2(self.file_path, tmp_path)
+                writer = pd.ExcelWriter(
+                    tmp_path, engine="openpyxl", mode="a", if_sheet_exists="overlay",
+                    engine_kwargs={"keep_vba": self.keep_vba},
+                )
+            else:
+                writer = pd.ExcelWriter(tmp_path, engine="openpyxl")
+            with writer:
+                df.to_excel(writer, sheet_name=self.sheet_name, index=False)
+                _format_date_cells(writer.sheets[self.sheet_name], df)
+
+        atomic_write(self.file_path, _write, self.generations, self.logger)
+
+    def write_rows(self, df: pd.DataFrame, indexes: Iterable[Any], columns: List[str]) -> bool:
+        """
+        只把指定行、指定列的单元格写回工作簿。
+        工作簿结构与 DataFrame 不一致（缺少工作表/表头列，或行索引不是从 0 开始的连续整数）时
+        返回 False，由调用方改为整表写入。
+        """
+        if not self.exists():
+            return False
+
+        index = df.index
+        if not (isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1):
+            self.logger.debug("DataFrame 行索引与工作簿行号无法对应，需要整表写入。")
+            return False
+
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.file_path, keep_vba=self.keep_vba)
+        try:
+            if self.sheet_name not in workbook.sheetnames:
+                self.logger.debug(f"工作簿中不存在工作表 '{self.sheet_name}'，需要整表写入。")
+                return False
+            worksheet = workbook[self.sheet_name]
+
+            # 第一行为表头，建立 列名 -> 列号 的映射
+            header = {
+                str(cell.value): cell.column
+                for cell in worksheet[1]
+                if cell.value is not None
+            }
+            missing = [col for col in columns if str(col) not in header]
+            if missing:
+                self.logger.debug(f"工作簿表头缺少列 {missing}，需要整表写入。")
+                return False
+
+            for row_index in indexes:
+                # DataFrame 第 0 行对应 Excel 第 2 行（第 1 行为表头）
+                excel_row = int(row_index) + 2
+                for col in columns:
+                    value = to_python_value(df.at[row_index, col])
+                    cell = worksheet.cell(row=excel_row, column=header[str(col)], value=value)
+                    number_format = excel_date_format(value)
+                    if number_format:
+                        cell.number_format = number_format
+
+            atomic_write(self.file_path, workbook.save, self.generations, self.logger)
+            return True
+        finally:
+            workbook.close()
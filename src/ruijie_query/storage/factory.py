@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+存储后端选择
+按配置项 storage_backend 或文件扩展名创建对应的存储后端
+"""
+
+import os
+import logging
+from typing import Dict, Optional, Type
+
+from .base import StorageBackend
+from .excel_backend import ExcelBackend
+from .csv_backend import CsvBackend
+from .parquet_backend import ParquetBackend
+from .sqlite_backend import SqliteBackend
+
+BACKENDS: Dict[str, Type[StorageBackend]] = {
+    backend.name: backend
+    for backend in (ExcelBackend, CsvBackend, ParquetBackend, SqliteBackend)
+}
+
+
+def resolve_backend_name(file_path: str, backend_name: Optional[str] = None) -> str:
+    """返回后端名称：显式配置优先，'auto' 或未配置时按扩展名判断，无法识别时按 Excel 处理"""
+    if backend_name and backend_name.lower() != "auto":
+        name = backend_name.lower()
+        if name not in BACKENDS:
+            raise ValueError(
+                f"不支持的存储后端 '{backend_name}'，应该是: auto, {', '.join(BACKENDS)}"
+            )
+        return name
+
+    ext = os.path.splitext(file_path)[1].lower()
+    for name, backend in BACKENDS.items():
+        if ext in backend.extensions:
+            return name
+    return ExcelBackend.name
+
+
+def create_backend(
+    file_path: str,
+    sheet_name: str,
+    logger: Optional[logging.Logger] = None,
+    generations: int = 0,
+    backend_name: Optional[str] = None,
+) -> StorageBackend:
+    """创建存储后端实例"""
+    backend_cls = BACKENDS[resolve_backend_name(file_path, backend_name)]
+    return backend_cls(file_path, sheet_name, logger, generations=generations)
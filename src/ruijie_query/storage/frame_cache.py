@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+解析结果缓存 (需要 pyarrow)
+把解析好的数据表以 Feather (Arrow IPC) 格式保存在数据文件旁，并记录数据文件的指纹
+（大小、修改时间和内容哈希）；指纹一致时直接内存映射读取缓存，省去重新解析 Excel
+"""
+
+import hashlib
+import json
+import os
+import logging
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from .atomic import atomic_write
+
+# 可选依赖: pip install pyarrow
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.feather as feather  # type: ignore
+except ImportError:
+    pa = None  # type: ignore
+    feather = None  # type: ignore
+
+_FINGERPRINT_KEY = b"ruijie_query.fingerprint"
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_fingerprint(path: str) -> Dict[str, Any]:
+    """数据文件的指纹：大小、修改时间 (ns) 和 SHA-256 内容哈希"""
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+
+
+class FrameCache:
+    """数据文件的 Feather 缓存，保存在 <数据文件>.cache.feather"""
+
+    def __init__(self, file_path: str, logger: Optional[logging.Logger] = None):
+        self.file_path = file_path
+        self.path = f"{file_path}.cache.feather"
+        self.logger = logger or logging.getLogger(__name__)
+
+    @property
+    def available(self) -> bool:
+        """是否安装了 pyarrow"""
+        return pa is not None
+
+    def _read_fingerprint(self) -> Optional[Dict[str, Any]]:
+        with pa.memory_map(self.path, "r") as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+        raw = metadata.get(_FINGERPRINT_KEY)
+        return json.loads(raw) if raw else None
+
+    def load(self) -> Optional[pd.DataFrame]:
+        """
+        数据文件指纹与缓存一致时返回缓存的数据表，否则返回 None。
+        先比较大小和修改时间，二者一致时再校验内容哈希。
+        """
+        if not self.available or not os.path.exists(self.path) or not os.path.exists(self.file_path):
+            return None
+        try:
+            cached = self._read_fingerprint()
+            if cached is None:
+                return None
+            stat = os.stat(self.file_path)
+            if cached.get("size") != stat.st_size or cached.get("mtime_ns") != stat.st_mtime_ns:
+                self.logger.debug("数据文件的大小或修改时间已变化，缓存失效。")
+                return None
+            if cached.get("sha256") != file_fingerprint(self.file_path)["sha256"]:
+                self.logger.debug("数据文件内容已变化，缓存失效。")
+                return None
+            return feather.read_table(self.path, memory_map=True).to_pandas()
+        except Exception as e:
+            self.logger.warning(f"读取缓存 '{self.path}' 失败，将重新解析数据文件: {e}")
+            return None
+
+    def store(self, df: pd.DataFrame) -> bool:
+        """
+        按数据文件当前的指纹保存缓存。数据表无法转换为 Arrow 格式
+        （例如同一列中混有数字和文本）时删除旧缓存并返回 False。
+        """
+        if not self.available or not os.path.exists(self.file_path):
+            return False
+        try:
+            table = pa.Table.from_pandas(df)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, ValueError, TypeError) as e:
+            self.logger.debug(f"数据表无法缓存为 Feather 格式: {e}")
+            self.invalidate()
+            return False
+
+        fingerprint = json.dumps(file_fingerprint(self.file_path)).encode("utf-8")
+        metadata = dict(table.schema.metadata or {})
+        metadata[_FINGERPRINT_KEY] = fingerprint
+        table = table.replace_schema_metadata(metadata)
+        try:
+            # 不压缩，读取时可以直接内存映射
+            atomic_write(
+                self.path,
+                lambda tmp: feather.write_feather(table, tmp, compression="uncompressed"),
+                0,
+                self.logger,
+            )
+        except OSError as e:
+            self.logger.warning(f"写入缓存 '{self.path}' 失败: {e}")
+            return False
+        return True
+
+    def invalidate(self) -> None:
+        """删除缓存文件"""
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except OSError as e:
+            self.logger.warning(f"删除缓存 '{self.path}' 失败: {e}")
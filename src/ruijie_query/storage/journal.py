@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+检查点日志模块
+定期保存时只把自上次检查点以来变更的行追加到 sidecar 文件，
+最终保存时再统一合并回工作簿，使每次检查点的开销只与变更行数成正比
+"""
+
+import json
+import os
+import logging
+from typing import Any, Dict, Optional
+
+from ..utils.helpers import to_python_value
+
+
+class CheckpointJournal:
+    """追加写入的检查点日志，每行记录一个数据行的结果列快照"""
+
+    def __init__(self, path: str, logger: Optional[logging.Logger] = None):
+        self.path = path
+        self.logger = logger or logging.getLogger(__name__)
+
+    def exists(self) -> bool:
+        """日志文件是否存在"""
+        return os.path.exists(self.path)
+
+    def append(self, rows: Dict[Any, Dict[str, Any]]) -> int:
+        """追加一批行快照并 fsync 落盘，返回写入的行数"""
+        if not rows:
+            return 0
+
+        lines = []
+        for index, values in rows.items():
+            record = {
+                "index": to_python_value(index),
+                "values": {col: to_python_value(val) for col, val in values.items()},
+            }
+            lines.append(json.dumps(record, ensure_ascii=False, default=str))
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return len(lines)
+
+    def replay(self) -> Dict[Any, Dict[str, Any]]:
+        """
+        读取日志中的全部快照，同一行以最后一条记录为准。
+        程序崩溃时可能留下写了一半的尾行，这类无法解析的行会被跳过。
+        """
+        rows: Dict[Any, Dict[str, Any]] = {}
+        if not self.exists():
+            return rows
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    rows[record["index"]] = record["values"]
+                except (ValueError, KeyError) as e:
+                    self.logger.warning(f"检查点日志第 {line_no} 行无法解析，已跳过: {e}")
+        return rows
+
+    def clear(self) -> None:
+        """合并完成后删除日志文件"""
+        try:
+            if self.exists():
+                os.remove(self.path)
+        except OSError as e:
+            self.logger.warning(f"删除检查点日志 '{self.path}' 失败: {e}")
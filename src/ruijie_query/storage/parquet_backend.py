@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Parquet 存储后端 (需要 pyarrow)
+"""
+
+from typing import Iterator
+
+import pandas as pd
+
+from .base import StorageBackend
+from .atomic import atomic_write
+
+# 可选依赖: pip install pyarrow
+try:
+    import pyarrow.parquet as pq  # type: ignore
+except ImportError:
+    pq = None  # type: ignore
+
+
+def _require_pyarrow() -> None:
+    if pq is None:
+        raise ImportError("Parquet 存储需要 'pyarrow' 库，请运行 'pip install pyarrow'")
+
+
+class ParquetBackend(StorageBackend):
+    """
+    Parquet 文件读写。按 row group 流式读取；
+    Parquet 不支持原地更新，检查点由检查点日志增量记录，最终保存时原子整表重写。
+    """
+
+    extensions = (".parquet", ".pq")
+    name = "parquet"
+
+    def is_valid(self, path: str) -> bool:
+        if pq is None:
+            return True
+        try:
+            pq.read_metadata(path)
+            return True
+        except Exception:
+            return False
+
+    def read(self) -> pd.DataFrame:
+        _require_pyarrow()
+        return pd.read_parquet(self.file_path, engine="pyarrow")
+
+    def iter_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        _require_pyarrow()
+        parquet_file = pq.ParquetFile(self.file_path)
+        offset = 0
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            chunk = batch.to_pandas()
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+
+    def write_full(self, df: pd.DataFrame) -> None:
+        _require_pyarrow()
+        atomic_write(
+            self.file_path,
+            lambda tmp: df.to_parquet(tmp, index=False, engine="pyarrow"),
+            self.generations,
+            self.logger,
+        )
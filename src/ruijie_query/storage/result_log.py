@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+查询结果日志模块
+每个序列号的查询结果追加一行 JSON（含尝试次数、耗时和解析出的字段），
+写入开销与已处理序列号数无关，其它工具可以 `tail -f` 实时查看进度；
+compact 时再把每个序列号的最新结果合并回数据文件
+"""
+
+import json
+import os
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, IO, Optional
+
+from ..utils.helpers import to_python_value
+
+# 结果日志模式：off 不写日志；append 同时写数据文件和日志；only 只写日志，数据文件由 compact 生成
+RESULT_LOG_MODES = ("off", "append", "only")
+
+# 写缓冲大小，缓冲区满或检查点 sync 时才真正写入文件
+_BUFFER_SIZE = 64 * 1024
+
+
+class ResultLog:
+    """追加写入的查询结果日志，每行记录一个序列号的一次最终查询结果"""
+
+    def __init__(self, path: str, logger: Optional[logging.Logger] = None):
+        self.path = path
+        self.logger = logger or logging.getLogger(__name__)
+        self._file: Optional[IO[str]] = None
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        """日志文件是否存在"""
+        return os.path.exists(self.path)
+
+    def append(
+        self,
+        serial: Any,
+        index: Any,
+        values: Dict[str, Any],
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """追加一条结果记录（写入缓冲区，由 sync 负责落盘）"""
+        record = {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "serial": to_python_value(serial),
+            "index": to_python_value(index),
+            "status": to_python_value(values.get("查询状态")),
+        }
+        for key, value in (meta or {}).items():
+            record[key] = to_python_value(value)
+        record["values"] = {col: to_python_value(val) for col, val in values.items()}
+
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8", buffering=_BUFFER_SIZE)
+            self._file.write(line)
+
+    def sync(self) -> None:
+        """把缓冲区写入文件并 fsync 落盘"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """落盘并关闭文件"""
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            finally:
+                self._file.close()
+                self._file = None
+
+    def latest(self) -> Dict[Any, Dict[str, Any]]:
+        """
+        读取日志，返回每个序列号的最新记录。
+        程序崩溃时可能留下写了一半的尾行，这类无法解析的行会被跳过。
+        """
+        records: Dict[Any, Dict[str, Any]] = {}
+        if not self.exists():
+            return records
+
+        self.sync()
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    records[record["serial"]] = record
+                except (ValueError, KeyError, TypeError) as e:
+                    self.logger.warning(f"结果日志第 {line_no} 行无法解析，已跳过: {e}")
+        return records
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite 存储后端
+数据保存在数据库中与工作表同名的表里，检查点可直接按 rowid 原地更新变更的行
+"""
+
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from ..utils.helpers import to_python_value
+from .base import StorageBackend
+
+ROWID_COLUMN = "__rowid__"
+
+
+def _quote(identifier: str) -> str:
+    """SQLite 标识符转义"""
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _sql_value(value: Any) -> Any:
+    value = to_python_value(value)
+    if isinstance(value, datetime) and value.time() == datetime.min.time():
+        # 只有日期部分的值按 YYYY-MM-DD 保存
+        return value.date().isoformat()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _dates_as_text(df: pd.DataFrame) -> pd.DataFrame:
+    """日期列按 _sql_value 的格式转换为文本，与按行写入的值保持一致"""
+    dates = [col for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col].dtype)]
+    if not dates:
+        return df
+    df = df.copy(deep=False)
+    for col in dates:
+        df[col] = df[col].map(_sql_value).astype(object)
+    return df
+
+
+class SqliteBackend(StorageBackend):
+    """
+    SQLite 数据库读写。写入由 SQLite 事务保证原子性，不使用文件级备份代。
+    """
+
+    extensions = (".db", ".sqlite", ".sqlite3")
+    name = "sqlite"
+    supports_append = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._rowids: Optional[List[int]] = None  # DataFrame 行位置 -> 表中 rowid
+
+    @property
+    def table(self) -> str:
+        return _quote(self.sheet_name)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.file_path)
+
+    def exists(self) -> bool:
+        if not os.path.exists(self.file_path):
+            return False
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (self.sheet_name,),
+            ).fetchone()
+        return row is not None
+
+    def _select_sql(self) -> str:
+        return f"SELECT rowid AS {ROWID_COLUMN}, * FROM {self.table} ORDER BY rowid"
+
+    def read(self) -> pd.DataFrame:
+        if not os.path.exists(self.file_path):
+            raise FileNotFoundError(self.file_path)
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(self._select_sql(), conn)
+        self._rowids = df.pop(ROWID_COLUMN).tolist()
+        return df
+
+    def iter_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        if not os.path.exists(self.file_path):
+            raise FileNotFoundError(self.file_path)
+        with closing(self._connect()) as conn:
+            offset = 0
+            for chunk in pd.read_sql_query(self._select_sql(), conn, chunksize=chunksize):
+                chunk = chunk.drop(columns=[ROWID_COLUMN])
+                chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                offset += len(chunk)
+                yield chunk
+
+    def write_full(self, df: pd.DataFrame) -> None:
+        """
+        整表写入。表已存在时在单个事务内清空并重新插入数据，保留用户定义的列类型、索引、约束和触发器；
+        读取时已有的行沿用原 rowid，新增的行排在其后，检查点和分块位置标记仍然有效。
+        """
+        if not self.exists():
+            with closing(self._connect()) as conn:
+                with conn:
+                    _dates_as_text(df).to_sql(self.sheet_name, conn, index=False)
+            # 新建的表 rowid 按插入顺序从 1 开始
+            self._rowids = list(range(1, len(df) + 1))
+            return
+
+        columns = [str(col) for col in df.columns]
+        with closing(self._connect()) as conn:
+            with conn:
+                table_info = list(conn.execute(f"PRAGMA table_info({self.table})"))
+                existing = {row[1] for row in table_info}
+                for col in columns:
+                    if col not in existing:
+                        conn.execute(f"ALTER TABLE {self.table} ADD COLUMN {_quote(col)}")
+                # INTEGER PRIMARY KEY 列就是 rowid 的别名，此时由该列的值决定 rowid
+                pk_columns = [row for row in table_info if row[5]]
+                rowid_alias = len(pk_columns) == 1 and str(pk_columns[0][2]).upper() == "INTEGER"
+                keep_rowids = self._rowids if (self._rowids is not None and not rowid_alias) else []
+
+                conn.execute(f"DELETE FROM {self.table}")
+                column_sql = ", ".join(_quote(col) for col in columns)
+                placeholders = ", ".join("?" for _ in columns)
+                conn.executemany(
+                    f"INSERT INTO {self.table} (rowid, {column_sql}) VALUES (?, {placeholders})",
+                    (
+                        [keep_rowids[position] if position < len(keep_rowids) else None]
+                        + [_sql_value(value) for value in row]
+                        for position, row in enumerate(df.itertuples(index=False, name=None))
+                    ),
+                )
+                self._rowids = [row[0] for row in conn.execute(f"SELECT rowid FROM {self.table} ORDER BY rowid")]
+
+    def write_rows(self, df: pd.DataFrame, indexes: Iterable[Any], columns: List[str]) -> bool:
+        index = df.index
+        if self._rowids is None or not self.exists():
+            return False
+        if not (isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1):
+            return False
+
+        indexes = list(indexes)
+        if any(int(i) >= len(self._rowids) for i in indexes):
+            # 出现了读取之后新增的行，需要整表写入
+            return False
+
+        with closing(self._connect()) as conn:
+            with conn:
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")}
+                for col in columns:
+                    if str(col) not in existing:
+                        conn.execute(f"ALTER TABLE {self.table} ADD COLUMN {_quote(col)}")
+
+                assignments = ", ".join(f"{_quote(col)} = ?" for col in columns)
+                sql = f"UPDATE {self.table} SET {assignments} WHERE rowid = ?"
+                conn.executemany(
+                    sql,
+                    (
+                        [_sql_value(df.at[i, col]) for col in columns] + [self._rowids[int(i)]]
+                        for i in indexes
+                    ),
+                )
+        return True
+
+    def append(self, df: pd.DataFrame) -> None:
+        with closing(self._connect()) as conn:
+            with conn:
+                if self.exists():
+                    # 追加的数据可能带有表中还没有的列
+                    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")}
+                    for col in df.columns:
+                        if str(col) not in existing:
+                            conn.execute(f"ALTER TABLE {self.table} ADD COLUMN {_quote(col)}")
+                df.to_sql(self.sheet_name, conn, if_exists="append", index=False)
+        self._rowids = None
+
+    def append_marker(self) -> int:
+        """SQLite 以最大 rowid 作为位置标记"""
+        if not self.exists():
+            return 0
+        with closing(self._connect()) as conn:
+            row = conn.execute(f"SELECT MAX(rowid) FROM {self.table}").fetchone()
+        return int(row[0] or 0)
+
+    def truncate_to(self, marker: int) -> None:
+        if not self.exists():
+            return
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.execute(f"DELETE FROM {self.table} WHERE rowid > ?", (marker,))
+        self._rowids = None
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+流式导出 xlsx
+逐块、逐行写出结果，不在内存中构建整个工作簿对象模型；优先使用 xlsxwriter 的
+constant_memory 模式，未安装时使用 openpyxl 的 write_only 模式。
+超过 Excel 单表行数上限时自动拆分到多个工作表
+"""
+
+import logging
+import unicodedata
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from ..utils.helpers import excel_date_format, to_python_value
+from .atomic import atomic_write
+
+# 可选依赖: pip install xlsxwriter
+try:
+    import xlsxwriter  # type: ignore
+except ImportError:
+    xlsxwriter = None  # type: ignore
+
+# Excel 单个工作表的最大行数（含表头）
+EXCEL_MAX_ROWS = 1048576
+# 工作表名称的最大长度
+_SHEET_NAME_MAX = 31
+_MIN_COLUMN_WIDTH = 8
+_MAX_COLUMN_WIDTH = 60
+# 查询状态为“成功”的单元格使用绿色字体，其它非空状态使用红色字体
+_SUCCESS_STATUS = "成功"
+_SUCCESS_COLOR = "006100"
+_FAILURE_COLOR = "9C0006"
+
+
+def _display_width(value: Any) -> int:
+    """单元格文本的显示宽度，全角字符（中文等）按 2 个字符计算"""
+    text = str(value)
+    return sum(2 if unicodedata.east_asian_width(ch) in ("W", "F") else 1 for ch in text)
+
+
+def column_widths(columns: List[str], sample: pd.DataFrame) -> List[int]:
+    """根据表头和样本数据块估算列宽"""
+    widths = []
+    for col in columns:
+        width = _display_width(col)
+        if col in sample.columns and len(sample):
+            values = sample[col].dropna()
+            if len(values):
+                width = max(width, int(values.astype(str).map(_display_width).max()))
+        widths.append(min(max(width + 2, _MIN_COLUMN_WIDTH), _MAX_COLUMN_WIDTH))
+    return widths
+
+
+def split_sheet_name(base: str, part: int) -> str:
+    """第 part 个工作表的名称：第 1 个为 base，之后为 base_2、base_3…（不超过 31 个字符）"""
+    if part == 1:
+        return base[:_SHEET_NAME_MAX]
+    suffix = f"_{part}"
+    return base[:_SHEET_NAME_MAX - len(suffix)] + suffix
+
+
+def _iter_rows(df: pd.DataFrame, columns: List[str]) -> Iterator[List[Any]]:
+    """按列顺序逐行返回 Python 原生值（日期为 datetime），缺失值为 None"""
+    values = df.reindex(columns=columns).astype(object)
+    values = values.where(values.notna(), None)
+    for row in values.itertuples(index=False, name=None):
+        yield [to_python_value(value) for value in row]
+
+
+class _XlsxWriterSheets:
+    """基于 xlsxwriter constant_memory 模式的写出器：每行写出后立即刷到临时文件"""
+
+    def __init__(self, path: str):
+        self.workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+        self.header_format = self.workbook.add_format({"bold": True})
+        self.status_formats = {
+            True: self.workbook.add_format({"font_color": f"#{_SUCCESS_COLOR}"}),
+            False: self.workbook.add_format({"font_color": f"#{_FAILURE_COLOR}"}),
+        }
+        self.date_formats: Dict[str, Any] = {}
+        self.sheet = None
+
+    def _date_format(self, number_format: str) -> Any:
+        if number_format not in self.date_formats:
+            self.date_formats[number_format] = self.workbook.add_format({"num_format": number_format})
+        return self.date_formats[number_format]
+
+    def add_sheet(self, name: str, columns: List[str], widths: List[int]) -> None:
+        self.sheet = self.workbook.add_worksheet(name)
+        for i, width in enumerate(widths):
+            self.sheet.set_column(i, i, width)
+        self.sheet.write_row(0, 0, columns, self.header_format)
+        self.sheet.freeze_panes(1, 0)
+
+    def write_row(self, row_number: int, row: List[Any], status_pos: Optional[int]) -> None:
+        for col, value in enumerate(row):
+            if value is None:
+                continue
+            number_format = excel_date_format(value)
+            if col == status_pos:
+                self.sheet.write(row_number, col, value, self.status_formats[value == _SUCCESS_STATUS])
+            elif number_format:
+                # 没有数字格式的日期单元格在 Excel 中显示为序列号
+                self.sheet.write_datetime(row_number, col, value, self._date_format(number_format))
+            else:
+                self.sheet.write(row_number, col, value)
+
+    def close(self) -> None:
+        self.workbook.close()
+
+
+class _OpenpyxlSheets:
+    """基于 openpyxl write_only 模式的写出器：行追加后不再保留单元格对象"""
+
+    def __init__(self, path: str):
+        from openpyxl import Workbook
+        from openpyxl.styles import Font
+
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.header_font = Font(bold=True)
+        self.status_fonts = {True: Font(color=_SUCCESS_COLOR), False: Font(color=_FAILURE_COLOR)}
+        self.sheet = None
+
+    def _cell(self, value: Any, font: Any) -> Any:
+        from openpyxl.cell import WriteOnlyCell
+
+        cell = WriteOnlyCell(self.sheet, value=value)
+        cell.font = font
+        return cell
+
+    def add_sheet(self, name: str, columns: List[str], widths: List[int]) -> None:
+        from openpyxl.utils import get_column_letter
+
+        self.sheet = self.workbook.create_sheet(name)
+        # write_only 模式下列宽和冻结窗格必须在写入第一行之前设置
+        for i, width in enumerate(widths, start=1):
+            self.sheet.column_dimensions[get_column_letter(i)].width = width
+        self.sheet.freeze_panes = "A2"
+        self.sheet.append([self._cell(col, self.header_font) for col in columns])
+
+    def write_row(self, row_number: int, row: List[Any], status_pos: Optional[int]) -> None:
+        from openpyxl.cell import WriteOnlyCell
+
+        if status_pos is not None and row[status_pos] is not None:
+            status = row[status_pos]
+            row[status_pos] = self._cell(status, self.status_fonts[status == _SUCCESS_STATUS])
+        for col, value in enumerate(row):
+            number_format = excel_date_format(value)
+            if number_format:
+                cell = WriteOnlyCell(self.sheet, value=value)
+                cell.number_format = number_format
+                row[col] = cell
+        self.sheet.append(row)
+
+    def close(self) -> None:
+        self.workbook.save(self.path)
+
+
+def export_xlsx(
+    chunks: Iterable[pd.DataFrame],
+    output_path: str,
+    sheet_name: str = "Sheet1",
+    status_column: Optional[str] = "查询状态",
+    max_rows: int = EXCEL_MAX_ROWS,
+    logger: Optional[logging.Logger] = None,
+) -> Dict[str, Any]:
+    """
+    把按块提供的数据流式写出为 xlsx 文件（原子写入）。
+    列顺序和列宽以第一个数据块为准；status_column 列的单元格按查询是否成功着色；
+    单个工作表写满 max_rows 行（含表头）后续写到 <sheet_name>_2、<sheet_name>_3…
+    返回 {"rows": 写出的数据行数, "sheets": 工作表名称列表, "engine": 使用的写出引擎}。
+    """
+    logger = logger or logging.getLogger(__name__)
+    if max_rows < 2:
+        raise ValueError("max_rows 至少为 2（表头加一行数据）")
+    engine = "xlsxwriter" if xlsxwriter is not None else "openpyxl"
+    summary: Dict[str, Any] = {"rows": 0, "sheets": [], "engine": engine}
+
+    def _write(tmp_path: str) -> None:
+        sheets = _XlsxWriterSheets(tmp_path) if xlsxwriter is not None else _OpenpyxlSheets(tmp_path)
+        columns: List[str] = []
+        widths: List[int] = []
+        status_pos: Optional[int] = None
+        row_number = max_rows  # 触发写入第一行数据前新建工作表
+        try:
+            for chunk in chunks:
+                if not columns:
+                    columns = [str(col) for col in chunk.columns]
+                    widths = column_widths(columns, chunk)
+                    status_pos = columns.index(status_column) if status_column in columns else None
+                for row in _iter_rows(chunk, columns):
+                    if row_number >= max_rows:
+                        name = split_sheet_name(sheet_name, len(summary["sheets"]) + 1)
+                        sheets.add_sheet(name, columns, widths)
+                        summary["sheets"].append(name)
+                        row_number = 1
+                    sheets.write_row(row_number, row, status_pos)
+                    row_number += 1
+                    summary["rows"] += 1
+            if not summary["sheets"]:
+                # 没有数据时仍输出只含表头的工作表
+                name = split_sheet_name(sheet_name, 1)
+                sheets.add_sheet(name, columns, widths)
+                summary["sheets"].append(name)
+        except BaseException:
+            # 临时文件由 atomic_write 清理，这里只释放写出器占用的资源
+            try:
+                sheets.close()
+            except Exception:
+                pass
+            raise
+        sheets.close()
+
+    atomic_write(output_path, _write, 0, logger)
+    if len(summary["sheets"]) > 1:
+        logger.info(f"导出数据超过单个工作表的行数上限，已拆分为 {len(summary['sheets'])} 个工作表。")
+    logger.info(f"已使用 {engine} 流式导出 {summary['rows']} 行到 '{output_path}'。")
+    return summary
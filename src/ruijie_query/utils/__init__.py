@@ -1,8 +1,10 @@
-from .helpers import setup_logger, validate_config, format_file_size, safe_get
+from .helpers import setup_logger, validate_config, format_file_size, safe_get, to_python_value, excel_date_format
 
 __all__ = [
     "setup_logger",
     "validate_config",
     "format_file_size",
     "safe_get",
+    "to_python_value",
+    "excel_date_format",
 ]
\ No newline at end of file
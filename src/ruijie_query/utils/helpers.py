@@ -4,6 +4,7 @@
 """
 
 import logging
+from datetime import datetime
 from typing import Any, Dict, Optional
 
 
@@ -43,4 +44,35 @@ def safe_get(dictionary: dict, key: str, default: Any = None) -> Any:
     try:
         return dictionary.get(key, default)
     except (AttributeError, TypeError):
-        return default
\ No newline at end of file
+        return default
+
+def to_python_value(value: Any) -> Any:
+    """将 pandas/numpy 标量转换为可写入 Excel/JSON 的 Python 原生值，缺失值统一为 None"""
+    if value is None:
+        return None
+    try:
+        import pandas as pd
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        # 列表等非标量值无法判断缺失，原样返回
+        return value
+    if hasattr(value, "to_pydatetime"):
+        # pandas Timestamp 转为 datetime，openpyxl 可直接写入
+        return value.to_pydatetime()
+    if hasattr(value, "item"):
+        # numpy 标量
+        return value.item()
+    return value
+
+
+def excel_date_format(value: Any) -> Optional[str]:
+    """
+    日期时间值写入 Excel 时使用的数字格式：时间为零点的只显示日期，否则显示日期和时间；
+    不是日期时间的值返回 None
+    """
+    if not isinstance(value, datetime):
+        return None
+    if value.time() == datetime.min.time():
+        return "yyyy-mm-dd"
+    return "yyyy-mm-dd hh:mm:ss"
@@ -490,4 +490,78 @@ class TestRuijieQueryApp:
                 mock_dm_instance.load_data.assert_called_once()
                 mock_webdriver_instance.initialize_driver.assert_called_once()
                 # 验证只有未查询的序列号被处理
-                assert mock_page.query_single_device.call_count == 2
\ No newline at end of file
+                assert mock_page.query_single_device.call_count == 2
+
+class TestRuijieQueryAppWithDataFile:
+    """使用真实数据文件、不启动浏览器的应用流程测试"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.excel_file = os.path.join(self.temp_dir, 'devices.xlsx')
+        pd.DataFrame({
+            'Serial Number': ['SN001', 'SN002'],
+            '保修结束时间': ['2020-01-01', '2020-01-01'],
+            '保修剩余天数': ['100', '100'],
+            '查询状态': ['成功', '成功'],
+        }).to_excel(self.excel_file, sheet_name='Sheet1', index=False)
+
+        self.config_manager = MagicMock(spec=ConfigManager)
+        self.config_manager.get_general_config.return_value = {
+            'excel_file_path': self.excel_file,
+            'sheet_name': 'Sheet1',
+            'sn_column_name': 'Serial Number',
+            'chrome_driver_path': None,
+            'background_save': False,
+            'read_cache': False,
+            'derive_warranty_fields': True,
+        }
+        self.config_manager.get_captcha_config.return_value = {'enable_ddddocr': True, 'enable_ai': False}
+        self.config_manager.get_ai_config.return_value = {'channels': [], 'retry_attempts': 1, 'retry_delay': 0}
+        self.config_manager.get_result_columns.return_value = {
+            '保修结束时间': '保修结束时间',
+            '保修剩余天数': '保修剩余天数',
+            '查询状态': '查询状态',
+        }
+        self.config_manager.get_logging_config.return_value = {
+            'log_level': 'INFO', 'log_to_console': False, 'log_file': None,
+        }
+        self.app = RuijieQueryApp(self.config_manager)
+        self.app.logger = MagicMock()
+        self.app.data_manager.logger = self.app.logger
+
+    def teardown_method(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _assert_derived_fields_are_current(self, path):
+        saved = pd.read_excel(path, sheet_name='Sheet1')
+        expected_days = (pd.Timestamp('2020-01-01') - pd.Timestamp.today().normalize()).days
+        assert saved['保修剩余天数'].tolist() == [expected_days, expected_days]
+        assert saved['到期分类'].tolist() == ['已过保', '已过保']
+
+    def test_run_refreshes_derived_fields_when_everything_is_queried(self):
+        """所有序列号都已查询时不启动浏览器，但仍按当天日期重新计算并保存保修剩余天数和到期分类"""
+        self.app.webdriver_manager = MagicMock()
+        self.app.run()
+
+        self.app.webdriver_manager.initialize_driver.assert_not_called()
+        self._assert_derived_fields_are_current(self.excel_file)
+
+    def test_export_results_includes_current_derived_fields(self):
+        """导出的结果包含按当天日期重新计算的保修剩余天数和到期分类"""
+        output = os.path.join(self.temp_dir, 'export.xlsx')
+        assert self.app.export_results(output) == 1
+        self._assert_derived_fields_are_current(output)
+
+    def test_check_captcha_solvers_lazy_validation(self):
+        """测试延迟验证模式下跳过启动时的渠道测试，未验证的渠道仍算作可用的识别方式"""
+        self.app.ai_config['channel_validation'] = 'lazy'
+        self.app.captcha_config['enable_ddddocr'] = False
+        channels = [{'api_type': 'openai', 'api_key': 'key1', 'model_name': 'gpt-4o'}]
+        self.app.captcha_solver.channels = list(channels)
+        self.app.captcha_solver.test_channels_availability = MagicMock()
+
+        with patch('ruijie_query.captcha.captcha_solver.openai', MagicMock()):
+            assert self.app._check_captcha_solvers() == channels
+        self.app.captcha_solver.test_channels_availability.assert_not_called()
+        assert len(self.app.captcha_solver._unverified) == 1
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+验证码提交反馈单元测试
+"""
+import json
+
+import sys
+sys.path.insert(0, 'src')
+
+from ruijie_query.captcha.feedback import CORRECTION_MIN_SUPPORT, FeedbackStore, image_hash
+
+
+def _teach(store, count, candidate='o123', truth='0123', solver='ddddocr'):
+    for i in range(count):
+        image = image_hash(f'image-{i}'.encode())
+        store.add_candidate(image, solver, candidate)
+        store.record(image, truth, solver, accepted=True)
+
+
+class TestFeedbackStore:
+    """FeedbackStore 的单元测试"""
+
+    def test_learns_confusion_from_accepted_answers(self):
+        store = FeedbackStore()
+        _teach(store, CORRECTION_MIN_SUPPORT - 1)
+        assert store.correct('ddddocr', 'o999') == 'o999'
+
+        _teach(store, 1)
+        assert store.corrections('ddddocr') == {'o': '0'}
+        assert store.correct('ddddocr', 'o999') == '0999'
+        # 混淆统计按识别器区分
+        assert store.correct('ai', 'o999') == 'o999'
+
+    def test_rejected_answers_do_not_teach(self):
+        store = FeedbackStore()
+        for i in range(CORRECTION_MIN_SUPPORT * 2):
+            image = image_hash(f'image-{i}'.encode())
+            store.add_candidate(image, 'ddddocr', 'o123')
+            store.record(image, '0123', 'ai', accepted=False)
+        assert store.corrections('ddddocr') == {}
+        assert store.acceptance_rate == 0.0
+
+    def test_mostly_correct_character_is_not_corrected(self):
+        store = FeedbackStore()
+        _teach(store, CORRECTION_MIN_SUPPORT, candidate='o123', truth='0123')
+        _teach(store, CORRECTION_MIN_SUPPORT + 1, candidate='o456', truth='o456')
+        assert store.corrections('ddddocr') == {}
+
+    def test_persists_and_reloads(self, tmp_path):
+        path = str(tmp_path / 'feedback.jsonl')
+        store = FeedbackStore(path)
+        _teach(store, CORRECTION_MIN_SUPPORT)
+        store.record(image_hash(b'other'), 'abcd', 'ai', accepted=False)
+
+        with open(path, encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        assert len(lines) == CORRECTION_MIN_SUPPORT + 1
+        assert lines[0]['candidates'] == [['ddddocr', 'o123']]
+        assert lines[-1]['accepted'] is False
+
+        # 崩溃时写了一半的行被跳过
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"image": "x", "answ')
+        reloaded = FeedbackStore(path)
+        assert reloaded.submitted == CORRECTION_MIN_SUPPORT + 1
+        assert reloaded.correct('ddddocr', 'o1') == '01'
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+验证码图片预处理单元测试
+"""
+import io
+
+import pytest
+
+import sys
+sys.path.insert(0, 'src')
+
+from ruijie_query.captcha.preprocess import VARIANT_NAMES, make_variants, vote
+
+
+class TestVote:
+    """vote 的单元测试"""
+
+    def test_majority_wins(self):
+        assert vote(['ab12', 'ab1z', 'ab12']) == ('ab12', 2)
+
+    def test_tie_prefers_earlier_variant(self):
+        assert vote(['wxyz', None, 'wxy2']) == ('wxyz', 1)
+
+    def test_no_answers(self):
+        assert vote([None, '']) == (None, 0)
+
+
+class TestMakeVariants:
+    """make_variants 的单元测试"""
+
+    def test_undecodable_image_returns_original_only(self):
+        assert make_variants(b'not an image', 6) == [('original', b'not an image')]
+
+    def test_generates_requested_variants(self):
+        Image = pytest.importorskip('PIL.Image')
+        img = Image.new('RGB', (60, 20), 'white')
+        for x in range(10, 50):
+            img.putpixel((x, 10), (0, 0, 0))
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+
+        variants = make_variants(buffer.getvalue(), len(VARIANT_NAMES))
+        assert [name for name, _ in variants] == list(VARIANT_NAMES)
+        assert variants[0][1] == buffer.getvalue()
+        sizes = {name: Image.open(io.BytesIO(data)).size for name, data in variants}
+        assert sizes['scale'] == (120, 40)
+        assert sizes['crop'][0] < 60
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+验证码格式约束单元测试
+"""
+import pytest
+
+import sys
+sys.path.insert(0, 'src')
+
+from ruijie_query.captcha.profile import (
+    LEARN_MIN_SAMPLES,
+    CaptchaProfile,
+    parse_charset,
+    parse_length,
+)
+
+
+class TestParse:
+    """配置解析的单元测试"""
+
+    def test_parse_length(self):
+        assert parse_length('') is None
+        assert parse_length('4') == (4, 4)
+        assert parse_length(' 4-6 ') == (4, 6)
+        for invalid in ['0', '6-4', 'abc', '4-']:
+            with pytest.raises(ValueError):
+                parse_length(invalid)
+
+    def test_parse_charset(self):
+        assert parse_charset('') is None
+        assert parse_charset('digits') == '0123456789'
+        assert parse_charset('fedcba') == 'abcdef'
+        with pytest.raises(ValueError):
+            parse_charset('a-z')
+
+
+class TestCaptchaProfile:
+    """CaptchaProfile 的单元测试"""
+
+    def test_unconstrained_profile_accepts_any_alnum(self):
+        profile = CaptchaProfile()
+        assert profile.fit(' Ab-12 ') == 'Ab12'
+        assert profile.fit('!!') is None
+        assert profile.ocr_ranges() is None
+
+    def test_configured_length_and_charset(self):
+        profile = CaptchaProfile(length=(4, 4), charset='0123456789')
+        assert profile.fit('12345') is None
+        assert profile.fit('12a4') is None
+        assert profile.fit('1234') == '1234'
+        assert profile.ocr_ranges() == '0123456789'
+
+    def test_confusable_glyphs_are_mapped_into_charset(self):
+        digits = CaptchaProfile(charset='0123456789')
+        assert digits.fit('o1lS') == '0115'
+        letters = CaptchaProfile(charset='abcdefghijklmnopqrstuvwxyz')
+        assert letters.fit('g00d') == 'good'
+        upper = CaptchaProfile(charset='ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+        assert upper.fit('abcd') == 'ABCD'
+
+    def test_case_rule(self):
+        profile = CaptchaProfile(charset=parse_charset('alnum'), case='upper')
+        assert profile.charset == '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+        assert profile.fit('aB3d') == 'AB3D'
+        # ddddocr 的输出范围不区分大小写
+        assert 'a' in profile.ocr_ranges() and 'A' in profile.ocr_ranges()
+
+    def test_learns_from_accepted_answers(self, tmp_path):
+        path = str(tmp_path / 'profile.json')
+        profile = CaptchaProfile(path=path)
+        for i in range(LEARN_MIN_SAMPLES - 1):
+            assert profile.observe(f'{i % 10}23{i % 7}') is False
+        assert profile.length_range is None
+        assert profile.observe('4567') is True
+
+        assert profile.length_range == (4, 4)
+        assert profile.charset == '0123456789'
+        assert profile.fit('12345') is None
+        assert profile.fit('12o4') == '1204'
+
+        # 学习结果持久化，重新加载后直接生效
+        reloaded = CaptchaProfile(path=path)
+        assert reloaded.samples == LEARN_MIN_SAMPLES
+        assert reloaded.length_range == (4, 4)
+
+    def test_configured_values_take_precedence_over_learned(self):
+        profile = CaptchaProfile(length=(4, 6))
+        for _ in range(LEARN_MIN_SAMPLES):
+            profile.observe('abcd')
+        assert profile.length_range == (4, 6)
+        assert profile.charset == 'abcdefghijklmnopqrstuvwxyz'
+
+    def test_corrupt_profile_file_is_ignored(self, tmp_path):
+        path = tmp_path / 'profile.json'
+        path.write_text('{not json', encoding='utf-8')
+        profile = CaptchaProfile(path=str(path))
+        assert profile.samples == 0
+
+    def test_from_config_ignores_invalid_values(self):
+        profile = CaptchaProfile.from_config({'length': 'x', 'charset': 'digits', 'case': 'bogus'})
+        assert profile.length_range is None
+        assert profile.charset == '0123456789'
+        assert profile.case == 'preserve'
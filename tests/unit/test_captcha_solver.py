@@ -3,6 +3,8 @@
 验证码识别模块单元测试
 """
 import base64
+import json
+import threading
 import time
 from unittest.mock import patch, MagicMock, Mock
 import pytest
@@ -11,6 +13,7 @@ import sys
 sys.path.insert(0, 'src')
 
 from ruijie_query.captcha.captcha_solver import CaptchaSolver
+from ruijie_query.config.constants import ConfigDefaults
 
 
 class TestCaptchaSolver:
@@ -138,7 +141,8 @@ class TestCaptchaSolver:
             result = solver._solve_with_ddddocr(test_image_data)
 
             assert result == 'abcd1234'  # 应该被转为小写并清理
-            mock_instance.classification.assert_called_once_with(test_image_data)
+            mock_instance.classification.assert_called_once()
+            assert mock_instance.classification.call_args[0][0] == test_image_data
 
     def test_solve_with_ddddocr_failure(self):
         """测试ddddocr识别失败"""
@@ -473,4 +477,873 @@ class TestCaptchaSolver:
             result = solver.solve_captcha(b'test_image')
 
             assert result == 'final123'  # 应该成功并清理
-            assert mock_instance.classification.call_count == 3
\ No newline at end of file
+            assert mock_instance.classification.call_count == 3
+
+class TestCaptchaRace:
+    """竞速/共识识别策略的单元测试"""
+
+    def setup_method(self):
+        self.logger = MagicMock()
+        self.channels = [
+            {'api_type': 'openai', 'api_key': 'key1', 'model_name': 'gpt-4o'},
+            {'api_type': 'openai', 'api_key': 'key2', 'model_name': 'gpt-4o-mini'},
+        ]
+
+    def _make_solver(self, strategy, ddddocr_answer, ddddocr_delay=0.0):
+        solver = CaptchaSolver(
+            captcha_config={'enable_ddddocr': False, 'enable_ai': True, 'solve_strategy': strategy},
+            ai_settings={'retry_attempts': 1, 'retry_delay': 0},
+            channels=self.channels,
+            logger=self.logger,
+        )
+        # 不依赖真实的 ddddocr 库
+        solver.captcha_config['enable_ddddocr'] = True
+        solver.ddddocr_enabled_internal = True
+        solver.ocr = MagicMock()
+
+        def classification(image, probability=False):
+            time.sleep(ddddocr_delay)
+            return ddddocr_answer
+
+        solver.ocr.classification.side_effect = classification
+        solver.captcha_config['ddddocr_max_attempts'] = 1
+        # 构造 CaptchaSolver 时会重新导入 AI 库，构造之后再模拟 openai 已安装
+        self.openai_patcher = patch('ruijie_query.captcha.captcha_solver.openai', MagicMock())
+        self.openai_patcher.start()
+        return solver
+
+    def teardown_method(self):
+        if getattr(self, 'openai_patcher', None):
+            self.openai_patcher.stop()
+
+    def _channel_answers(self, answers, delays, cancelled=None):
+        def solve(channel_index, channel_config, image, cancel_event=None):
+            if cancel_event.wait(delays[channel_index]):
+                if cancelled is not None:
+                    cancelled.append(channel_index)
+                return None
+            return answers[channel_index]
+        return solve
+
+    def test_race_fastest_solver_wins(self):
+        solver = self._make_solver('race', 'abcd', ddddocr_delay=0.5)
+        solver._solve_with_channel = self._channel_answers(['WXYZ', None], [0.0, 0.0])
+
+        start = time.perf_counter()
+        assert solver.solve_captcha(b'image') == 'WXYZ'
+        assert time.perf_counter() - start < 0.4
+
+    def test_race_cancels_losing_channel(self):
+        solver = self._make_solver('race', 'ab12')
+        cancelled = []
+        solver._solve_with_channel = self._channel_answers(['WXYZ', None], [5.0, 5.0], cancelled)
+
+        assert solver.solve_captcha(b'image') == 'ab12'
+        deadline = time.time() + 2
+        while not cancelled and time.time() < deadline:
+            time.sleep(0.01)
+        assert cancelled == [0]
+
+    def test_ddddocr_does_not_queue_behind_stuck_ai_calls(self):
+        from ruijie_query.captcha.captcha_solver import RACE_MAX_WORKERS
+
+        solver = self._make_solver('race', 'ab12')
+        release = threading.Event()
+        # 之前竞速中落败、仍在等待响应的 AI 调用占满了 AI 线程池
+        for _ in range(RACE_MAX_WORKERS):
+            solver._get_executor().submit(release.wait, 5)
+        solver._solve_with_channel = self._channel_answers(['WXYZ', None], [5.0, 5.0])
+        try:
+            start = time.perf_counter()
+            assert solver.solve_captcha(b'image') == 'ab12'
+            assert time.perf_counter() - start < 1
+        finally:
+            release.set()
+            solver.close()
+
+    def test_consensus_requires_two_agreeing_answers(self):
+        solver = self._make_solver('consensus', 'abcd', ddddocr_delay=0.1)
+        solver._solve_with_channel = self._channel_answers(['ABCD', 'zzzz'], [0.3, 0.0])
+
+        assert solver.solve_captcha(b'image') == 'ABCD'
+
+    def test_consensus_without_agreement_uses_first_answer(self):
+        solver = self._make_solver('consensus', 'abcd', ddddocr_delay=0.2)
+        solver._solve_with_channel = self._channel_answers(['efgh', 'ijkl'], [0.0, 0.1])
+
+        assert solver.solve_captcha(b'image') == 'efgh'
+
+
+class TestDdddocrVariants:
+    """ddddocr 预处理变体投票的单元测试"""
+
+    def _make_solver(self, answers):
+        solver = CaptchaSolver(
+            captcha_config={'enable_ddddocr': False, 'enable_ai': False, 'ddddocr_max_attempts': 3},
+            ai_settings={},
+            channels=[],
+            logger=MagicMock(),
+        )
+        solver.ddddocr_enabled_internal = True
+        solver.ocr = MagicMock()
+        solver.ocr.classification.side_effect = lambda image, probability=False: answers[image]
+        return solver
+
+    def test_votes_across_variants(self):
+        variants = [('original', b'o'), ('grayscale', b'g'), ('threshold', b't')]
+        solver = self._make_solver({b'o': 'AB1Z', b'g': 'ab12', b't': 'AB12'})
+        with patch('ruijie_query.captcha.captcha_solver.make_variants', return_value=variants):
+            assert solver._solve_with_ddddocr(b'image') == 'ab12'
+        assert solver.ocr.classification.call_count == 3
+
+    def test_stops_once_majority_reached(self):
+        variants = [('original', b'o'), ('grayscale', b'g'), ('threshold', b't')]
+        solver = self._make_solver({b'o': 'ab12', b'g': 'ab12', b't': 'zzzz'})
+        with patch('ruijie_query.captcha.captcha_solver.make_variants', return_value=variants):
+            assert solver._solve_with_ddddocr(b'image') == 'ab12'
+        assert solver.ocr.classification.call_count == 2
+
+    def test_undecodable_image_is_not_reclassified(self):
+        solver = self._make_solver({b'image': 'ab12'})
+        assert solver._solve_with_ddddocr(b'image') == 'ab12'
+        assert solver.ocr.classification.call_count == 1
+
+
+class TestCaptchaConfidence:
+    """识别置信度与提交决策的单元测试"""
+
+    def _make_solver(self, output, channels=None, **config):
+        captcha_config = {
+            'enable_ddddocr': False, 'enable_ai': True, 'ddddocr_max_attempts': 1,
+            'submit_confidence': 0.6, 'refresh_confidence': 0.2,
+        }
+        captcha_config.update(config)
+        solver = CaptchaSolver(captcha_config, {}, channels or [], MagicMock())
+        solver.ddddocr_enabled_internal = True
+        solver.captcha_config['enable_ddddocr'] = True
+        solver.ocr = MagicMock()
+        solver.ocr.classification.return_value = output
+        return solver
+
+    def _probability_output(self, steps):
+        charsets = ['', 'a', 'b', '1']
+        rows = []
+        for char, prob in steps:
+            row = [(1 - prob) / 3] * 4
+            row[charsets.index(char)] = prob
+            rows.append(row)
+        return {'charsets': charsets, 'probability': rows}
+
+    def test_decodes_probability_output(self):
+        output = self._probability_output([('a', 0.9), ('a', 0.8), ('', 0.99), ('b', 0.5), ('1', 1.0)])
+        solver = self._make_solver(output)
+
+        result = solver.solve_captcha_scored(b'image')
+        assert result['answer'] == 'ab1'
+        assert result['solver'] == 'ddddocr'
+        assert result['confidence'] == pytest.approx(0.9 * 0.5 * 1.0)
+        solver.ocr.classification.assert_called_once_with(b'image', probability=True)
+
+    def test_old_ddddocr_without_probability(self):
+        solver = self._make_solver('AB12')
+        solver.ocr.classification.side_effect = lambda image, **kwargs: (
+            (_ for _ in ()).throw(TypeError('unexpected keyword')) if kwargs else 'AB12'
+        )
+        result = solver.solve_captcha_scored(b'image')
+        assert result == {'answer': 'ab12', 'solver': 'ddddocr', 'confidence': None}
+        assert solver.choose_action(result) == 'submit'
+
+    def test_choose_action_thresholds(self):
+        solver = self._make_solver('x', channels=[{'api_type': 'openai', 'api_key': 'k'}])
+        result = {'answer': 'ab12', 'solver': 'ddddocr'}
+        assert solver.choose_action(dict(result, confidence=0.9)) == 'submit'
+        assert solver.choose_action(dict(result, confidence=0.4)) == 'escalate'
+        assert solver.choose_action(dict(result, confidence=0.1)) == 'refresh'
+        # 不能再刷新时交给 AI；AI 的结果总是提交
+        assert solver.choose_action(dict(result, confidence=0.1), can_refresh=False) == 'escalate'
+        assert solver.choose_action({'answer': 'ab12', 'solver': 'ai', 'confidence': None}) == 'submit'
+        assert solver.action_counts == {'submit': 1, 'escalate': 2, 'refresh': 1}
+
+    def test_without_ai_low_confidence_is_submitted_when_no_refresh_left(self):
+        solver = self._make_solver('x')
+        result = {'answer': 'ab12', 'solver': 'ddddocr', 'confidence': 0.3}
+        assert solver.choose_action(result) == 'submit'
+        assert solver.choose_action(dict(result, confidence=0.1), can_refresh=False) == 'submit'
+
+    def test_confidence_gate_is_off_by_default(self):
+        solver = CaptchaSolver(
+            {'enable_ddddocr': False, 'enable_ai': True,
+             'submit_confidence': ConfigDefaults.DEFAULT_CAPTCHA_SUBMIT_CONFIDENCE,
+             'refresh_confidence': ConfigDefaults.DEFAULT_CAPTCHA_REFRESH_CONFIDENCE},
+            {}, [{'api_type': 'openai', 'api_key': 'k'}], MagicMock(),
+        )
+        for confidence in (0.0, 0.01, 0.5):
+            result = {'answer': 'ab12', 'solver': 'ddddocr', 'confidence': confidence}
+            assert solver.choose_action(result) == 'submit'
+
+
+class TestCaptchaProfileConstraints:
+    """验证码格式约束在识别流程中的单元测试"""
+
+    def _make_solver(self, channels=None, **config):
+        captcha_config = {'enable_ddddocr': False, 'enable_ai': True, 'ddddocr_max_attempts': 1}
+        captcha_config.update(config)
+        solver = CaptchaSolver(captcha_config, {'retry_attempts': 2, 'retry_delay': 0}, channels or [], MagicMock())
+        solver.ddddocr_enabled_internal = True
+        solver.captcha_config['enable_ddddocr'] = True
+        solver.ocr = MagicMock()
+        return solver
+
+    def test_ddddocr_answer_outside_profile_is_rejected(self):
+        solver = self._make_solver(length='4', charset='digits')
+        solver.ocr.classification.side_effect = lambda image, probability=False: 'l2345'
+        assert solver.solve_captcha_scored(b'image')['answer'] is None
+
+        solver.ocr.classification.side_effect = lambda image, probability=False: 'l2o4'
+        assert solver.solve_captcha_scored(b'image')['answer'] == '1204'
+
+    def test_ai_answer_outside_profile_is_retried(self):
+        channels = [{'api_type': 'openai', 'api_key': 'key', 'model_name': 'gpt-4o'}]
+        solver = self._make_solver(channels=channels, length='4')
+        with patch('ruijie_query.captcha.captcha_solver.openai') as mock_openai:
+            client = mock_openai.OpenAI.return_value
+            client.chat.completions.create.side_effect = [
+                MagicMock(choices=[MagicMock(message=MagicMock(content='The captcha is AB12'))]),
+                MagicMock(choices=[MagicMock(message=MagicMock(content='AB12'))]),
+            ]
+            assert solver._solve_with_ai(b'image') == 'AB12'
+            assert client.chat.completions.create.call_count == 2
+
+    def test_plausibility_follows_profile(self):
+        solver = self._make_solver(length='4-5')
+        assert solver._is_plausible('ab12')
+        assert not solver._is_plausible('ab1')
+        assert not solver._is_plausible('ab-12')
+
+    def test_accepted_answers_restrict_ddddocr_ranges(self):
+        from ruijie_query.captcha.profile import LEARN_MIN_SAMPLES
+
+        solver = self._make_solver()
+        for i in range(LEARN_MIN_SAMPLES):
+            solver.report_result({'answer': f'{i % 10}234', 'solver': 'ddddocr'}, accepted=True)
+        solver.report_result({'answer': 'abcd', 'solver': 'ddddocr'}, accepted=False)
+        solver.ocr.set_ranges.assert_called_once_with('0123456789')
+        assert solver.profile.length_range == (4, 4)
+
+
+class TestCaptchaFeedback:
+    """提交反馈与识别结果纠正的单元测试"""
+
+    def _make_solver(self, answer):
+        solver = CaptchaSolver({'enable_ddddocr': False, 'enable_ai': False, 'ddddocr_max_attempts': 1}, {}, [], MagicMock())
+        solver.ddddocr_enabled_internal = True
+        solver.captcha_config['enable_ddddocr'] = True
+        solver.ocr = MagicMock()
+        solver.ocr.classification.side_effect = lambda image, probability=False: answer
+        return solver
+
+    def test_learned_confusion_corrects_answer_before_submission(self):
+        from ruijie_query.captcha.feedback import CORRECTION_MIN_SUPPORT
+
+        solver = self._make_solver('o123')
+        for i in range(CORRECTION_MIN_SUPPORT):
+            image = f'image-{i}'.encode()
+            result = solver.solve_captcha_scored(image)
+            assert result['answer'] == 'o123'
+            # 网站接受了另一个识别器给出的 0123
+            solver.report_result({'answer': '0123', 'solver': 'ai'}, True, image)
+
+        result = solver.solve_captcha_scored(b'new image')
+        assert result == {'answer': '0123', 'solver': 'ddddocr', 'confidence': None}
+
+    def test_report_without_image_only_updates_profile(self):
+        solver = self._make_solver('abcd')
+        solver.report_result({'answer': 'abcd', 'solver': 'ddddocr'}, True)
+        assert solver.feedback.submitted == 0
+        assert solver.profile.samples == 1
+
+
+class TestAIClientCache:
+    """AI 客户端缓存与连接池共享的单元测试"""
+
+    def _make_solver(self, channels):
+        return CaptchaSolver(
+            {'enable_ddddocr': False, 'enable_ai': True},
+            {'retry_attempts': 1, 'retry_delay': 0, 'request_timeout': 12},
+            channels,
+            MagicMock(),
+        )
+
+    def _response(self, text):
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=text))])
+
+    def test_openai_client_is_created_once_per_channel(self):
+        channels = [{'api_type': 'openai', 'api_key': 'key', 'base_url': 'https://api.example.com/v1'}]
+        solver = self._make_solver(channels)
+        with patch('ruijie_query.captcha.captcha_solver.openai') as mock_openai, \
+                patch('ruijie_query.captcha.captcha_solver.httpx', MagicMock()):
+            client = mock_openai.OpenAI.return_value
+            client.chat.completions.create.return_value = self._response('AB12')
+            for _ in range(3):
+                assert solver._solve_with_channel(0, channels[0], b'image') == 'AB12'
+
+            mock_openai.OpenAI.assert_called_once()
+            kwargs = mock_openai.OpenAI.call_args.kwargs
+            assert kwargs['base_url'] == 'https://api.example.com/v1'
+            assert kwargs['timeout'] == 12
+            assert kwargs['http_client'] is mock_openai.DefaultHttpxClient.return_value
+            assert client.chat.completions.create.call_args.kwargs['timeout'] == 12
+
+    def test_channels_with_same_base_url_share_http_pool(self):
+        channels = [
+            {'api_type': 'openai', 'api_key': 'key1', 'base_url': 'https://api.example.com/v1'},
+            {'api_type': 'grok', 'api_key': 'key2', 'base_url': 'https://api.example.com/v1'},
+            {'api_type': 'openai', 'api_key': 'key3', 'base_url': 'https://other.example.com/v1'},
+        ]
+        solver = self._make_solver(channels)
+        with patch('ruijie_query.captcha.captcha_solver.openai') as mock_openai, \
+                patch('ruijie_query.captcha.captcha_solver.httpx', MagicMock()):
+            mock_openai.DefaultHttpxClient.side_effect = lambda **kwargs: MagicMock()
+            clients = [solver._get_openai_client(channel) for channel in channels]
+
+            http_clients = [call.kwargs['http_client'] for call in mock_openai.OpenAI.call_args_list]
+            assert len(clients) == 3
+            assert http_clients[0] is http_clients[1]
+            assert http_clients[0] is not http_clients[2]
+
+            solver.close()
+            http_clients[0].close.assert_called_once()
+            http_clients[2].close.assert_called_once()
+
+    def test_gemini_model_is_cached_and_configured_once(self):
+        channels = [{'api_type': 'gemini', 'api_key': 'key', 'model_name': 'gemini-2.5-flash'}]
+        solver = self._make_solver(channels)
+        with patch('ruijie_query.captcha.captcha_solver.genai') as mock_genai:
+            mock_genai.GenerativeModel.return_value.generate_content.return_value = MagicMock(spec=['text'], text='XY34')
+            for _ in range(2):
+                assert solver._solve_with_channel(0, channels[0], b'image') == 'XY34'
+
+            mock_genai.configure.assert_called_once_with(api_key='key')
+            mock_genai.GenerativeModel.assert_called_once_with('gemini-2.5-flash')
+            call = mock_genai.GenerativeModel.return_value.generate_content.call_args
+            assert call.kwargs['request_options'] == {'timeout': 12}
+
+    def test_gemini_models_keep_their_own_key(self):
+        """genai.configure 是全局设置：每个模型绑定创建时对应 Key 的客户端，之后切换 Key 不影响它"""
+        channels = [
+            {'api_type': 'gemini', 'api_key': 'key-a', 'model_name': 'gemini-2.5-flash'},
+            {'api_type': 'gemini', 'api_key': 'key-b', 'model_name': 'gemini-2.5-flash'},
+        ]
+        solver = self._make_solver(channels)
+        with patch('ruijie_query.captcha.captcha_solver.genai') as mock_genai:
+            configured = []
+            mock_genai.configure.side_effect = lambda api_key: configured.append(api_key)
+            mock_genai.client.get_default_generative_client.side_effect = lambda: f'client-{configured[-1]}'
+            mock_genai.GenerativeModel.side_effect = lambda name: MagicMock()
+
+            model_a = solver._get_gemini_model('key-a', 'gemini-2.5-flash')
+            model_b = solver._get_gemini_model('key-b', 'gemini-2.5-flash')
+            assert solver._get_gemini_model('key-a', 'gemini-2.5-flash') is model_a
+
+            assert model_a._client == 'client-key-a'
+            assert model_b._client == 'client-key-b'
+            assert configured == ['key-a', 'key-b']
+
+
+class TestSolveCaptchaAsync:
+    """异步识别接口的单元测试"""
+
+    def _make_solver(self, channels, **ai_settings):
+        settings = {'retry_attempts': 1, 'retry_delay': 0, 'max_concurrency': 2}
+        settings.update(ai_settings)
+        return CaptchaSolver({'enable_ddddocr': False, 'enable_ai': True}, settings, channels, MagicMock())
+
+    def test_ddddocr_runs_in_executor(self):
+        import asyncio
+
+        solver = self._make_solver([])
+        solver.ddddocr_enabled_internal = True
+        solver.captcha_config['enable_ddddocr'] = True
+        solver.captcha_config['ddddocr_max_attempts'] = 1
+        solver.ocr = MagicMock()
+        solver.ocr.classification.side_effect = lambda image, probability=False: 'ab12'
+        assert asyncio.run(solver.solve_captcha_async(b'image')) == 'ab12'
+        solver.close()
+
+    def test_per_channel_concurrency_is_bounded(self):
+        import asyncio
+
+        channels = [{'api_type': 'openai', 'api_key': 'key', 'model_name': 'gpt-4o'}]
+        solver = self._make_solver(channels)
+        state = {'in_flight': 0, 'peak': 0}
+
+        async def create(**kwargs):
+            state['in_flight'] += 1
+            state['peak'] = max(state['peak'], state['in_flight'])
+            await asyncio.sleep(0.01)
+            state['in_flight'] -= 1
+            return MagicMock(choices=[MagicMock(message=MagicMock(content='AB12'))])
+
+        client = MagicMock()
+        client.chat.completions.create = create
+
+        async def main():
+            return await asyncio.gather(*(solver.solve_captcha_async(f'image-{i}'.encode()) for i in range(6)))
+
+        with patch('ruijie_query.captcha.captcha_solver.openai', MagicMock()), \
+                patch.object(solver, '_get_async_openai_client', return_value=client):
+            answers = asyncio.run(main())
+
+        assert answers == ['AB12'] * 6
+        assert state['peak'] == 2
+
+    def test_against_local_openai_compatible_server(self):
+        """使用本地模拟的 OpenAI 兼容服务端测试完整的异步请求"""
+        import asyncio
+        import json
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        pytest.importorskip('openai')
+        requests = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                requests.append((self.path, body))
+                payload = json.dumps({
+                    'id': 'chatcmpl-1', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': ' XY-34 '}}],
+                }).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            base_url = f'http://127.0.0.1:{server.server_address[1]}/v1'
+            channels = [{'api_type': 'openai', 'api_key': 'test', 'model_name': 'vision-model', 'base_url': base_url}]
+            solver = self._make_solver(channels)
+
+            async def main():
+                try:
+                    return await solver.solve_captcha_async(b'image')
+                finally:
+                    await solver.aclose()
+
+            assert asyncio.run(main()) == 'XY34'
+            path, body = requests[0]
+            assert path == '/v1/chat/completions'
+            assert body['model'] == 'vision-model'
+            image_url = body['messages'][0]['content'][1]['image_url']['url']
+            assert image_url == 'data:image/png;base64,' + base64.b64encode(b'image').decode()
+        finally:
+            server.shutdown()
+
+
+    def test_async_gemini_clients_are_per_event_loop_and_closed(self):
+        import asyncio
+        from unittest.mock import AsyncMock
+
+        channels = [{'api_type': 'gemini', 'api_key': 'key', 'model_name': 'gemini-2.5-flash'}]
+        solver = self._make_solver(channels)
+        with patch('ruijie_query.captcha.captcha_solver.genai') as mock_genai:
+            clients = []
+
+            def make_client():
+                client = MagicMock()
+                client.transport.close = AsyncMock()
+                clients.append(client)
+                return client
+
+            def make_model(name):
+                model = MagicMock()
+                model.generate_content_async = AsyncMock(return_value=MagicMock(spec=['text'], text='XY34'))
+                return model
+
+            mock_genai.client.get_default_generative_async_client.side_effect = make_client
+            mock_genai.GenerativeModel.side_effect = make_model
+
+            async def main():
+                try:
+                    assert await solver.solve_captcha_async(b'image') == 'XY34'
+                    assert await solver.solve_captcha_async(b'image') == 'XY34'
+                finally:
+                    await solver.aclose()
+
+            # 每个事件循环使用自己的异步客户端（同一事件循环内复用），并在 aclose 时关闭
+            asyncio.run(main())
+            asyncio.run(main())
+
+        assert len(clients) == 2
+        for client in clients:
+            client.transport.close.assert_awaited_once()
+
+
+class TestChannelRouting:
+    """AI 渠道自适应路由的单元测试"""
+
+    def setup_method(self):
+        self.channels = [
+            {'api_type': 'openai', 'api_key': 'key1', 'model_name': 'slow-model'},
+            {'api_type': 'openai', 'api_key': 'key2', 'model_name': 'fast-model'},
+        ]
+        self.solver = CaptchaSolver(
+            {'enable_ddddocr': False, 'enable_ai': True},
+            {'retry_attempts': 1, 'retry_delay': 0, 'routing_exploration': 0.0},
+            self.channels,
+            MagicMock(),
+        )
+
+    def test_failing_channel_is_tried_after_healthy_one(self):
+        calls = []
+
+        def create(model, **kwargs):
+            calls.append(model)
+            if model == 'slow-model':
+                time.sleep(0.01)
+                raise RuntimeError('server error')
+            return MagicMock(choices=[MagicMock(message=MagicMock(content='AB12'))])
+
+        with patch('ruijie_query.captcha.captcha_solver.openai') as mock_openai:
+            mock_openai.OpenAI.return_value.chat.completions.create.side_effect = create
+            assert self.solver._solve_with_ai(b'image-1') == 'AB12'
+            assert calls == ['slow-model', 'fast-model']
+
+            calls.clear()
+            assert self.solver._solve_with_ai(b'image-2') == 'AB12'
+            assert calls == ['fast-model']
+
+    def test_site_rejections_lower_channel_acceptance(self):
+        from ruijie_query.captcha.channel_stats import channel_key
+
+        with patch('ruijie_query.captcha.captcha_solver.openai') as mock_openai:
+            mock_openai.OpenAI.return_value.chat.completions.create.return_value = MagicMock(
+                choices=[MagicMock(message=MagicMock(content='AB12'))]
+            )
+            for i in range(3):
+                image = f'image-{i}'.encode()
+                answer = self.solver._solve_with_channel(0, self.channels[0], image)
+                self.solver.report_result({'answer': answer, 'solver': 'ai'}, False, image)
+            self.solver._solve_with_channel(1, self.channels[1], b'image-x')
+
+        assert self.solver._routed_channels()[0][0] == 1
+        assert self.solver.channel_stats.expected_time(channel_key(self.channels[0])) > \
+            self.solver.channel_stats.expected_time(channel_key(self.channels[1]))
+        gauge = get_monitor_gauge(f"AI渠道评分 {self.solver._channel_name(0, self.channels[0])}")
+        assert '3 次提交反馈' in gauge
+
+
+class TestParallelChannelProbe:
+    """AI 渠道并发可用性测试的单元测试"""
+
+    def test_probes_run_concurrently_with_overall_deadline(self):
+        import threading
+
+        release = threading.Event()
+        channels = [
+            {'api_type': 'openai', 'api_key': f'key{i}', 'model_name': model}
+            for i, model in enumerate(['hanging', 'ok-1', 'broken', 'ok-2'])
+        ]
+        solver = CaptchaSolver(
+            {'enable_ddddocr': False},
+            {'ai_test_timeout': 0.5},
+            channels,
+            MagicMock(),
+        )
+
+        def create(model, **kwargs):
+            if model == 'hanging':
+                release.wait(5)
+            time.sleep(0.2)
+            if model == 'broken':
+                raise RuntimeError('bad key')
+            return MagicMock(choices=[MagicMock(message=MagicMock(content='Hi'))])
+
+        try:
+            with patch('ruijie_query.captcha.captcha_solver.openai') as mock_openai:
+                mock_openai.OpenAI.return_value.chat.completions.create.side_effect = create
+                start = time.perf_counter()
+                result = solver.test_channels_availability()
+                elapsed = time.perf_counter() - start
+
+            # 结果按配置顺序合并，超时的渠道暂不使用；总耗时由整体期限决定而不是各渠道耗时之和
+            assert [c['model_name'] for c in result] == ['ok-1', 'ok-2']
+            assert solver.channels == result
+            assert elapsed < 1.5
+        finally:
+            release.set()
+
+        # 超时的测试在后台完成后，渠道按配置顺序加入可用列表
+        deadline = time.time() + 3
+        while len(solver.channels) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        assert [c['model_name'] for c in solver.channels] == ['hanging', 'ok-1', 'ok-2']
+
+    def test_probe_timeouts_never_exceed_the_remaining_deadline(self):
+        channels = [{'api_type': 'openai', 'api_key': f'key{i}', 'model_name': 'gpt-4o'} for i in range(3)]
+        solver = CaptchaSolver({'enable_ddddocr': False}, {'ai_test_timeout': 0.5}, channels, MagicMock())
+        timeouts = []
+
+        def probe(channel_index, channel_config, test_timeout):
+            timeouts.append(test_timeout)
+            return True
+
+        solver._probe_channel = probe
+        with patch('ruijie_query.captcha.captcha_solver.PROBE_MAX_WORKERS', 1):
+            assert len(solver.test_channels_availability()) == 3
+        assert len(timeouts) == 3
+        assert all(0 < timeout <= 0.5 for timeout in timeouts)
+
+    def test_hanging_probe_does_not_delay_close_or_exit(self):
+        import subprocess
+        import textwrap
+
+        script = textwrap.dedent("""
+            import sys, threading, time
+            sys.path.insert(0, 'src')
+            from unittest.mock import MagicMock
+            from ruijie_query.captcha.captcha_solver import CaptchaSolver
+
+            channels = [{'api_type': 'openai', 'api_key': 'key', 'model_name': 'gpt-4o'}]
+            solver = CaptchaSolver({'enable_ddddocr': False}, {'ai_test_timeout': 0.2}, channels, MagicMock())
+            solver._probe_channel = lambda *args: threading.Event().wait()  # 永不返回的测试请求
+            assert solver.test_channels_availability() == []
+            start = time.perf_counter()
+            solver.close()
+            assert time.perf_counter() - start < 0.5
+        """)
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=30)
+        assert completed.returncode == 0, completed.stderr
+        assert time.perf_counter() - start < 10
+
+
+class TestChannelHealthCacheIntegration:
+    """渠道可用性缓存与启动测试集成的单元测试"""
+
+    def setup_method(self):
+        self.channels = [
+            {'api_type': 'openai', 'api_key': 'key1', 'model_name': 'model-a'},
+            {'api_type': 'openai', 'api_key': 'key2', 'model_name': 'model-b'},
+        ]
+
+    def make_solver(self, path):
+        return CaptchaSolver(
+            {'enable_ddddocr': False},
+            {'ai_test_timeout': 5, 'health_cache_file': path, 'health_cache_ttl': 3600},
+            list(self.channels),
+            MagicMock(),
+        )
+
+    def test_fresh_cache_skips_probing(self, tmp_path):
+        path = str(tmp_path / 'health.json')
+        first_solver = self.make_solver(path)
+        with patch('ruijie_query.captcha.captcha_solver.openai') as mock_openai:
+            create = mock_openai.OpenAI.return_value.chat.completions.create
+            create.side_effect = lambda model, **kwargs: MagicMock(
+                choices=[MagicMock(message=MagicMock(content='Hi' if model == 'model-b' else ''))]
+            )
+            first = first_solver.test_channels_availability()
+            assert [c['model_name'] for c in first] == ['model-b']
+            assert create.call_count == 2
+
+        second_solver = self.make_solver(path)
+        with patch('ruijie_query.captcha.captcha_solver.openai') as mock_openai:
+            create = mock_openai.OpenAI.return_value.chat.completions.create
+            second = second_solver.test_channels_availability()
+            assert [c['model_name'] for c in second] == ['model-b']
+            create.assert_not_called()
+
+    def test_stale_channels_are_reprobed_in_background(self, tmp_path):
+        from ruijie_query.captcha.channel_stats import channel_key
+
+        path = tmp_path / 'health.json'
+        path.write_text(json.dumps({
+            channel_key(self.channels[0]): {'available': True, 'checked_at': 0},
+            channel_key(self.channels[1]): {'available': False, 'checked_at': 0},
+        }), encoding='utf-8')
+        solver = self.make_solver(str(path))
+        with patch('ruijie_query.captcha.captcha_solver.openai') as mock_openai:
+            create = mock_openai.OpenAI.return_value.chat.completions.create
+            create.side_effect = lambda model, **kwargs: MagicMock(
+                choices=[MagicMock(message=MagicMock(content='Hi' if model == 'model-b' else ''))]
+            )
+            # 过期的结果先沿用，不等待重新测试
+            result = solver.test_channels_availability()
+            assert [c['model_name'] for c in result] == ['model-a']
+            solver._health_refresh.join(5)
+
+        assert [c['model_name'] for c in solver.channels] == ['model-b']
+        assert solver.health_cache.lookup(channel_key(self.channels[1])) == (True, True)
+
+
+class TestLazyChannelValidation:
+    """AI 渠道延迟验证的单元测试"""
+
+    def setup_method(self):
+        self.channels = [
+            {'api_type': 'openai', 'api_key': 'key1', 'model_name': 'broken-model'},
+            {'api_type': 'openai', 'api_key': 'key2', 'model_name': 'good-model'},
+            {'api_type': 'openai', 'api_key': 'your_openai_key', 'model_name': 'placeholder'},
+        ]
+        self.solver = CaptchaSolver(
+            {'enable_ddddocr': False, 'enable_ai': True},
+            {'retry_attempts': 3, 'retry_delay': 0, 'routing_exploration': 0.0},
+            list(self.channels),
+            MagicMock(),
+        )
+        self.solver._wait = MagicMock()
+
+    def test_channels_are_validated_on_first_use(self):
+        calls = []
+
+        def create(model, **kwargs):
+            calls.append(model)
+            if model == 'broken-model':
+                raise RuntimeError('invalid api key')
+            return MagicMock(choices=[MagicMock(message=MagicMock(content='AB12'))])
+
+        with patch('ruijie_query.captcha.captcha_solver.openai') as mock_openai:
+            mock_openai.OpenAI.return_value.chat.completions.create.side_effect = create
+            channels = self.solver.defer_channel_validation()
+            # 启动时不发送任何请求，占位符 Key 的渠道直接排除
+            assert [c['model_name'] for c in channels] == ['broken-model', 'good-model']
+            assert calls == []
+
+            assert self.solver._solve_with_ai(b'image-1') == 'AB12'
+
+        # 首次调用失败的渠道立即降级，不再重试
+        assert calls == ['broken-model', 'good-model']
+        assert [c['model_name'] for c in self.solver.channels] == ['good-model']
+        assert self.solver._unverified == set()
+        self.solver._wait.assert_not_called()
+
+    def test_verified_channel_failures_are_retried(self):
+        with patch('ruijie_query.captcha.captcha_solver.openai') as mock_openai:
+            create = mock_openai.OpenAI.return_value.chat.completions.create
+            create.return_value = MagicMock(choices=[MagicMock(message=MagicMock(content='AB12'))])
+            self.solver.defer_channel_validation()
+            assert self.solver._solve_with_channel(0, self.channels[0], b'image-1') == 'AB12'
+
+            create.side_effect = [RuntimeError('timeout'), create.return_value]
+            assert self.solver._solve_with_channel(0, self.channels[0], b'image-2') == 'AB12'
+
+        assert len(self.solver.channels) == 2
+
+    def test_only_permanent_first_use_failures_are_cached(self, tmp_path):
+        from ruijie_query.captcha.channel_health import ChannelHealthCache
+        from ruijie_query.captcha.channel_stats import channel_key
+
+        self.solver.health_cache = ChannelHealthCache(str(tmp_path / 'health.json'), 3600)
+
+        def create(model, **kwargs):
+            if model == 'broken-model':
+                raise RuntimeError('Incorrect API key provided')
+            raise TimeoutError('Request timed out')
+
+        with patch('ruijie_query.captcha.captcha_solver.openai') as mock_openai:
+            mock_openai.OpenAI.return_value.chat.completions.create.side_effect = create
+            self.solver.defer_channel_validation()
+            assert self.solver._solve_with_ai(b'image-1') is None
+
+        # 两个渠道在本次运行中都已停用，但只有认证失败的渠道写入“不可用”
+        assert self.solver.channels == []
+        assert self.solver.health_cache.lookup(channel_key(self.channels[0])) == (False, True)
+        assert self.solver.health_cache.lookup(channel_key(self.channels[1])) is None
+
+
+class RateLimitError(Exception):
+    """模拟 openai.RateLimitError（带响应头）"""
+
+    def __init__(self, headers=None):
+        super().__init__('rate limited')
+        self.status_code = 429
+        self.response = MagicMock(headers=headers or {})
+
+
+class TestRateLimitCooldown:
+    """频率限制 (429) 冷却的单元测试"""
+
+    def setup_method(self):
+        self.channels = [
+            {'api_type': 'openai', 'api_key': 'key1', 'model_name': 'limited-model'},
+            {'api_type': 'openai', 'api_key': 'key2', 'model_name': 'other-model'},
+        ]
+        self.solver = CaptchaSolver(
+            {'enable_ddddocr': False, 'enable_ai': True},
+            {'retry_attempts': 3, 'retry_delay': 0, 'rate_limit_delay': 30, 'routing_exploration': 0.0},
+            self.channels,
+            MagicMock(),
+        )
+        self.solver._wait = MagicMock()
+
+    def test_retry_after_header(self):
+        from ruijie_query.captcha.captcha_solver import _retry_after_seconds
+
+        assert _retry_after_seconds(RateLimitError({'retry-after': '7'})) == 7.0
+        assert _retry_after_seconds(RateLimitError({'retry-after-ms': '1500'})) == 1.5
+        assert _retry_after_seconds(RateLimitError({'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'})) == 0.0
+        assert _retry_after_seconds(RateLimitError({'retry-after': 'soon'})) is None
+        assert _retry_after_seconds(RuntimeError('boom')) is None
+
+    def test_rate_limited_channel_is_skipped_without_sleeping(self):
+        from ruijie_query.captcha.channel_stats import channel_key
+
+        calls = []
+
+        def create(model, **kwargs):
+            calls.append(model)
+            if model == 'limited-model':
+                raise RateLimitError({'retry-after': '20'})
+            return MagicMock(choices=[MagicMock(message=MagicMock(content='AB12'))])
+
+        with patch('ruijie_query.captcha.captcha_solver.openai') as mock_openai:
+            mock_openai.RateLimitError = RateLimitError
+            mock_openai.OpenAI.return_value.chat.completions.create.side_effect = create
+            assert self.solver._solve_with_ai(b'image-1') == 'AB12'
+            # 429 不重试、不等待，立即改用下一个渠道
+            assert calls == ['limited-model', 'other-model']
+            self.solver._wait.assert_not_called()
+
+            calls.clear()
+            self.solver.channel_stats.order = lambda keys: list(range(len(keys)))  # 保持配置顺序
+            assert self.solver._solve_with_ai(b'image-2') == 'AB12'
+            assert calls == ['other-model']
+
+        remaining = self.solver.channel_stats.cooldown_remaining(channel_key(self.channels[0]))
+        assert 19 < remaining <= 20
+        # 频率限制不计入渠道的成功率和耗时统计
+        assert channel_key(self.channels[0]) not in self.solver.channel_stats._stats
+
+    def test_waits_only_when_all_channels_are_cooling(self):
+        with patch('ruijie_query.captcha.captcha_solver.openai') as mock_openai:
+            mock_openai.RateLimitError = RateLimitError
+            create = mock_openai.OpenAI.return_value.chat.completions.create
+            create.side_effect = [
+                RateLimitError({'retry-after': '2'}),
+                RateLimitError(),
+                MagicMock(choices=[MagicMock(message=MagicMock(content='AB12'))]),
+            ]
+            self.solver._wait.side_effect = lambda seconds, cancel_event=None: [
+                self.solver.channel_stats._cooldowns.clear()
+            ]
+            assert self.solver._solve_with_ai(b'image-1') == 'AB12'
+
+        # 等待最早结束的冷却（Retry-After 2 秒），而不是 rate_limit_delay
+        assert self.solver._wait.call_count == 1
+        assert 1 < self.solver._wait.call_args[0][0] <= 2
+        assert create.call_count == 3
+
+
+def get_monitor_gauge(name):
+    from ruijie_query.monitoring.performance_monitor import get_monitor
+
+    return get_monitor().get_gauge(name)
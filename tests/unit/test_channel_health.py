@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+AI 渠道可用性缓存单元测试
+"""
+import json
+
+import sys
+sys.path.insert(0, 'src')
+
+from ruijie_query.captcha.channel_health import ChannelHealthCache
+
+
+class TestChannelHealthCache:
+    """ChannelHealthCache 的单元测试"""
+
+    def test_store_and_lookup(self, tmp_path):
+        path = str(tmp_path / 'health.json')
+        cache = ChannelHealthCache(path, ttl=60)
+        assert cache.lookup('a') is None
+        cache.store({'a': True, 'b': False})
+        assert cache.lookup('a') == (True, True)
+
+        # 结果持久化，重新加载后直接可用
+        reloaded = ChannelHealthCache(path, ttl=60)
+        assert reloaded.lookup('b') == (False, True)
+
+    def test_expired_entries_are_stale(self, tmp_path):
+        path = tmp_path / 'health.json'
+        path.write_text(json.dumps({'a': {'available': True, 'checked_at': 0}}), encoding='utf-8')
+        cache = ChannelHealthCache(str(path), ttl=60)
+        assert cache.lookup('a') == (True, False)
+
+    def test_disabled_without_ttl(self, tmp_path):
+        path = tmp_path / 'health.json'
+        cache = ChannelHealthCache(str(path), ttl=0)
+        cache.store({'a': True})
+        assert not cache.enabled
+        assert cache.lookup('a') is None
+        assert not path.exists()
+
+    def test_corrupt_cache_file_is_ignored(self, tmp_path):
+        path = tmp_path / 'health.json'
+        path.write_text('{not json', encoding='utf-8')
+        cache = ChannelHealthCache(str(path), ttl=60)
+        assert cache.lookup('a') is None
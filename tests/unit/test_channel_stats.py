@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+AI 渠道实时统计与路由单元测试
+"""
+import random
+
+import pytest
+
+import sys
+sys.path.insert(0, 'src')
+
+from ruijie_query.captcha.channel_stats import ChannelStats, channel_key
+
+
+class TestChannelKey:
+    """channel_key 的单元测试"""
+
+    def test_key_does_not_contain_api_key(self):
+        key = channel_key({'api_type': 'OpenAI', 'api_key': 'sk-secret', 'model_name': 'gpt-4o'})
+        assert 'sk-secret' not in key
+        assert key.startswith('openai|gpt-4o||')
+        assert key != channel_key({'api_type': 'openai', 'api_key': 'other', 'model_name': 'gpt-4o'})
+
+
+class TestChannelStats:
+    """ChannelStats 的单元测试"""
+
+    def test_ewma_and_expected_time(self):
+        stats = ChannelStats(alpha=0.5, exploration=0.0)
+        stats.record_call('a', 2.0, True)
+        stats.record_call('a', 4.0, False)
+        # 延迟 3.0，成功率 0.5
+        assert stats.expected_time('a') == pytest.approx(6.0)
+        stats.record_acceptance('a', False)
+        assert stats.expected_time('a') == pytest.approx(12.0)
+        assert stats.expected_time('unknown') is None
+
+    def test_fastest_first_and_unobserved_channels_get_median_score(self):
+        stats = ChannelStats(exploration=0.0)
+        assert stats.order(['a', 'b', 'c']) == [0, 1, 2]  # 都没有记录时保持配置顺序
+        stats.record_call('slow', 5.0, True)
+        stats.record_call('fast', 1.0, True)
+        for _ in range(3):
+            stats.record_call('failing', 2.0, False)
+        # 'new' 取中位数 5.0，与 'slow' 同分时按配置顺序
+        assert stats.order(['slow', 'fast', 'failing', 'new']) == [1, 0, 3, 2]
+        assert stats.order(['new', 'slow', 'fast', 'failing']) == [2, 0, 1, 3]
+
+    def test_rate_limited_only_channel_does_not_stay_first(self):
+        stats = ChannelStats(exploration=0.0)
+        stats.record_call('fast', 1.0, True)
+        stats.record_call('slow', 3.0, True)
+        # 'limited' 只返回 429：调用不计入统计，只进入冷却
+        stats.cool_down('limited', 10)
+        assert stats.order(['limited', 'fast', 'slow']) == [1, 2, 0]
+        # 冷却结束后仍无记录，按中性评分排在最快渠道之后
+        stats._cooldowns['limited'] = 0.0
+        assert stats.order(['limited', 'fast', 'slow'])[0] == 1
+
+    def test_exploration_skips_cooling_channels(self):
+        stats = ChannelStats(exploration=1.0, rng=random.Random(0))
+        stats.record_call('a', 1.0, True)
+        stats.record_call('b', 2.0, True)
+        stats.cool_down('c', 10)
+        for _ in range(10):
+            assert stats.order(['a', 'b', 'c']) == [1, 0, 2]
+
+    def test_exploration_moves_other_channel_first(self):
+        stats = ChannelStats(exploration=1.0, rng=random.Random(0))
+        assert stats.order(['a', 'b', 'c']) == [0, 1, 2]  # 尚无记录时不探索
+        stats.record_call('a', 1.0, True)
+        stats.record_call('b', 2.0, True)
+        stats.record_call('c', 3.0, True)
+        assert stats.order(['a', 'b', 'c'])[0] != 0
+
+    def test_describe(self):
+        stats = ChannelStats()
+        assert stats.describe('a') == '尚无调用记录'
+        stats.record_call('a', 1.5, True)
+        assert stats.describe('a').startswith('延迟 1.50s, 成功率 100%')
+
+    def test_cool_down(self):
+        stats = ChannelStats()
+        assert stats.cooldown_remaining('a') == 0.0
+        stats.cool_down('a', 10)
+        stats.cool_down('a', 1)  # 已在冷却中时保留较晚的结束时间
+        assert 9 < stats.cooldown_remaining('a') <= 10
+        assert '冷却中' in stats.describe('a')
+        stats.cool_down('b', 0)
+        assert stats.cooldown_remaining('b') == 0.0
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+分块处理单元测试
+"""
+import os
+import tempfile
+import shutil
+
+import pandas as pd
+from unittest.mock import MagicMock
+
+import sys
+sys.path.insert(0, 'src')
+
+from ruijie_query.core.chunked import ChunkedProcessor, chunk_output_path, expand_input_files
+from ruijie_query.core.data_manager import DataManager
+from ruijie_query.storage import create_backend
+
+
+class TestChunkedProcessor:
+    """ChunkedProcessor 的单元测试"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_file = os.path.join(self.temp_dir, 'inventory.csv')
+        pd.DataFrame({
+            'Serial Number': ['SN001', 'SN002', 'SN003', 'SN004', 'SN005'],
+            '查询状态': ['成功', None, None, None, None],
+        }).to_csv(self.input_file, index=False)
+        self.logger = MagicMock()
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _make_processor(self, output_format='csv'):
+        dm = DataManager(self.input_file, 'Sheet1', 'Serial Number', {'型号': '型号'}, self.logger)
+        output = create_backend(
+            chunk_output_path(self.input_file, output_format), 'Sheet1', self.logger,
+            backend_name=output_format,
+        )
+        return ChunkedProcessor(dm, output, chunk_size=2, logger=self.logger)
+
+    def _query_chunk(self, processor):
+        dm = processor.data_manager
+        indexes = dm.get_unqueried_indexes()
+        dm.update_results([
+            (index, {'型号': f'M{index}', '查询状态': '成功'}) for index in indexes
+        ])
+        return len(indexes)
+
+    def test_processes_all_chunks_and_marks_completed(self):
+        processor = self._make_processor()
+        summaries = []
+        for chunk in processor.chunks():
+            assert len(chunk) <= 2
+            summaries.append(processor.persist(queried=self._query_chunk(processor)))
+            assert processor.data_manager.df is None  # 数据块写出后即释放
+
+        assert [s['queried'] for s in summaries] == [1, 2, 1]
+        assert processor.completed
+
+        output = pd.read_csv(chunk_output_path(self.input_file), dtype=str, encoding='utf-8-sig')
+        assert output['Serial Number'].tolist() == ['SN001', 'SN002', 'SN003', 'SN004', 'SN005']
+        assert output['查询状态'].tolist() == ['成功'] * 5
+        assert output.loc[1, '型号'] == 'M1'
+
+        # 已完成的文件不会重新处理
+        assert self._make_processor().completed
+
+    def test_resume_discards_unrecorded_output_and_continues(self):
+        processor = self._make_processor()
+        chunks = processor.chunks()
+        next(chunks)
+        processor.persist(queried=self._query_chunk(processor))
+
+        # 模拟第二块已追加到输出文件、但游标未更新时崩溃
+        next(chunks)
+        self._query_chunk(processor)
+        processor.output_backend.append(processor.data_manager.export_frame())
+
+        resumed = self._make_processor()
+        starts = []
+        for chunk in resumed.chunks():
+            starts.append(int(chunk.index[0]))
+            resumed.persist(queried=self._query_chunk(resumed))
+
+        assert starts == [2, 4]
+        output = pd.read_csv(chunk_output_path(self.input_file), dtype=str, encoding='utf-8-sig')
+        assert output['Serial Number'].tolist() == ['SN001', 'SN002', 'SN003', 'SN004', 'SN005']
+
+    def test_sqlite_output(self):
+        processor = self._make_processor('sqlite')
+        for _ in processor.chunks():
+            processor.persist(queried=self._query_chunk(processor))
+
+        output = create_backend(chunk_output_path(self.input_file, 'sqlite'), 'Sheet1').read()
+        assert output['Serial Number'].tolist() == ['SN001', 'SN002', 'SN003', 'SN004', 'SN005']
+        assert output['型号'].tolist()[1:] == ['M1', 'M2', 'M3', 'M4']
+
+    def test_expand_input_files(self):
+        for name in ('b.xlsx', 'a.xlsx', 'a.results.xlsx'):
+            open(os.path.join(self.temp_dir, name), 'w').close()
+        pattern = os.path.join(self.temp_dir, '*.xlsx')
+        assert [os.path.basename(p) for p in expand_input_files(pattern)] == ['a.xlsx', 'b.xlsx']
+        assert expand_input_files('data.xlsx') == ['data.xlsx']
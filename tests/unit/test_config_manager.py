@@ -78,6 +78,15 @@ class TestConfigValidator:
         self.validator._validate_general_config(config['General'])
         assert any('max_query_attempts' in error for error in self.validator.validation_errors)
 
+    def test_validate_general_config_invalid_serial_pattern(self):
+        """测试无效的序列号格式正则"""
+        config = configparser.ConfigParser()
+        config.add_section('General')
+        config.set('General', 'serial_patterns', '[A-Z]{10};([0-9]')
+
+        self.validator._validate_general_config(config['General'])
+        assert any('serial_patterns' in error for error in self.validator.validation_errors)
+
     def test_validate_captcha_config_valid(self):
         """测试有效的CaptchaSettings配置"""
         config = configparser.ConfigParser()
@@ -11,7 +11,7 @@ import pytest
 import sys
 sys.path.insert(0, 'src')
 
-from ruijie_query.core.data_manager import DataManager
+from ruijie_query.core.data_manager import DataManager, INVALID_SERIAL_STATUS
 
 
 class TestDataManager:
@@ -192,7 +192,8 @@ class TestDataManager:
         self.data_manager.load_data()
 
         # 模拟权限错误
-        with patch.object(self.data_manager.df, 'to_excel', side_effect=PermissionError("Permission denied")):
+        # 写出的是结果列转换回文本后的副本，因此在类上模拟 to_excel
+        with patch.object(pd.DataFrame, 'to_excel', side_effect=PermissionError("Permission denied")):
             self.data_manager.save_data()
             self.logger.error.assert_called_once()
 
@@ -360,4 +361,286 @@ class TestDataManager:
         assert df2.at[0, '查询状态'] == '成功'
         assert df2.at[0, '型号'] == 'NewModel1'
         assert df2.at[1, '查询状态'] == '失败'
-        assert df2.at[1, '型号'] == 'NewModel2'
\ No newline at end of file
+        assert df2.at[1, '型号'] == 'NewModel2'
+    def test_checkpoint_appends_only_dirty_rows(self):
+        """测试检查点只追加变更行，不重写工作簿"""
+        self.data_manager.load_data()
+        mtime_before = os.path.getmtime(self.excel_file)
+
+        self.data_manager.update_result(1, {'型号': 'M2', '查询状态': '成功'})
+        written = self.data_manager.checkpoint()
+
+        assert written == 1
+        assert os.path.getmtime(self.excel_file) == mtime_before
+        rows = self.data_manager.journal.replay()
+        assert list(rows.keys()) == [1]
+        assert rows[1]['查询状态'] == '成功'
+
+        # 没有新的变更时检查点不写入任何内容
+        assert self.data_manager.checkpoint() == 0
+
+    def test_save_data_writes_changed_cells_and_keeps_other_sheets(self):
+        """测试增量保存只回写变更单元格，并保留其它工作表和格式"""
+        from openpyxl import load_workbook
+        from openpyxl.styles import Font
+
+        # 准备包含结果列、格式和额外工作表的工作簿
+        full_data = self.test_data.copy()
+        full_data['查询状态'] = None
+        full_data.to_excel(self.excel_file, sheet_name='Sheet1', index=False)
+        wb = load_workbook(self.excel_file)
+        wb['Sheet1']['A2'].font = Font(bold=True)
+        wb.create_sheet('Notes')['A1'] = '保留内容'
+        wb.save(self.excel_file)
+
+        self.data_manager.load_data()
+        self.data_manager.update_result(2, {'型号': 'M3', '保修状态': '在保', '查询状态': '成功'})
+        self.data_manager.checkpoint()
+        self.data_manager.save_data()
+
+        wb = load_workbook(self.excel_file)
+        assert wb['Notes']['A1'].value == '保留内容'
+        assert wb['Sheet1']['A2'].font.bold is True
+        saved_df = pd.read_excel(self.excel_file, sheet_name='Sheet1')
+        assert saved_df.at[2, '查询状态'] == '成功'
+        assert saved_df.at[2, '型号'] == 'M3'
+        assert saved_df.at[0, '型号'] == 'Model1'
+        # 合并完成后检查点日志被清理
+        assert not self.data_manager.journal.exists()
+
+    def test_load_data_replays_unmerged_checkpoint(self):
+        """测试加载时恢复上次中断前未合并的检查点"""
+        self.data_manager.load_data()
+        self.data_manager.update_result(0, {'型号': 'Recovered', '查询状态': '成功'})
+        self.data_manager.checkpoint()
+
+        dm = DataManager(
+            file_path=self.excel_file,
+            sheet_name='Sheet1',
+            sn_column='Serial Number',
+            result_columns=self.result_columns,
+            logger=self.logger
+        )
+        df = dm.load_data()
+        assert df is not None
+        assert df.at[0, '型号'] == 'Recovered'
+        assert df.at[0, '查询状态'] == '成功'
+
+    def test_background_checkpoint_coalesces_and_flushes_on_close(self):
+        """测试后台保存合并多个保存请求，关闭时同步写完剩余快照"""
+        dm = DataManager(
+            file_path=self.excel_file,
+            sheet_name='Sheet1',
+            sn_column='Serial Number',
+            result_columns=self.result_columns,
+            logger=self.logger,
+            background_save=True
+        )
+        dm.load_data()
+
+        # 让后台线程在第一次写入时阻塞，期间提交的请求应被合并
+        import threading
+        release = threading.Event()
+        original_append = dm.journal.append
+        calls = []
+
+        def slow_append(rows):
+            calls.append(dict(rows))
+            release.wait(5)
+            return original_append(rows)
+
+        dm.saver.write_func = slow_append
+        dm.update_result(0, {'查询状态': '成功'})
+        dm.checkpoint()
+        # 保存指标在运行期间（每个检查点）即可看到，不必等到关闭
+        from ruijie_query.monitoring.performance_monitor import get_monitor
+        assert get_monitor().get_gauge("后台保存请求数/实际写入数") == "1/0"
+        dm.update_result(1, {'查询状态': '失败'})
+        dm.checkpoint()
+        dm.update_result(1, {'查询状态': '成功'})
+        dm.checkpoint()
+        release.set()
+        dm.close()
+
+        rows = dm.journal.replay()
+        assert rows[0]['查询状态'] == '成功'
+        assert rows[1]['查询状态'] == '成功'
+        metrics = dm.get_save_metrics()
+        assert metrics['save_requests'] == 3
+        assert metrics['save_writes'] <= 2
+        assert metrics['last_durable_age'] is not None
+
+    def test_get_unqueried_indexes_uses_status_mask(self):
+        """测试布尔掩码选择返回未成功行的索引"""
+        self.data_manager.load_data()
+        self.data_manager.df['查询状态'] = ['成功', None, '查询失败']
+
+        indexes = self.data_manager.get_unqueried_indexes()
+        assert list(indexes) == [1, 2]
+
+    def test_preflight_normalizes_and_skips_invalid_serials(self):
+        """测试预检规范化序列号，格式无效的行标记后不进入查询"""
+        self.data_manager.serial_patterns = [r'SN\d{3}']
+        self.data_manager.load_data()
+        df = self.data_manager.df
+        df['Serial Number'] = [' sn001\u200b', '00:1A:2B:3C:4D:5E', '  ']
+        df['查询状态'] = [None, None, None]
+
+        assert self.data_manager.preflight_serial_numbers() == 2
+        assert df.at[0, 'Serial Number'] == 'SN001'
+        assert df.at[1, '查询状态'] == INVALID_SERIAL_STATUS
+        assert df.at[2, '查询状态'] == INVALID_SERIAL_STATUS
+        assert list(self.data_manager.get_unqueried_indexes()) == [0]
+
+        # 修正后的序列号重新进入查询
+        df.at[1, 'Serial Number'] = 'SN002'
+        assert self.data_manager.preflight_serial_numbers() == 1
+        assert list(self.data_manager.get_unqueried_indexes()) == [0, 1]
+
+    def test_preflight_without_patterns_only_normalizes(self):
+        """测试默认不配置格式时只规范化序列号，不标记任何行"""
+        self.data_manager.load_data()
+        df = self.data_manager.df
+        df['Serial Number'] = [' g1rp12345\u200b', '1234-ABCD', 'X1']
+        df['查询状态'] = [None, None, None]
+
+        assert self.data_manager.preflight_serial_numbers() == 0
+        assert df['Serial Number'].tolist() == ['G1RP12345', '1234-ABCD', 'X1']
+        assert list(self.data_manager.get_unqueried_indexes()) == [0, 1, 2]
+
+    def test_preflight_changes_are_saved(self):
+        """测试预检规范化的序列号和无效标记在没有查询时也会写回数据文件"""
+        self.data_manager.serial_patterns = [r'SN\d{3}']
+        self.data_manager.load_data()
+        self.data_manager.save_data()
+        assert not self.data_manager.has_unsaved_changes()
+
+        df = self.data_manager.df
+        df['Serial Number'] = [' sn001 ', 'bad', 'SN003']
+        self.data_manager.preflight_serial_numbers()
+        assert self.data_manager.has_unsaved_changes()
+        self.data_manager.save_data()
+
+        saved = pd.read_excel(self.excel_file, sheet_name='Sheet1', dtype=str)
+        assert saved.loc[0, 'Serial Number'] == 'SN001'
+        assert saved.loc[1, '查询状态'] == INVALID_SERIAL_STATUS
+
+    def test_result_columns_use_compact_types_and_export_as_text(self):
+        """测试结果列在内存中为分类/日期/可空整数，日期列混入无法解析的值时保存为文本"""
+        self.data_manager.result_columns.update({
+            '保修结束时间': '保修结束时间',
+            '保修剩余天数': '保修剩余天数',
+        })
+        self.data_manager.load_data()
+        df = self.data_manager.df
+        assert isinstance(df['型号'].dtype, pd.CategoricalDtype)
+        assert pd.api.types.is_datetime64_any_dtype(df['保修结束时间'])
+        assert df['保修剩余天数'].dtype == 'Int64'
+
+        self.data_manager.update_results([
+            (0, {'型号': 'RG-NEW', '保修结束时间': '2030-01-31', '保修剩余天数': '120', '查询状态': '成功'}),
+        ])
+        self.data_manager.apply_buffered_results()
+        assert df.at[0, '保修结束时间'] == pd.Timestamp('2030-01-31')
+        assert df.at[0, '保修剩余天数'] == 120
+
+        # 无法解析的日期文本不丢失，整列退回分类类型
+        self.data_manager.update_result(1, {'保修结束时间': '永久', '查询状态': '成功'})
+        assert isinstance(df['保修结束时间'].dtype, pd.CategoricalDtype)
+
+        self.data_manager.save_data()
+        saved = pd.read_excel(self.excel_file, sheet_name='Sheet1', dtype=str)
+        assert saved.loc[0, '型号'] == 'RG-NEW'
+        assert saved.loc[0, '保修结束时间'] == '2030-01-31'
+        assert saved.loc[1, '保修结束时间'] == '永久'
+        assert saved.loc[0, '保修剩余天数'] == '120'
+
+    def test_update_result_writes_cells_directly_and_keeps_compact_types(self):
+        """测试逐行更新直接写入兼容的值，遇到新类别或无法解析的值时仍保持原值"""
+        self.data_manager.result_columns.update({
+            '保修结束时间': '保修结束时间',
+            '保修剩余天数': '保修剩余天数',
+        })
+        self.data_manager.load_data()
+        df = self.data_manager.df
+        self.data_manager.update_result(0, {'型号': 'Model2', '保修结束时间': '2030-01-31', '保修剩余天数': '120', '查询状态': '成功'})
+        self.data_manager.update_result(1, {'型号': 'RG-NEW', '保修结束时间': None, '保修剩余天数': '-3', '查询状态': '成功'})
+
+        assert isinstance(df['型号'].dtype, pd.CategoricalDtype)
+        assert pd.api.types.is_datetime64_any_dtype(df['保修结束时间'])
+        assert df['保修剩余天数'].dtype == 'Int64'
+        assert df['型号'].tolist()[:2] == ['Model2', 'RG-NEW']
+        assert df.at[0, '保修结束时间'] == pd.Timestamp('2030-01-31')
+        assert pd.isna(df.at[1, '保修结束时间'])
+        assert df['保修剩余天数'].tolist()[:2] == [120, -3]
+
+        self.data_manager.update_result(2, {'保修结束时间': '2030/02/28', '保修剩余天数': '一年', '查询状态': '成功'})
+        assert df.at[2, '保修结束时间'] == pd.Timestamp('2030-02-28')
+        assert df.at[2, '保修剩余天数'] == '一年'
+
+    def test_date_and_day_columns_are_saved_as_native_cells(self):
+        """测试日期和天数列整表写入、按行写入时都保存为日期/数字单元格，而不是文本"""
+        from datetime import datetime
+        from openpyxl import load_workbook
+
+        self.data_manager.result_columns.update({
+            '保修结束时间': '保修结束时间',
+            '保修剩余天数': '保修剩余天数',
+        })
+        self.data_manager.load_data()
+        self.data_manager.update_result(0, {'保修结束时间': '2030-01-31', '保修剩余天数': '120', '查询状态': '成功'})
+        self.data_manager.save_data()  # 新增了列，整表写入
+        self.data_manager.update_result(1, {'保修结束时间': '2031-06-30', '保修剩余天数': '500', '查询状态': '成功'})
+        self.data_manager.save_data()  # 只写回变更的行
+
+        workbook = load_workbook(self.excel_file)
+        try:
+            sheet = workbook['Sheet1']
+            header = {cell.value: cell.column for cell in sheet[1]}
+            for excel_row, expected_date, expected_days in ((2, datetime(2030, 1, 31), 120), (3, datetime(2031, 6, 30), 500)):
+                date_cell = sheet.cell(row=excel_row, column=header['保修结束时间'])
+                assert date_cell.value == expected_date
+                assert date_cell.number_format == 'yyyy-mm-dd'
+                assert sheet.cell(row=excel_row, column=header['保修剩余天数']).value == expected_days
+        finally:
+            workbook.close()
+
+    def test_refresh_derived_fields_recomputes_remaining_days_and_bucket(self):
+        """测试按当天日期由保修结束时间重新计算剩余天数和到期分类"""
+        self.data_manager.result_columns.update({
+            '保修结束时间': '保修结束时间',
+            '保修剩余天数': '保修剩余天数',
+        })
+        self.data_manager.derive_warranty_fields = True
+        self.data_manager.load_data()
+        self.data_manager.update_results([
+            (0, {'保修结束时间': '2026-01-31', '保修剩余天数': '400', '查询状态': '成功'}),
+            (1, {'保修结束时间': '2025-12-01', '保修剩余天数': '5', '查询状态': '成功'}),
+            (2, {'保修结束时间': None, '保修剩余天数': '7', '查询状态': '成功'}),
+        ])
+        self.data_manager.apply_buffered_results()
+
+        today = pd.Timestamp('2026-01-01')
+        assert self.data_manager.refresh_derived_fields(today) == 2
+        df = self.data_manager.df
+        assert df['保修剩余天数'].tolist()[:2] == [30, -31]
+        assert df.at[2, '保修剩余天数'] == 7  # 没有结束时间时保留原值
+        assert df['到期分类'].tolist()[:2] == ['90天内到期', '已过保']
+        # 同一天再次计算没有变化
+        assert self.data_manager.refresh_derived_fields(today) == 0
+
+    def test_update_results_buffers_and_applies_columnwise(self):
+        """测试批量结果先缓冲，选择未查询行或检查点前按列写入"""
+        self.data_manager.load_data()
+        self.data_manager.update_results([
+            (0, {'型号': 'A', '查询状态': '成功'}),
+            (1, {'型号': 'B', '查询状态': '查询失败'}),
+            (1, {'型号': 'B2', '查询状态': '成功'}),
+        ])
+        # 写入前 DataFrame 不变
+        assert pd.isna(self.data_manager.df.at[0, '查询状态'])
+
+        unqueried = self.data_manager.get_unqueried_serial_numbers('Serial Number')
+        assert unqueried == [(2, 'SN003')]
+        assert self.data_manager.df.at[1, '型号'] == 'B2'
+        assert self.data_manager.checkpoint() == 2
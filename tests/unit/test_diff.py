@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+运行结果对比单元测试
+"""
+import os
+import tempfile
+import shutil
+
+import pandas as pd
+
+import sys
+sys.path.insert(0, 'src')
+
+from ruijie_query.core.diff import (
+    ADDED_FIELD, REMOVED_FIELD, diff_snapshots, format_diff_report, load_snapshot, summarize_diff
+)
+from ruijie_query.storage import ResultLog
+
+
+class TestDiffSnapshots:
+    """diff_snapshots 的单元测试"""
+
+    def setup_method(self):
+        self.old = pd.DataFrame({
+            'Serial Number': ['SN001', 'SN002', 'SN003', 'SN004'],
+            '型号': ['RG-A', 'RG-B', 'RG-C', 'RG-D'],
+            '保修结束时间': ['2030-01-01', '2025-06-30', None, '2028-01-01'],
+            '查询状态': ['成功', '成功', '查询失败', '成功'],
+            '保修剩余天数': [100, 10, None, 50],
+        })
+        self.new = pd.DataFrame({
+            'Serial Number': [' sn002 ', 'SN001', 'SN003', 'SN005'],
+            '型号': ['RG-B', 'RG-A', 'RG-C', 'RG-E'],
+            '保修结束时间': [pd.Timestamp('2027-06-30'), pd.Timestamp('2030-01-01'), pd.Timestamp('2029-01-01'), None],
+            '查询状态': ['成功', '成功', '成功', '成功'],
+            '保修剩余天数': [9, 99, 700, None],
+        })
+
+    def test_reports_changes_grouped_by_field(self):
+        report = diff_snapshots(self.old, self.new, 'Serial Number')
+
+        assert summarize_diff(report) == {
+            ADDED_FIELD: 1, REMOVED_FIELD: 1, '保修结束时间': 2, '查询状态': 1,
+        }
+        end_dates = report[report['字段'] == '保修结束时间']
+        assert end_dates['序列号'].tolist() == ['SN002', 'SN003']
+        assert end_dates['旧值'].fillna('').tolist() == ['2025-06-30', '']
+        assert end_dates['新值'].tolist() == ['2027-06-30', '2029-01-01']
+        assert report.loc[report['字段'] == ADDED_FIELD, '序列号'].tolist() == ['SN005']
+        assert report.loc[report['字段'] == REMOVED_FIELD, '序列号'].tolist() == ['SN004']
+        # 派生的剩余天数默认不比较
+        assert '保修剩余天数' not in report['字段'].tolist()
+
+        lines = format_diff_report(report)
+        assert '保修结束时间: 2 行' in lines
+        assert '  SN003: (空) -> 2029-01-01' in lines
+
+    def test_explicit_fields_and_numeric_normalization(self):
+        old = pd.DataFrame({'Serial Number': ['SN001', 'SN002'], '天数': [1.0, None]})
+        new = pd.DataFrame({'Serial Number': ['SN001', 'SN002'], '天数': ['1', '']})
+        assert diff_snapshots(old, new, 'Serial Number', fields=['天数']).empty
+
+    def test_identical_snapshots(self):
+        assert diff_snapshots(self.old, self.old.copy(), 'Serial Number').empty
+
+
+class TestLoadSnapshot:
+    """load_snapshot 的单元测试"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_loads_workbook_and_result_log(self):
+        workbook = os.path.join(self.temp_dir, 'data.xlsx')
+        pd.DataFrame({'Serial Number': ['SN001', 'SN002'], '查询状态': ['成功', None]}).to_excel(
+            workbook, sheet_name='Sheet1', index=False
+        )
+        log_path = os.path.join(self.temp_dir, 'data.results.jsonl')
+        log = ResultLog(log_path)
+        log.append('SN002', 1, {'查询状态': '查询失败'})
+        log.append('SN002', 1, {'查询状态': '成功'})
+        log.close()
+
+        old = load_snapshot(workbook, 'Sheet1', 'Serial Number')
+        new = load_snapshot(log_path, 'Sheet1', 'Serial Number')
+        assert new['Serial Number'].tolist() == ['SN002']
+
+        report = diff_snapshots(old, new, 'Serial Number')
+        assert summarize_diff(report) == {REMOVED_FIELD: 1, '查询状态': 1}
+        changed = report[report['字段'] == '查询状态'].iloc[0]
+        assert changed['序列号'] == 'SN002'
+        assert changed['新值'] == '成功'
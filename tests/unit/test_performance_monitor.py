@@ -9,7 +9,7 @@ import pytest
 import sys
 sys.path.insert(0, 'src')
 
-from ruijie_query.monitoring.performance_monitor import get_monitor, monitor_operation
+from ruijie_query.monitoring.performance_monitor import get_monitor, monitor_operation, PerformanceMonitor
 
 
 class TestPerformanceMonitor:
@@ -344,4 +344,46 @@ class TestMonitorOperationDecorator:
         assert "parameterized_operation" in stats_summary
 
         stats = stats_summary["parameterized_operation"]
-        assert stats['count'] == 1
\ No newline at end of file
+        assert stats['count'] == 1
+
+class TestRecordedMetrics:
+    """直接记录的耗时和瞬时指标的测试"""
+
+    def test_record_time_and_gauge(self):
+        """测试 record_time 计入统计，set_gauge 出现在报告中"""
+        logger = MagicMock()
+        monitor = PerformanceMonitor(logger)
+
+        monitor.record_time("后台数据保存", 0.5)
+        monitor.record_time("后台数据保存", 1.5)
+        monitor.set_gauge("最近持久化快照距今(秒)", 3.0)
+
+        assert monitor.get_operation_count("后台数据保存") == 2
+        assert monitor.get_total_time("后台数据保存") == 2.0
+        assert monitor.get_gauge("最近持久化快照距今(秒)") == 3.0
+
+        monitor.log_performance_report()
+        logger.info.assert_any_call("📏 最近持久化快照距今(秒): 3.00")
+
+    def test_record_time_is_thread_safe_and_honours_lightweight_mode(self):
+        """测试多个线程同时记录耗时不丢数据，轻量级模式下跳过小操作"""
+        import threading
+
+        monitor = PerformanceMonitor(MagicMock())
+
+        def record():
+            for _ in range(500):
+                monitor.record_time("后台数据保存", 0.001)
+                monitor.get_stats_summary()
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert monitor.get_operation_count("后台数据保存") == 2000
+
+        monitor.set_lightweight_mode(True)
+        monitor.enable_minor_operations(False)
+        monitor.record_time("验证码识别-ddddocr", 0.1)
+        assert monitor.get_operation_count("验证码识别-ddddocr") == 0
@@ -0,0 +1,463 @@
+# -*- coding: utf-8 -*-
+"""
+存储模块单元测试
+"""
+import os
+import tempfile
+import shutil
+
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, 'src')
+
+from ruijie_query.storage.atomic import (
+    atomic_write, find_latest_valid, generation_path, is_valid_xlsx
+)
+from ruijie_query.core.data_manager import DataManager
+
+
+class TestAtomicWrite:
+    """原子写入和滚动备份的单元测试"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.target = os.path.join(self.temp_dir, 'data.xlsx')
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _write_text(self, text):
+        def _write(tmp_path):
+            with open(tmp_path, 'w') as f:
+                f.write(text)
+        return _write
+
+    def test_failed_write_keeps_target_and_removes_temp(self):
+        """测试写入失败时目标文件不变且不残留临时文件"""
+        atomic_write(self.target, self._write_text('v1'))
+
+        def _broken(tmp_path):
+            with open(tmp_path, 'w') as f:
+                f.write('half')
+            raise KeyboardInterrupt()
+
+        with pytest.raises(KeyboardInterrupt):
+            atomic_write(self.target, _broken)
+
+        with open(self.target) as f:
+            assert f.read() == 'v1'
+        assert os.listdir(self.temp_dir) == ['data.xlsx']
+
+    def test_rolling_generations(self):
+        """测试保留指定数量的滚动备份"""
+        for version in ['v1', 'v2', 'v3', 'v4']:
+            atomic_write(self.target, self._write_text(version), generations=2)
+
+        with open(self.target) as f:
+            assert f.read() == 'v4'
+        with open(generation_path(self.target, 1)) as f:
+            assert f.read() == 'v3'
+        with open(generation_path(self.target, 2)) as f:
+            assert f.read() == 'v2'
+        assert not os.path.exists(generation_path(self.target, 3))
+
+    def test_find_latest_valid_skips_truncated_workbook(self):
+        """测试截断的工作簿被识别为无效并回退到最新的有效备份"""
+        pd.DataFrame({'a': [1]}).to_excel(self.target, index=False)
+        atomic_write(
+            self.target,
+            lambda tmp: pd.DataFrame({'a': [2]}).to_excel(tmp, index=False),
+            generations=2,
+        )
+        # 模拟保存时崩溃留下的截断文件
+        with open(self.target, 'r+b') as f:
+            f.truncate(100)
+
+        assert not is_valid_xlsx(self.target)
+        assert find_latest_valid(self.target, 2, is_valid_xlsx) == generation_path(self.target, 1)
+
+
+class TestDataManagerRecovery:
+    """DataManager 从备份代恢复的测试"""
+
+    def test_load_data_recovers_from_latest_generation(self, mock_logger):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            excel_file = os.path.join(temp_dir, 'data.xlsx')
+            pd.DataFrame({
+                'Serial Number': ['SN001', 'SN002'],
+                '查询状态': ['成功', None],
+            }).to_excel(excel_file, sheet_name='Sheet1', index=False)
+
+            dm = DataManager(excel_file, 'Sheet1', 'Serial Number',
+                             {'查询状态': '查询状态'}, mock_logger, save_generations=2)
+            dm.load_data()
+            dm.update_result(1, {'查询状态': '成功'})
+            dm.save_data()
+
+            with open(excel_file, 'r+b') as f:
+                f.truncate(50)
+
+            df = dm.load_data()
+            assert df is not None
+            # 恢复的是保存前的上一代
+            assert list(df['查询状态'].astype(object).fillna('')) == ['成功', '']
+            assert is_valid_xlsx(excel_file)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class TestStorageBackends:
+    """CSV/Parquet/SQLite 存储后端的单元测试"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.df = pd.DataFrame({
+            'Serial Number': ['SN001', 'SN002', 'SN003'],
+            '型号': ['A', None, 'C'],
+        })
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_resolve_backend_name(self):
+        from ruijie_query.storage import resolve_backend_name
+
+        assert resolve_backend_name('a.xlsx') == 'excel'
+        assert resolve_backend_name('a.CSV') == 'csv'
+        assert resolve_backend_name('a.parquet') == 'parquet'
+        assert resolve_backend_name('a.sqlite3', 'auto') == 'sqlite'
+        assert resolve_backend_name('a.unknown') == 'excel'
+        assert resolve_backend_name('a.xlsx', 'csv') == 'csv'
+        with pytest.raises(ValueError):
+            resolve_backend_name('a.xlsx', 'mysql')
+
+    def test_csv_round_trip_keeps_text_and_streams_chunks(self):
+        from ruijie_query.storage import CsvBackend
+
+        path = os.path.join(self.temp_dir, 'data.csv')
+        backend = CsvBackend(path, 'Sheet1', generations=1)
+        df = self.df.assign(**{'Serial Number': ['001', '002', '003']})
+        backend.write_full(df)
+        backend.write_full(df)
+
+        loaded = backend.read()
+        assert loaded['Serial Number'].tolist() == ['001', '002', '003']
+        assert os.path.exists(generation_path(path, 1))
+
+        chunks = list(backend.iter_chunks(2))
+        assert [len(c) for c in chunks] == [2, 1]
+        assert chunks[1].index.tolist() == [2]
+
+    def test_parquet_round_trip_and_streams_chunks(self):
+        pytest.importorskip('pyarrow')
+        from ruijie_query.storage import ParquetBackend
+
+        path = os.path.join(self.temp_dir, 'data.parquet')
+        backend = ParquetBackend(path, 'Sheet1')
+        backend.write_full(self.df)
+
+        pd.testing.assert_frame_equal(backend.read(), self.df)
+        chunks = list(backend.iter_chunks(2))
+        assert [len(c) for c in chunks] == [2, 1]
+        assert chunks[1].index.tolist() == [2]
+
+    def test_sqlite_write_rows_updates_in_place(self):
+        from ruijie_query.storage import SqliteBackend
+
+        path = os.path.join(self.temp_dir, 'data.db')
+        backend = SqliteBackend(path, 'devices')
+        assert not backend.exists()
+        backend.write_full(self.df)
+        assert backend.exists()
+
+        df = backend.read()
+        df['查询状态'] = None
+        df.loc[1, ['型号', '查询状态']] = ['B', '成功']
+        assert backend.write_rows(df, [1], ['型号', '查询状态'])
+
+        loaded = SqliteBackend(path, 'devices').read()
+        assert loaded['型号'].tolist() == ['A', 'B', 'C']
+        assert loaded['查询状态'].tolist()[1] == '成功'
+        assert [len(c) for c in backend.iter_chunks(2)] == [2, 1]
+
+    def test_sqlite_stores_dates_as_date_text(self):
+        import sqlite3
+        from ruijie_query.storage import SqliteBackend
+
+        path = os.path.join(self.temp_dir, 'data.db')
+        backend = SqliteBackend(path, 'devices')
+        df = self.df.copy()
+        df['保修结束时间'] = pd.to_datetime(['2030-01-31', None, '2031-06-30'])
+        backend.write_full(df)
+        df.loc[1, '保修结束时间'] = pd.Timestamp('2029-12-01')
+        assert backend.write_rows(df, [1], ['保修结束时间'])
+
+        with sqlite3.connect(path) as conn:
+            stored = [row[0] for row in conn.execute('SELECT "保修结束时间" FROM devices ORDER BY rowid')]
+        assert stored == ['2030-01-31', '2029-12-01', '2031-06-30']
+
+    def test_sqlite_write_full_keeps_schema_and_rowids(self):
+        import sqlite3
+        from contextlib import closing
+        from ruijie_query.storage import SqliteBackend
+
+        path = os.path.join(self.temp_dir, 'data.db')
+        with closing(sqlite3.connect(path)) as conn:
+            with conn:
+                conn.execute('CREATE TABLE devices ("Serial Number" TEXT NOT NULL, "型号" TEXT)')
+                conn.execute('CREATE INDEX idx_sn ON devices ("Serial Number")')
+                conn.executemany('INSERT INTO devices VALUES (?, ?)', [('SN1', 'A'), ('SN2', 'B')])
+                conn.execute('DELETE FROM devices WHERE rowid = 1')
+                conn.execute('INSERT INTO devices VALUES (?, ?)', ('SN3', 'C'))
+
+        backend = SqliteBackend(path, 'devices')
+        df = backend.read()
+        df['查询状态'] = ['成功', None]
+        df.loc[2] = ['SN4', 'D', None]
+        backend.write_full(df)
+
+        with closing(sqlite3.connect(path)) as conn:
+            schema = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'devices'").fetchone()[0]
+            indexes = [row[1] for row in conn.execute('PRAGMA index_list(devices)')]
+            rowids = [row[0] for row in conn.execute('SELECT rowid FROM devices ORDER BY rowid')]
+        assert 'NOT NULL' in schema
+        assert indexes == ['idx_sn']
+        # 已有的行沿用原 rowid，新增的行排在其后
+        assert rowids == [2, 3, 4]
+        loaded = SqliteBackend(path, 'devices').read()
+        assert loaded['Serial Number'].tolist() == ['SN2', 'SN3', 'SN4']
+        assert loaded['查询状态'].tolist()[0] == '成功'
+
+        # 整表写入后按 rowid 原地更新仍然指向正确的行
+        df.loc[1, '查询状态'] = '失败'
+        assert backend.write_rows(df, [1], ['查询状态'])
+        assert SqliteBackend(path, 'devices').read()['查询状态'].tolist()[1] == '失败'
+
+    def test_xlsm_keeps_vba_project_on_row_and_full_writes(self):
+        import zipfile
+        from ruijie_query.storage.excel_backend import ExcelBackend
+
+        plain = os.path.join(self.temp_dir, 'plain.xlsx')
+        path = os.path.join(self.temp_dir, 'macros.xlsm')
+        self.df.to_excel(plain, sheet_name='Sheet1', index=False)
+        # 在普通工作簿中加入 VBA 工程，构造启用宏的工作簿
+        with zipfile.ZipFile(plain) as src, zipfile.ZipFile(path, 'w') as dst:
+            for item in src.infolist():
+                data = src.read(item.filename)
+                if item.filename == '[Content_Types].xml':
+                    data = data.replace(
+                        b'</Types>',
+                        b'<Default Extension="bin" ContentType="application/vnd.ms-office.vbaProject"/></Types>',
+                    ).replace(
+                        b'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml',
+                        b'application/vnd.ms-excel.sheet.macroEnabled.main+xml',
+                    )
+                dst.writestr(item, data)
+            dst.writestr('xl/vbaProject.bin', b'VBA-PROJECT')
+
+        backend = ExcelBackend(path, 'Sheet1')
+        df = backend.read()
+        df.loc[1, '型号'] = 'B'
+        assert backend.write_rows(df, [1], ['型号'])
+        with zipfile.ZipFile(path) as archive:
+            assert archive.read('xl/vbaProject.bin') == b'VBA-PROJECT'
+
+        df['查询状态'] = '成功'
+        backend.write_full(df)
+        with zipfile.ZipFile(path) as archive:
+            assert archive.read('xl/vbaProject.bin') == b'VBA-PROJECT'
+        loaded = backend.read()
+        assert loaded['型号'].tolist() == ['A', 'B', 'C']
+        assert loaded['查询状态'].tolist() == ['成功'] * 3
+
+    def test_data_manager_uses_backend_by_extension(self):
+        path = os.path.join(self.temp_dir, 'data.csv')
+        self.df.to_csv(path, index=False)
+
+        dm = DataManager(path, 'Sheet1', 'Serial Number', {'型号': '型号'})
+        assert dm.backend.name == 'csv'
+        dm.load_data()
+        dm.update_result(0, {'型号': 'X', '查询状态': '成功'})
+        dm.save_data()
+
+        loaded = pd.read_csv(path, dtype=str, encoding='utf-8-sig')
+        assert loaded.loc[0, '型号'] == 'X'
+        assert loaded.loc[0, '查询状态'] == '成功'
+
+
+class TestResultLog:
+    """结果日志和 compact 的单元测试"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, 'data.xlsx')
+        pd.DataFrame({'Serial Number': ['SN001', 'SN002']}).to_excel(self.file_path, index=False)
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _make_manager(self, mode):
+        return DataManager(
+            self.file_path, 'Sheet1', 'Serial Number', {'型号': '型号'},
+            result_log_mode=mode,
+        )
+
+    def test_latest_record_per_serial_and_partial_line(self):
+        from ruijie_query.storage import ResultLog
+
+        log = ResultLog(os.path.join(self.temp_dir, 'r.jsonl'))
+        log.append('SN001', 0, {'查询状态': '查询失败'}, {'attempts': 3})
+        log.append('SN001', 0, {'查询状态': '成功'}, {'attempts': 1})
+        log.close()
+        with open(log.path, 'a', encoding='utf-8') as f:
+            f.write('{"serial": "SN002", "val')
+
+        latest = log.latest()
+        assert list(latest) == ['SN001']
+        assert latest['SN001']['status'] == '成功'
+        assert latest['SN001']['attempts'] == 1
+
+    def test_only_mode_keeps_workbook_and_compact_merges(self):
+        dm = self._make_manager('only')
+        dm.load_data()
+        dm.update_results([(1, {'型号': 'RG-S2910', '查询状态': '成功'})], [{'attempts': 2}])
+        dm.save_data()
+        dm.close()
+
+        assert '查询状态' not in pd.read_excel(self.file_path).columns
+
+        # 重新加载时从结果日志恢复，已成功的序列号不再查询
+        dm = self._make_manager('only')
+        dm.load_data()
+        assert list(dm.get_unqueried_indexes()) == [0]
+
+        assert dm.compact_result_log() == 1
+        dm.close()
+        saved = pd.read_excel(self.file_path)
+        assert saved.loc[1, '型号'] == 'RG-S2910'
+        assert saved.loc[1, '查询状态'] == '成功'
+
+
+class TestFrameCache:
+    """解析结果缓存的单元测试"""
+
+    def setup_method(self):
+        pytest.importorskip('pyarrow')
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, 'data.xlsx')
+        pd.DataFrame({
+            'Serial Number': ['SN001', 'SN002'],
+            '型号': ['A', None],
+        }).to_excel(self.file_path, sheet_name='Sheet1', index=False)
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _make_manager(self):
+        return DataManager(self.file_path, 'Sheet1', 'Serial Number', {'型号': '型号'}, read_cache=True)
+
+    def test_warm_load_reads_cache_until_file_changes(self):
+        from ruijie_query.storage import FrameCache
+
+        cache = FrameCache(self.file_path)
+        assert cache.load() is None
+        self._make_manager().load_data()
+        assert os.path.exists(cache.path)
+        assert cache.load()['Serial Number'].tolist() == ['SN001', 'SN002']
+
+        with patch('pandas.read_excel') as mock_read:
+            df = self._make_manager().load_data()
+            mock_read.assert_not_called()
+        assert df['Serial Number'].tolist() == ['SN001', 'SN002']
+
+        # 外部修改数据文件后缓存失效
+        pd.DataFrame({'Serial Number': ['SN009']}).to_excel(self.file_path, sheet_name='Sheet1', index=False)
+        assert cache.load() is None
+        assert self._make_manager().load_data()['Serial Number'].tolist() == ['SN009']
+
+    def test_save_rebuilds_cache(self):
+        from ruijie_query.storage import FrameCache
+
+        dm = self._make_manager()
+        dm.load_data()
+        dm.update_result(1, {'型号': 'B', '查询状态': '成功'})
+        dm.save_data()
+
+        cached = FrameCache(self.file_path).load()
+        assert cached is not None
+        assert cached.loc[1, '型号'] == 'B'
+        assert cached.loc[1, '查询状态'] == '成功'
+
+
+class TestXlsxExport:
+    """流式导出 xlsx 的单元测试"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.output = os.path.join(self.temp_dir, 'export.xlsx')
+        self.df = pd.DataFrame({
+            'Serial Number': [f'SN{i:03d}' for i in range(5)],
+            '查询状态': ['成功', '查询失败', None, '成功', '成功'],
+            '保修结束时间': ['2030-01-01', None, None, '2025-06-30', '2031-12-31'],
+        })
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _chunks(self, size=2):
+        return (self.df.iloc[start:start + size] for start in range(0, len(self.df), size))
+
+    def test_streams_chunks_with_widths_and_status(self):
+        from openpyxl import load_workbook
+        from ruijie_query.storage import export_xlsx
+
+        summary = export_xlsx(self._chunks(), self.output)
+        assert summary['rows'] == 5
+        assert summary['sheets'] == ['Sheet1']
+
+        result = pd.read_excel(self.output, sheet_name='Sheet1', dtype=str)
+        assert result.columns.tolist() == self.df.columns.tolist()
+        assert result['Serial Number'].tolist() == self.df['Serial Number'].tolist()
+        assert result['查询状态'].fillna('').tolist() == ['成功', '查询失败', '', '成功', '成功']
+
+        sheet = load_workbook(self.output)['Sheet1']
+        assert sheet.column_dimensions['A'].width >= len('Serial Number')
+        assert sheet.freeze_panes == 'A2'
+        assert sheet['B2'].font.color.rgb.endswith('006100')
+        assert sheet['B3'].font.color.rgb.endswith('9C0006')
+
+    def test_date_columns_are_written_as_date_cells(self):
+        from datetime import datetime
+        from openpyxl import load_workbook
+        from ruijie_query.storage import export_xlsx
+
+        self.df['保修结束时间'] = pd.to_datetime(self.df['保修结束时间'])
+        export_xlsx(self._chunks(), self.output)
+
+        sheet = load_workbook(self.output)['Sheet1']
+        assert sheet['C2'].value == datetime(2030, 1, 1)
+        assert sheet['C2'].number_format == 'yyyy-mm-dd'
+        assert sheet['C3'].value is None
+
+    def test_splits_sheets_at_row_limit(self):
+        from ruijie_query.storage import export_xlsx
+
+        summary = export_xlsx(self._chunks(), self.output, sheet_name='结果', max_rows=3)
+        assert summary['sheets'] == ['结果', '结果_2', '结果_3']
+
+        sheets = pd.read_excel(self.output, sheet_name=None, dtype=str)
+        assert list(sheets) == ['结果', '结果_2', '结果_3']
+        assert all(len(sheet) <= 2 for sheet in sheets.values())
+        combined = pd.concat(sheets.values(), ignore_index=True)
+        assert combined['Serial Number'].tolist() == self.df['Serial Number'].tolist()
+
+    def test_empty_input_writes_header_only_sheet(self):
+        from ruijie_query.storage import export_xlsx
+
+        summary = export_xlsx(iter([self.df.iloc[0:0]]), self.output)
+        assert summary['rows'] == 0
+        assert pd.read_excel(self.output).columns.tolist() == self.df.columns.tolist()